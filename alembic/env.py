@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from app.core.config import settings
+from app.core.config import get_settings
 from app.db.base import Base
 from app.models import activity, building, organization, phone  # noqa: F401
 
@@ -18,7 +18,8 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# Тесты передают свою БД через config.attributes, не трогая настройки приложения.
+config.set_main_option("sqlalchemy.url", config.attributes.get("database_url") or get_settings().DATABASE_URL)
 
 target_metadata = Base.metadata
 
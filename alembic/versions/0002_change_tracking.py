@@ -0,0 +1,44 @@
+"""change tracking
+
+Revision ID: 0002_change_tracking
+Revises: 0001_create_tables
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_change_tracking"
+down_revision = "0001_create_tables"
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ("activities", "buildings", "organizations", "phones")
+
+
+def upgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.add_column(
+            table,
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        )
+
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("entity", sa.String(length=32), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("op", sa.String(length=8), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+    # Уже существующие строки попадают в журнал как вставки, чтобы синхронизация с since=0 видела все данные.
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"INSERT INTO change_log (entity, entity_id, op) SELECT '{table}', id, 'insert' FROM {table} ORDER BY id"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("change_log")
+    for table in reversed(TRACKED_TABLES):
+        op.drop_column(table, "updated_at")
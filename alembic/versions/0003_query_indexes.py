@@ -0,0 +1,34 @@
+"""query indexes
+
+Revision ID: 0003_query_indexes
+Revises: 0002_change_tracking
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+
+revision = "0003_query_indexes"
+down_revision = "0002_change_tracking"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Первичный ключ (organization_id, activity_id) не помогает фильтру по activity_id.
+    op.create_index(
+        "ix_organization_activity_activity_id_organization_id",
+        "organization_activity",
+        ["activity_id", "organization_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_buildings_latitude_longitude",
+        "buildings",
+        ["latitude", "longitude"],
+        unique=False,
+        postgresql_include=["id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_buildings_latitude_longitude", table_name="buildings")
+    op.drop_index("ix_organization_activity_activity_id_organization_id", table_name="organization_activity")
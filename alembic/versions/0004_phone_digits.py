@@ -0,0 +1,31 @@
+"""phone digits
+
+Revision ID: 0004_phone_digits
+Revises: 0003_query_indexes
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_phone_digits"
+down_revision = "0003_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("phones", sa.Column("number_digits", sa.String(length=32), nullable=True))
+    # Та же нормализация, что app.search.normalize.normalize_phone: в номере остаются только цифры.
+    op.execute(r"UPDATE phones SET number_digits = regexp_replace(number, '\D', '', 'g')")
+    op.alter_column("phones", "number_digits", nullable=False)
+    op.create_index(
+        "ix_phones_number_digits",
+        "phones",
+        ["number_digits"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_phones_number_digits", table_name="phones")
+    op.drop_column("phones", "number_digits")
@@ -0,0 +1,115 @@
+import asyncio
+import heapq
+import itertools
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from functools import lru_cache
+
+from app.core.config import get_settings
+from app.core.exceptions import ServiceOverloaded
+from app.core.metrics import get_metrics
+
+
+class Priority(IntEnum):
+    high = 0
+    normal = 1
+    low = 2
+
+
+class PriorityGate:
+    # Семафор с очередью по приоритету: освободившийся слот получает самый приоритетный из ожидающих,
+    # среди равных — пришедший раньше. Очередь ограничена, ожидание — дедлайном.
+    def __init__(self, limit: int, max_queue: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self._in_use = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Priority, deadline: float) -> bool:
+        if self._in_use < self.limit and not self._waiters:
+            self._in_use += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        entry = (int(priority), next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=max(deadline - loop.time(), 0))
+            return True
+        except (TimeoutError, asyncio.CancelledError) as exc:
+            if future.done():
+                # Слот передан в момент истечения дедлайна или отмены — возвращаем его следующему.
+                self.release()
+            else:
+                future.cancel()
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return False
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Слот переходит ожидающему напрямую, счетчик занятых не меняется.
+                future.set_result(None)
+                return
+        self._in_use -= 1
+
+
+class AdmissionController:
+    # Ограничивает число запросов, одновременно работающих с БД, чтобы при перегрузке они не копились
+    # в ожидании соединения из пула до таймаута gunicorn: лишние ждут слот не дольше queue_timeout
+    # и получают 503. Для отдельных маршрутов можно задать собственный предел.
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        route_limits: dict[str, int] | None = None,
+    ) -> None:
+        self.queue_timeout = queue_timeout
+        self._global = PriorityGate(max_concurrency, max_queue)
+        self._routes = {route: PriorityGate(limit, max_queue) for route, limit in (route_limits or {}).items()}
+
+    @asynccontextmanager
+    async def admit(self, route: str, priority: Priority) -> AsyncIterator[None]:
+        deadline = asyncio.get_running_loop().time() + self.queue_timeout
+        gates = [gate for gate in (self._routes.get(route), self._global) if gate is not None]
+        acquired: list[PriorityGate] = []
+        try:
+            for gate in gates:
+                if not await gate.acquire(priority, deadline):
+                    get_metrics().inc("admission.rejected")
+                    raise ServiceOverloaded()
+                acquired.append(gate)
+            get_metrics().inc("admission.admitted")
+            yield
+        finally:
+            for gate in reversed(acquired):
+                gate.release()
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+        route_limits=settings.ADMISSION_ROUTE_LIMITS,
+    )
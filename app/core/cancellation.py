@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from contextlib import suppress
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import get_metrics
+
+logger = logging.getLogger("app")
+
+
+class CancelOnDisconnectMiddleware:
+    # Отменяет обработку GET/HEAD, если клиент закрыл соединение до ответа: отмена задачи прерывает
+    # и выполняющийся запрос asyncpg (драйвер отправляет серверу cancel), БД не считает результат впустую.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        disconnected = asyncio.Event()
+        body_delivered = False
+
+        async def app_receive() -> Message:
+            # Тело GET пустое; после него приложение может ждать только разрыв соединения.
+            nonlocal body_delivered
+            if not body_delivered:
+                body_delivered = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        handler = asyncio.create_task(self.app(scope, app_receive, send))
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await asyncio.wait({handler, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            handler.cancel()
+            raise
+        finally:
+            watcher.cancel()
+
+        if not handler.done():
+            handler.cancel()
+            with suppress(asyncio.CancelledError):
+                await handler
+            get_metrics().inc("requests.cancelled_on_disconnect")
+            logger.warning("Request cancelled, client disconnected: %s %s", scope["method"], scope["path"])
+            return
+        await handler
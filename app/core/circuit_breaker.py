@@ -0,0 +1,83 @@
+import time
+from functools import lru_cache
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.config import get_settings
+from app.core.metrics import get_metrics
+
+# SQLSTATE query_canceled: сработал statement_timeout (дедлайн запроса).
+QUERY_CANCELED_SQLSTATE = "57014"
+
+
+def is_query_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, DBAPIError) and getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED_SQLSTATE
+
+
+def is_unavailable_error(exc: BaseException) -> bool:
+    # Ошибки доступности БД, а не запроса: соединение не открылось или оборвалось, пул не выдал соединение.
+    # Нарушение ограничения или ошибка в SQL автомат не размыкают.
+    if is_query_timeout(exc):
+        return False
+    return isinstance(exc, (OperationalError, InterfaceError, PoolTimeoutError, ConnectionError, TimeoutError))
+
+
+class CircuitBreaker:
+    # Автомат вокруг доступа к БД. После failure_threshold сбоев подряд он размыкается, и запросы
+    # reset_timeout секунд не ходят в БД (и не ждут соединения до таймаута). Затем пропускается один пробный
+    # запрос: успех замыкает автомат, сбой размыкает его еще на reset_timeout.
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self.probe_due() else "open"
+
+    def probe_due(self) -> bool:
+        return self._opened_at is not None and time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allow_request(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if not self.probe_due():
+            get_metrics().inc("db.breaker_rejected")
+            return False
+        # Пробный запрос: до его завершения (и если он так и не завершится) остальные ждут следующего окна.
+        self._opened_at = time.monotonic()
+        return True
+
+    def record_success(self) -> bool:
+        # True, если успех замкнул разомкнутый автомат: БД восстановилась.
+        recovered = self._opened_at is not None
+        if recovered:
+            get_metrics().inc("db.breaker_closed")
+        self._failures = 0
+        self._opened_at = None
+        return recovered
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                get_metrics().inc("db.breaker_opened")
+            self._opened_at = time.monotonic()
+
+
+@lru_cache(maxsize=1)
+def get_circuit_breaker() -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        failure_threshold=settings.DB_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.DB_BREAKER_RESET_TIMEOUT,
+    )
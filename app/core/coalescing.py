@@ -0,0 +1,70 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from fastapi import Request
+
+from app.core.data_version import get_data_version
+from app.core.profiling import PROFILE_HEADER
+
+T = TypeVar("T")
+
+COALESCED_PATH_PREFIXES = ("/organizations", "/buildings", "/activities", "/autocomplete")
+
+
+class SingleFlight(Generic[T]):
+    # Одинаковые одновременные вызовы в пределах воркера ждут результат первого (ведущего),
+    # а не выполняют свою копию запросов к БД.
+    def __init__(self) -> None:
+        self._in_flight: dict[Hashable, asyncio.Future[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                # Ведущий отменен (клиент ушел) — ведомый, если сам не отменен, выполняет запрос заново.
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        # Исключение ведущего может быть никем не прочитано — гасим предупреждение asyncio.
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._in_flight[key]
+
+
+def coalescing_key(request: Request) -> Hashable | None:
+    if request.method != "GET" or not request.url.path.startswith(COALESCED_PATH_PREFIXES):
+        return None
+    if PROFILE_HEADER in request.headers:
+        # Профилируемый запрос должен выполниться сам, а не получить копию чужого ответа.
+        return None
+    # Ключ учитывает все, от чего зависит ответ: маршрут, параметры (без учета порядка), ключ API
+    # (иначе запрос с неверным ключом получил бы чужой ответ), If-None-Match и версию данных
+    # (запрос, пришедший после записи, не должен получить результат, начатый до нее).
+    return (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        request.headers.get("X-API-Key"),
+        request.headers.get("If-None-Match"),
+        get_data_version().current(),
+    )
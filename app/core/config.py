@@ -2,13 +2,19 @@ import logging
 from functools import lru_cache
 
 from fastapi import Depends
-from pydantic import Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 logger = logging.getLogger("app.settings")
 
 
 
+class RateLimitConfig(BaseModel):
+    per_second: float | None = Field(default=None, gt=0)
+    burst: int = Field(default=20, ge=1)
+    concurrency: int | None = Field(default=None, ge=1)
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         case_sensitive=True,
@@ -18,16 +24,119 @@ class Settings(BaseSettings):
     )
 
     API_KEYS: set[str] = Field(default_factory=set, validation_alias="API_KEYS")
+    # Ключи, которым разрешены пакетные изменения справочника (/bulk); ключи из API_KEYS дают только чтение.
+    WRITE_API_KEYS: set[str] = Field(default_factory=set, validation_alias="WRITE_API_KEYS")
     DATABASE_URL: str | None = Field(default=None, validation_alias="DATABASE_URL")
     ENVIRONMENT: str = Field(default="development", validation_alias="ENVIRONMENT")
+    # Файл версии данных, общий для всех воркеров хоста: без него каждый воркер ведет свою версию, отдает 304
+    # по устаревшему ETag и не перестраивает индексы после записи в другом воркере. Пустое значение — версия
+    # только в памяти процесса (допустимо для одного процесса, например uvicorn --reload).
+    DATA_VERSION_FILE: str | None = Field(default="data/data_version.json", validation_alias="DATA_VERSION_FILE")
+    COUNT_ESTIMATE_CAP: int = Field(default=10_000, ge=1, validation_alias="COUNT_ESTIMATE_CAP")
+    COALESCE_REQUESTS: bool = Field(default=True, validation_alias="COALESCE_REQUESTS")
+    READ_MODEL_ENABLED: bool = Field(default=False, validation_alias="READ_MODEL_ENABLED")
+    READ_MODEL_PATH: str = Field(default="data/read_model.bin", validation_alias="READ_MODEL_PATH")
+    RATE_LIMIT_BACKEND: str = Field(default="memory", validation_alias="RATE_LIMIT_BACKEND")
+    RATE_LIMIT_PER_SECOND: float | None = Field(default=None, gt=0, validation_alias="RATE_LIMIT_PER_SECOND")
+    RATE_LIMIT_BURST: int = Field(default=20, ge=1, validation_alias="RATE_LIMIT_BURST")
+    RATE_LIMIT_CONCURRENCY: int | None = Field(default=None, ge=1, validation_alias="RATE_LIMIT_CONCURRENCY")
+    # JSON вида {"<api key>": {"per_second": 5, "burst": 10, "concurrency": 2}} — лимиты отдельных ключей.
+    RATE_LIMIT_OVERRIDES: dict[str, RateLimitConfig] = Field(default_factory=dict, validation_alias="RATE_LIMIT_OVERRIDES")
+    # По умолчанию — размер пула SQLAlchemy (pool_size 5 + max_overflow 10).
+    ADMISSION_MAX_CONCURRENCY: int = Field(default=15, ge=1, validation_alias="ADMISSION_MAX_CONCURRENCY")
+    ADMISSION_MAX_QUEUE: int = Field(default=100, ge=0, validation_alias="ADMISSION_MAX_QUEUE")
+    ADMISSION_QUEUE_TIMEOUT: float = Field(default=5.0, gt=0, validation_alias="ADMISSION_QUEUE_TIMEOUT")
+    # Ключ — имя маршрута (имя функции эндпоинта), например {"list_nearby": 4}.
+    ADMISSION_ROUTE_LIMITS: dict[str, int] = Field(default_factory=dict, validation_alias="ADMISSION_ROUTE_LIMITS")
+    ADMISSION_HIGH_PRIORITY_ROUTES: set[str] = Field(
+        default_factory=lambda: {"get_organization"},
+        validation_alias="ADMISSION_HIGH_PRIORITY_ROUTES",
+    )
+    ADMISSION_LOW_PRIORITY_ROUTES: set[str] = Field(
+        default_factory=lambda: {
+            "list_nearby",
+            "list_within_rect",
+            "list_within_polygon",
+            "nearest_organizations",
+            "list_buildings_nearby",
+            "search_by_name",
+            "fuzzy_search_by_name",
+        },
+        validation_alias="ADMISSION_LOW_PRIORITY_ROUTES",
+    )
+    # Бюджет времени запроса к БД (мс); меньше таймаута gunicorn, чтобы воркер не убивался посреди запроса.
+    STATEMENT_TIMEOUT_MS: int = Field(default=30_000, ge=1, validation_alias="STATEMENT_TIMEOUT_MS")
+    # Ключ — имя маршрута (имя функции эндпоинта), например {"list_nearby": 3000}.
+    STATEMENT_TIMEOUTS: dict[str, int] = Field(
+        default_factory=lambda: {
+            "list_nearby": 5_000,
+            "list_within_rect": 5_000,
+            "list_within_polygon": 5_000,
+            "nearest_organizations": 5_000,
+            "search_by_name": 5_000,
+            "fuzzy_search_by_name": 5_000,
+        },
+        validation_alias="STATEMENT_TIMEOUTS",
+    )
+    # Запрос с заголовком X-Profile-Token, равным PROFILE_TOKEN, профилируется всегда,
+    # остальные — с вероятностью PROFILE_SAMPLE_RATE.
+    PROFILE_TOKEN: str | None = Field(default=None, validation_alias="PROFILE_TOKEN")
+    PROFILE_SAMPLE_RATE: float = Field(default=0.0, ge=0, le=1, validation_alias="PROFILE_SAMPLE_RATE")
+    PROFILE_INTERVAL_MS: float = Field(default=5.0, gt=0, validation_alias="PROFILE_INTERVAL_MS")
+    PROFILE_DIR: str = Field(default="data/profiles", validation_alias="PROFILE_DIR")
+    BATCH_MAX_REQUESTS: int = Field(default=20, ge=1, validation_alias="BATCH_MAX_REQUESTS")
+    # Сколько подзапросов параллельного пакета выполняются одновременно (каждый со своей сессией).
+    BATCH_MAX_CONCURRENCY: int = Field(default=4, ge=1, validation_alias="BATCH_MAX_CONCURRENCY")
+    LIVE_MAX_SUBSCRIPTIONS: int = Field(default=1000, ge=1, validation_alias="LIVE_MAX_SUBSCRIPTIONS")
+    # Событий в очереди подписчика; медленный клиент при переполнении получает resync.
+    LIVE_QUEUE_SIZE: int = Field(default=1000, ge=1, validation_alias="LIVE_QUEUE_SIZE")
+    LIVE_HEARTBEAT_SECONDS: float = Field(default=15.0, gt=0, validation_alias="LIVE_HEARTBEAT_SECONDS")
+    # Как часто проверяется версия данных: так видны записи других воркеров.
+    LIVE_POLL_INTERVAL: float = Field(default=1.0, gt=0, validation_alias="LIVE_POLL_INTERVAL")
+    # Сбоев доступа к БД подряд, после которых автомат размыкается, и пауза до пробного запроса (секунды).
+    DB_BREAKER_FAILURE_THRESHOLD: int = Field(default=5, ge=1, validation_alias="DB_BREAKER_FAILURE_THRESHOLD")
+    DB_BREAKER_RESET_TIMEOUT: float = Field(default=10.0, gt=0, validation_alias="DB_BREAKER_RESET_TIMEOUT")
+    # Последних успешных GET-ответов, которые отдаются устаревшими, пока БД недоступна; 0 — выключено.
+    STALE_CACHE_MAX_ENTRIES: int = Field(default=1000, ge=0, validation_alias="STALE_CACHE_MAX_ENTRIES")
+    EXPORT_DIR: str = Field(default="data/exports", validation_alias="EXPORT_DIR")
+    EXPORT_MAX_CONCURRENCY: int = Field(default=2, ge=1, validation_alias="EXPORT_MAX_CONCURRENCY")
+    EXPORT_MAX_PENDING: int = Field(default=10, ge=1, validation_alias="EXPORT_MAX_PENDING")
+    EXPORT_CHUNK_SIZE: int = Field(default=1000, ge=1, validation_alias="EXPORT_CHUNK_SIZE")
+    EXPORT_TTL_SECONDS: int = Field(default=86_400, ge=60, validation_alias="EXPORT_TTL_SECONDS")
 
-    @field_validator("API_KEYS", mode="before")
+    @field_validator("API_KEYS", "WRITE_API_KEYS", mode="before")
     @classmethod
     def assemble_api_keys(cls, value: str | list[str] | set[str]) -> set[str]:
         if isinstance(value, str):
             return {key.strip() for key in value.split(",") if key.strip()}
         return set(value)
 
+    @field_validator("DATA_VERSION_FILE", mode="before")
+    @classmethod
+    def assemble_data_version_file(cls, value: str | None) -> str | None:
+        return value or None
+
+    @model_validator(mode="after")
+    def check_read_model_version(self) -> "Settings":
+        # Снимок сверяется с версией данных: с версией в памяти процесса воркеры, не видевшие записи,
+        # продолжали бы отдавать из снимка устаревшие данные.
+        if self.READ_MODEL_ENABLED and self.DATA_VERSION_FILE is None:
+            raise ValueError("READ_MODEL_ENABLED requires DATA_VERSION_FILE")
+        return self
+
+    def rate_limit_for(self, api_key: str) -> RateLimitConfig:
+        override = self.RATE_LIMIT_OVERRIDES.get(api_key)
+        if override is not None:
+            return override
+        return RateLimitConfig(
+            per_second=self.RATE_LIMIT_PER_SECOND,
+            burst=self.RATE_LIMIT_BURST,
+            concurrency=self.RATE_LIMIT_CONCURRENCY,
+        )
+
+    def statement_timeout_for(self, route_name: str) -> int:
+        return self.STATEMENT_TIMEOUTS.get(route_name, self.STATEMENT_TIMEOUT_MS)
+
     @field_validator("DATABASE_URL", mode="before")
     @classmethod
     def assemble_db_connection(cls, value: str) -> str:
@@ -56,6 +165,5 @@ def get_settings() -> "Settings":
     return SettingsBuilder.build()
 
 
-# settings_dep: для внедрения зависимостей FastAPI (берется из DI), settings: прямой вызов для использования вне DI.
+# settings_dep: для внедрения зависимостей FastAPI; вне DI — get_settings(). Настройки не читаются при импорте модуля.
 settings_dep = Depends(get_settings)
-settings = get_settings()
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Literal
+
+from app.core.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессная блокировка недоступна, остается атомарная замена файла.
+    fcntl = None
+
+logger = logging.getLogger("app.data_version")
+
+DIRECTORY_TABLES = frozenset({"activities", "buildings", "organizations", "organization_activity", "phones"})
+
+RowOp = Literal["insert", "update", "delete"]
+
+
+@dataclass(frozen=True)
+class RowChange:
+    table: str
+    id: int
+    op: RowOp
+    values: dict[str, Any] = field(default_factory=dict, compare=False)
+
+
+@dataclass(frozen=True)
+class DataChange:
+    version: int
+    previous_version: int
+    tables: frozenset[str]
+    rows: tuple[RowChange, ...] = ()
+
+
+DataChangeListener = Callable[[DataChange], None]
+
+
+class DataVersion:
+    # Монотонно растущая версия данных справочника. С файлом (DATA_VERSION_FILE, по умолчанию
+    # data/data_version.json) ее видят все воркеры gunicorn на одном хосте, без файла она живет в процессе.
+    def __init__(self, path: str | Path | None = None) -> None:
+        self._path = Path(path) if path else None
+        self._lock = threading.Lock()
+        # Старт с текущего времени: ETag, выданные прошлым процессом, не совпадут с новыми.
+        self._base = time.time_ns()
+        self._version = self._base
+        self._tables: dict[str, int] = {}
+        self._signature: tuple[int, int] | None = None
+        self._listeners: list[DataChangeListener] = []
+        if self._path is not None:
+            self._refresh()
+            if self._signature is None:
+                with self._lock:
+                    self._write()
+
+    def current(self) -> int:
+        if self._path is not None:
+            self._refresh()
+        return self._version
+
+    def table_version(self, *tables: str) -> int:
+        if self._path is not None:
+            self._refresh()
+        return max((self._tables.get(table, self._base) for table in tables), default=self._version)
+
+    def bump(self, tables: Iterable[str], rows: Iterable[RowChange] = ()) -> int:
+        changed = frozenset(tables)
+        with self._lock, self._file_lock():
+            if self._path is not None:
+                self._refresh(force=True)
+            previous_version = self._version
+            # time_ns не дает двум воркерам выдать одинаковую версию при одновременной записи.
+            version = max(previous_version + 1, time.time_ns())
+            self._version = version
+            for table in changed:
+                self._tables[table] = version
+            if self._path is not None:
+                self._write()
+        self._notify(DataChange(version=version, previous_version=previous_version, tables=changed, rows=tuple(rows)))
+        return version
+
+    def subscribe(self, listener: DataChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: DataChangeListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, change: DataChange) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(change)
+            except Exception:
+                logger.exception("Data change listener failed: %r", listener)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if self._path is None or fcntl is None:
+            yield
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path.with_name(f"{self._path.name}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self, force: bool = False) -> None:
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return
+        # os.replace создает новый inode, поэтому замену видно даже при грубом разрешении mtime.
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        if not force and signature == self._signature:
+            return
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Data version file is unreadable: %s", self._path)
+            return
+        # Файл — источник истины для всех воркеров: значения из него заменяют локальные.
+        self._signature = signature
+        self._base = int(payload.get("base", self._base))
+        self._version = int(payload.get("version", self._version))
+        self._tables = {table: int(version) for table, version in payload.get("tables", {}).items()}
+
+    def _write(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({"base": self._base, "version": self._version, "tables": self._tables}), encoding="utf-8")
+        # Атомарная замена: читатели видят либо старую, либо новую версию целиком.
+        os.replace(tmp_path, self._path)
+        stat = os.stat(self._path)
+        self._signature = (stat.st_ino, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def get_data_version() -> DataVersion:
+    return DataVersion(get_settings().DATA_VERSION_FILE)
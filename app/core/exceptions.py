@@ -0,0 +1,106 @@
+from fastapi import HTTPException, status
+
+
+class OrganizationNotFound(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found")
+
+
+class ActivityNotFound(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found")
+
+
+class InvalidCoordinates(HTTPException):
+    def __init__(self, detail: str = "Invalid coordinates") -> None:
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class InvalidPhoneNumber(HTTPException):
+    def __init__(self, detail: str) -> None:
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class BulkValidationError(HTTPException):
+    def __init__(self, errors: list[dict]) -> None:
+        super().__init__(status_code=422, detail=errors)
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, retry_after: int, detail: str = "Rate limit exceeded") -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class ServiceOverloaded(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is overloaded, retry later",
+            headers={"Retry-After": "1"},
+        )
+
+
+class DatabaseUnavailable(HTTPException):
+    def __init__(self, retry_after: int = 1) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database is unavailable, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class QueryTimeout(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Query timed out")
+
+
+class NotModified(Exception):
+    # Не HTTPException: ответ 304 не должен содержать тела и не логируется как ошибка.
+    def __init__(self, etag: str) -> None:
+        super().__init__(etag)
+        self.etag = etag
+
+
+class ExportNotFound(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found")
+
+
+class ExportNotReady(HTTPException):
+    def __init__(self, job_status: str) -> None:
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=f"Export job is {job_status}")
+
+
+class TooManyExports(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many export jobs in progress",
+            headers={"Retry-After": "30"},
+        )
+
+
+class BatchTooLarge(HTTPException):
+    def __init__(self, limit: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch must have at most {limit} requests",
+        )
+
+
+class InvalidSubscription(HTTPException):
+    def __init__(self, detail: str) -> None:
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class TooManySubscriptions(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live subscriptions, retry later",
+            headers={"Retry-After": "5"},
+        )
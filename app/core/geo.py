@@ -0,0 +1,117 @@
+import math
+from collections.abc import Sequence
+
+import numpy as np
+from sqlalchemy import ColumnElement, and_
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.0
+# Ограничение на размер промежуточной матрицы «точки x ребра» при проверке попадания в полигон.
+_MAX_MATRIX_CELLS = 4_000_000
+
+Ring = Sequence[Sequence[float]]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # Формула гаверсинуса для расстояния по сфере в километрах.
+    lat1_r = math.radians(lat1)
+    lon1_r = math.radians(lon1)
+    lat2_r = math.radians(lat2)
+    lon2_r = math.radians(lon2)
+    delta_lat = lat2_r - lat1_r
+    delta_lon = lon2_r - lon1_r
+    # Промежуточное значение для центрального угла между точками.
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_r) * math.cos(lat2_r) * math.sin(delta_lon / 2) ** 2
+    # Центральный угол по сфере.
+    c = 2 * math.asin(min(1.0, math.sqrt(a)))
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    # Приблизительный перевод радиуса в градусы широты/долготы для первичного отбора.
+    lat_delta = radius_km / KM_PER_DEGREE
+    lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+
+def bbox_clause(
+    latitude: ColumnElement[float],
+    longitude: ColumnElement[float],
+    min_lat: float,
+    max_lat: float,
+    min_lon: float,
+    max_lon: float,
+) -> ColumnElement[bool]:
+    # Сравнение самих колонок (а не «колонка - точка») позволяет использовать индекс по координатам.
+    return and_(latitude.between(min_lat, max_lat), longitude.between(min_lon, max_lon))
+
+
+def polygon_bounds(rings: Sequence[Ring]) -> tuple[float, float, float, float]:
+    # Кольца в порядке GeoJSON: [долгота, широта]; внешнее кольцо задает рамку всего полигона.
+    outer = np.asarray(rings[0], dtype=np.float64)
+    return float(outer[:, 1].min()), float(outer[:, 1].max()), float(outer[:, 0].min()), float(outer[:, 0].max())
+
+
+def points_in_polygon(lats: np.ndarray, lons: np.ndarray, rings: Sequence[Ring]) -> np.ndarray:
+    # Луч из точки вдоль долготы: нечетное число пересеченных ребер — точка внутри. Дыры учитываются
+    # тем же правилом четности по всем кольцам сразу.
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    inside = np.zeros(lats.shape, dtype=bool)
+    for ring in rings:
+        vertices = np.asarray(ring, dtype=np.float64)
+        x1, y1 = vertices[:-1, 0], vertices[:-1, 1]
+        x2, y2 = vertices[1:, 0], vertices[1:, 1]
+        # Горизонтальные ребра луч не пересекает; знаменатель заменяем, чтобы не делить на ноль.
+        slope = (x2 - x1) / np.where(y1 == y2, 1.0, y2 - y1)
+        step = max(1, _MAX_MATRIX_CELLS // len(x1))
+        for start in range(0, len(lats), step):
+            py = lats[start:start + step, None]
+            px = lons[start:start + step, None]
+            crossings = ((y1 > py) != (y2 > py)) & (px < x1 + (py - y1) * slope)
+            inside[start:start + step] ^= np.count_nonzero(crossings, axis=1) % 2 == 1
+    return inside
+
+
+def haversine_matrix_km(lats1: np.ndarray, lons1: np.ndarray, lats2: np.ndarray, lons2: np.ndarray) -> np.ndarray:
+    # Та же формула, что в haversine_km, для всех пар точек сразу: строки — первый набор, столбцы — второй.
+    lat1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lons1, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lats2, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lons2, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def k_nearest(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    candidate_lats: np.ndarray,
+    candidate_lons: np.ndarray,
+    k: int,
+    max_km: float | None = None,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    # Для каждой точки — индексы k ближайших кандидатов и расстояния до них по возрастанию.
+    # При равном расстоянии раньше идет кандидат с меньшим индексом.
+    k = min(k, len(candidate_lats))
+    if k == 0:
+        return [(np.empty(0, dtype=np.intp), np.empty(0)) for _ in range(len(lats))]
+    results: list[tuple[np.ndarray, np.ndarray]] = []
+    step = max(1, _MAX_MATRIX_CELLS // max(len(candidate_lats), 1))
+    for start in range(0, len(lats), step):
+        distances = haversine_matrix_km(
+            lats[start:start + step], lons[start:start + step], candidate_lats, candidate_lons
+        )
+        # argpartition выбирает из равных на границе k произвольных кандидатов, поэтому берем всех не дальше
+        # k-го расстояния в порядке индексов и сортируем устойчиво.
+        kth = np.partition(distances, k - 1, axis=1)[:, k - 1] if k < distances.shape[1] else None
+        for position, row in enumerate(distances):
+            indexes = np.flatnonzero(row <= kth[position]) if kth is not None else np.arange(row.size)
+            row_distances = row[indexes]
+            order = np.argsort(row_distances, kind="stable")[:k]
+            indexes, row_distances = indexes[order], row_distances[order]
+            if max_km is not None:
+                keep = row_distances <= max_km
+                indexes, row_distances = indexes[keep], row_distances[keep]
+            results.append((indexes, row_distances))
+    return results
@@ -0,0 +1,26 @@
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+
+class Metrics:
+    # Простые счетчики процесса (воркера); отдаются эндпоинтом /metrics.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = defaultdict(int)
+
+    def inc(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+
+@lru_cache(maxsize=1)
+def get_metrics() -> Metrics:
+    return Metrics()
@@ -0,0 +1,140 @@
+import contextvars
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import Settings
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Фаза определяется по самому глубокому кадру стека, попавшему под правило.
+_PHASE_RULES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("json_encoding", (f"{os.sep}json{os.sep}", f"fastapi{os.sep}encoders.py", f"starlette{os.sep}responses.py")),
+    ("pydantic_validation", (f"{os.sep}pydantic{os.sep}", f"fastapi{os.sep}_compat")),
+    ("orm_hydration", (f"sqlalchemy{os.sep}orm{os.sep}",)),
+    ("db_driver", (f"sqlalchemy{os.sep}engine{os.sep}", f"sqlalchemy{os.sep}dialects{os.sep}", "asyncpg", "aiosqlite")),
+    ("idle", ("selectors.py",)),
+)
+_STACK_DEPTH = 64
+
+
+def classify_stack(stack: list[tuple[str, str]]) -> str:
+    # stack — от внутреннего кадра к внешнему: (имя файла, функция).
+    for filename, _ in stack:
+        for phase, fragments in _PHASE_RULES:
+            if any(fragment in filename for fragment in fragments):
+                return phase
+    return "other"
+
+
+@dataclass
+class RequestProfile:
+    interval: float
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    stacks: Counter = field(default_factory=Counter)
+    phases: Counter = field(default_factory=Counter)
+    samples: int = 0
+    db_statements: int = 0
+    db_wait: float = 0.0
+
+    def add_sample(self, stack: list[tuple[str, str]]) -> None:
+        self.samples += 1
+        self.phases[classify_stack(stack)] += 1
+        self.stacks[";".join(f"{Path(filename).name}:{name}" for filename, name in reversed(stack))] += 1
+
+    def to_dict(self) -> dict:
+        interval_ms = self.interval * 1000
+        phases_ms = {phase: round(count * interval_ms, 2) for phase, count in self.phases.items()}
+        return {
+            "id": self.id,
+            "interval_ms": interval_ms,
+            "samples": self.samples,
+            # Ожидание БД измеряется точно (события движка), остальные фазы — по доле выборок стека потока цикла событий.
+            "phases_ms": {"db_wait": round(self.db_wait * 1000, 2), **phases_ms},
+            "db_statements": self.db_statements,
+            "stacks": dict(self.stacks.most_common()),
+        }
+
+
+_current_profile: contextvars.ContextVar[RequestProfile | None] = contextvars.ContextVar("request_profile", default=None)
+
+
+class StackSampler:
+    # Отдельный поток раз в interval читает стек потока цикла событий (sys._current_frames), не требуя
+    # инструментирования кода. Одновременные запросы того же воркера тоже попадают в выборку.
+    def __init__(self, profile: RequestProfile, thread_id: int) -> None:
+        self._profile = profile
+        self._thread_id = thread_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._profile.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None and len(stack) < _STACK_DEPTH:
+                stack.append((frame.f_code.co_filename, frame.f_code.co_name))
+                frame = frame.f_back
+            if stack:
+                self._profile.add_sample(stack)
+
+
+def should_profile(request: Request, settings: Settings) -> bool:
+    token = request.headers.get(PROFILE_HEADER)
+    if token and settings.PROFILE_TOKEN and hmac.compare_digest(token, settings.PROFILE_TOKEN):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def start_profile(settings: Settings) -> tuple[RequestProfile, StackSampler, contextvars.Token]:
+    profile = RequestProfile(interval=settings.PROFILE_INTERVAL_MS / 1000)
+    token = _current_profile.set(profile)
+    return profile, StackSampler(profile, threading.get_ident()), token
+
+
+def finish_profile(token: contextvars.Token) -> None:
+    _current_profile.reset(token)
+
+
+def save_profile(directory: str | Path, profile: RequestProfile, request_info: dict) -> Path:
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    target = path / f"{time.strftime('%Y%m%dT%H%M%S')}-{profile.id}.json"
+    target.write_text(json.dumps({**request_info, **profile.to_dict()}, ensure_ascii=False, indent=2), encoding="utf-8")
+    return target
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_statement_timer(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    profile = _current_profile.get()
+    started = conn.info.get("profile_started")
+    if profile is not None and started:
+        profile.db_statements += 1
+        profile.db_wait += time.perf_counter() - started.pop()
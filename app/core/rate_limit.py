@@ -0,0 +1,64 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from app.core.config import get_settings
+
+
+class RateLimitBackend(ABC):
+    # Хранилище состояния лимитов. Встроенная реализация держит его в памяти воркера; для общего
+    # лимита на все воркеры и хосты реализуется тот же интерфейс поверх общего хранилища (например, Redis).
+    @abstractmethod
+    async def take_token(self, key: str, per_second: float, burst: int) -> float:
+        # Возвращает 0, если запрос разрешен, иначе — сколько секунд ждать следующего токена.
+        ...
+
+    @abstractmethod
+    async def acquire_slot(self, key: str, limit: int) -> bool: ...
+
+    @abstractmethod
+    async def release_slot(self, key: str) -> None: ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self) -> None:
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._slots: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def take_token(self, key: str, per_second: float, burst: int) -> float:
+        async with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(key, (float(burst), now))
+            # Token bucket: токены копятся со скоростью per_second, но не больше burst.
+            tokens = min(float(burst), tokens + (now - updated_at) * per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / per_second
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        async with self._lock:
+            in_use = self._slots.get(key, 0)
+            if in_use >= limit:
+                return False
+            self._slots[key] = in_use + 1
+            return True
+
+    async def release_slot(self, key: str) -> None:
+        async with self._lock:
+            in_use = self._slots.get(key, 0) - 1
+            if in_use > 0:
+                self._slots[key] = in_use
+            else:
+                self._slots.pop(key, None)
+
+
+@lru_cache(maxsize=1)
+def get_rate_limit_backend() -> RateLimitBackend:
+    backend = get_settings().RATE_LIMIT_BACKEND
+    if backend == "memory":
+        return InMemoryRateLimitBackend()
+    raise ValueError(f"Unknown rate limit backend: {backend}")
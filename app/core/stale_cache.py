@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from functools import lru_cache
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.coalescing import COALESCED_PATH_PREFIXES
+from app.core.config import get_settings
+from app.core.metrics import get_metrics
+
+logger = logging.getLogger("app")
+
+STALE_HEADER = "X-Stale"
+
+_FORWARDED_SCOPE_KEYS = ("type", "asgi", "http_version", "scheme", "server", "client", "root_path")
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    headers: dict[str, str]
+    body: bytes
+    stored_at: float
+
+
+def stale_cache_key(request: Request) -> Hashable | None:
+    if request.method != "GET" or not request.url.path.startswith(COALESCED_PATH_PREFIXES):
+        return None
+    if request.app.state.settings.STALE_CACHE_MAX_ENTRIES == 0:
+        return None
+    # Ответ маршрутов чтения не зависит от ключа API: ключ проверяется до обращения к БД,
+    # и запрос с неверным ключом до устаревшего ответа не доходит.
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+class StaleCache:
+    # Последний успешный ответ каждого GET-запроса чтения (LRU на max_entries ключей). Пока БД недоступна,
+    # запрос получает его с заголовком X-Stale и возрастом в Age вместо 500/503. Ключи, отданные устаревшими,
+    # запоминаются и после восстановления БД перезапрашиваются в фоне через само приложение.
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._pending: dict[Hashable, dict] = {}
+        self._refresh_task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        return self._entries.get(key)
+
+    def put(self, key: Hashable, headers: dict[str, str], body: bytes) -> None:
+        self._entries[key] = CachedResponse(headers=headers, body=body, stored_at=time.monotonic())
+        self._entries.move_to_end(key)
+        self._pending.pop(key, None)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._pending.pop(evicted, None)
+
+    def serve(self, request: Request) -> Response | None:
+        key = stale_cache_key(request)
+        entry = self._entries.get(key) if key is not None else None
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self._pending[key] = _replay_scope(request)
+        get_metrics().inc("stale_cache.served")
+        age = int(time.monotonic() - entry.stored_at)
+        return Response(content=entry.body, status_code=200, headers={**entry.headers, STALE_HEADER: "1", "Age": str(age)})
+
+    def refresh_in_background(self, app) -> None:
+        if not self._pending or (self._refresh_task is not None and not self._refresh_task.done()):
+            return
+        self._refresh_task = asyncio.create_task(self._refresh(app))
+
+    async def _refresh(self, app) -> None:
+        # По одному запросу за раз: только что восстановившуюся БД не нагружаем пачкой одновременных запросов.
+        while self._pending:
+            key = next(iter(self._pending))
+            scope = self._pending.pop(key)
+            try:
+                status, headers = await _replay(app, scope)
+            except Exception:
+                logger.exception("Stale response refresh failed: %s", scope["path"])
+                status, headers = 500, {}
+            if status != 200 or STALE_HEADER.lower() in headers:
+                # БД снова недоступна: ключ вернется в очередь, когда его снова отдадут устаревшим.
+                return
+            get_metrics().inc("stale_cache.refreshed")
+
+
+def _replay_scope(request: Request) -> dict:
+    return {
+        **{key: request.scope[key] for key in _FORWARDED_SCOPE_KEYS if key in request.scope},
+        "method": "GET",
+        "path": request.scope["path"],
+        "raw_path": request.scope["path"].encode(),
+        "query_string": request.scope.get("query_string", b""),
+        "headers": [(name, value) for name, value in request.scope["headers"] if name != b"if-none-match"],
+    }
+
+
+async def _replay(app, scope: dict) -> tuple[int, dict[str, str]]:
+    # Повтор запроса проходит через все приложение: новый ответ сохраняет в кэш его middleware.
+    start: dict = {}
+    body_delivered = False
+
+    async def receive():
+        nonlocal body_delivered
+        if not body_delivered:
+            body_delivered = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+
+    await app({**scope, "state": {}}, receive, send)
+    headers = {name.decode().lower(): value.decode() for name, value in start.get("headers", [])}
+    return start.get("status", 500), headers
+
+
+@lru_cache(maxsize=1)
+def get_stale_cache() -> StaleCache:
+    return StaleCache(get_settings().STALE_CACHE_MAX_ENTRIES)
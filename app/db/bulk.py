@@ -0,0 +1,358 @@
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import Table, bindparam, delete, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.data_version import RowChange
+from app.core.exceptions import BulkValidationError
+from app.db.events import lock_change_log, track_changes, write_change_log
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.models.phone import Phone
+from app.schemas.bulk import ActivityIn, BuildingIn, BulkRequest, BulkResult, OrganizationIn
+
+MAX_ACTIVITY_DEPTH = 3
+
+
+def _error(section: str, index: int, msg: str) -> dict[str, Any]:
+    # Формат как у ошибок валидации FastAPI: loc указывает на элемент пакета.
+    return {"loc": ["body", section, index], "msg": msg}
+
+
+def _insert(db: AsyncSession, table: Table):
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(table)
+
+
+async def _existing_ids(db: AsyncSession, table: Table, ids: list[int]) -> set[int]:
+    if not ids:
+        return set()
+    result = await db.execute(select(table.c.id).where(table.c.id.in_(ids)))
+    return set(result.scalars().all())
+
+
+async def _sync_sequence(db: AsyncSession, table: Table) -> None:
+    # Явные id не двигают serial-последовательность PostgreSQL; без этого следующая вставка без id упадет.
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            )
+        )
+
+
+async def _upsert_rows(
+    db: AsyncSession,
+    table: Table,
+    rows: list[dict[str, Any]],
+) -> tuple[list[RowChange], list[int], list[int]]:
+    with_id = [row for row in rows if row.get("id") is not None]
+    without_id = [{key: value for key, value in row.items() if key != "id"} for row in rows if row.get("id") is None]
+    existing = await _existing_ids(db, table, [row["id"] for row in with_id])
+
+    if with_id:
+        # Один INSERT ... ON CONFLICT на весь пакет (executemany), а не запрос на каждую строку.
+        stmt = _insert(db, table)
+        update_columns = {key: stmt.excluded[key] for key in with_id[0] if key != "id"}
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.id], set_={**update_columns, "updated_at": func.now()})
+        await db.execute(stmt, with_id)
+        await _sync_sequence(db, table)
+
+    new_ids: list[int] = []
+    if without_id:
+        stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        new_ids = list((await db.execute(stmt, without_id)).scalars().all())
+
+    changes = [
+        RowChange(table=table.name, id=row["id"], op="update" if row["id"] in existing else "insert", values=row)
+        for row in with_id
+    ]
+    changes.extend(
+        RowChange(table=table.name, id=new_id, op="insert", values={**row, "id": new_id})
+        for new_id, row in zip(new_ids, without_id)
+    )
+    created = [change.id for change in changes if change.op == "insert"]
+    updated = [change.id for change in changes if change.op == "update"]
+    return changes, created, updated
+
+
+async def _delete_rows(db: AsyncSession, table: Table, ids: list[int]) -> list[RowChange]:
+    if not ids:
+        return []
+    result = await db.execute(delete(table).where(table.c.id.in_(ids)).returning(table.c.id))
+    return [RowChange(table=table.name, id=deleted_id, op="delete") for deleted_id in result.scalars().all()]
+
+
+async def _record(db: AsyncSession, tables: set[str], changes: list[RowChange]) -> None:
+    # Core-запросы не проходят через события ORM: журнал и версию данных обновляем явно,
+    # один раз на пакет — кэши и индексы инвалидируются после коммита.
+    await db.run_sync(write_change_log, changes)
+    track_changes(db.sync_session, tables, changes)
+
+
+async def _unlink_organizations(db: AsyncSession, condition) -> list[RowChange]:
+    result = await db.execute(
+        delete(organization_activity).where(condition).returning(organization_activity.c.organization_id)
+    )
+    organization_ids = sorted(set(result.scalars().all()))
+    if not organization_ids:
+        return []
+    rows = await db.execute(
+        select(Organization.id, Organization.name, Organization.building_id).where(
+            Organization.id.in_(organization_ids)
+        )
+    )
+    return [
+        RowChange(
+            table="organizations",
+            id=organization_id,
+            op="update",
+            values={"id": organization_id, "name": name, "building_id": building_id},
+        )
+        for organization_id, name, building_id in rows.all()
+    ]
+
+
+def _result(changes: list[RowChange], table: str, created: list[int], updated: list[int]) -> BulkResult:
+    return BulkResult(
+        created=created,
+        updated=updated,
+        deleted=[change.id for change in changes if change.table == table and change.op == "delete"],
+    )
+
+
+async def bulk_buildings(db: AsyncSession, request: BulkRequest[BuildingIn]) -> BulkResult:
+    # Очередь пишущих транзакций (см. lock_change_log) занимаем до проверок: они читают то, что пакет изменит.
+    await db.run_sync(lock_change_log)
+    errors = []
+    if request.delete:
+        occupied = set(
+            (
+                await db.execute(
+                    select(Organization.building_id).where(Organization.building_id.in_(request.delete)).distinct()
+                )
+            ).scalars()
+        )
+        errors.extend(
+            _error("delete", index, "Building has organizations")
+            for index, building_id in enumerate(request.delete)
+            if building_id in occupied
+        )
+    if errors:
+        raise BulkValidationError(errors)
+
+    changes, created, updated = await _upsert_rows(
+        db, Building.__table__, [item.model_dump() for item in request.upsert]
+    )
+    changes.extend(await _delete_rows(db, Building.__table__, request.delete))
+    await _record(db, {"buildings"}, changes)
+    return _result(changes, "buildings", created, updated)
+
+
+async def bulk_activities(db: AsyncSession, request: BulkRequest[ActivityIn]) -> BulkResult:
+    await db.run_sync(lock_change_log)
+    current: dict[int, tuple[int | None, int]] = {}
+    names: dict[int, str] = {}
+    for activity_id, name, parent_id, depth in (
+        await db.execute(select(Activity.id, Activity.name, Activity.parent_id, Activity.depth))
+    ).all():
+        current[activity_id] = (parent_id, depth)
+        names[activity_id] = name
+    deleted = set(request.delete)
+    # Новое состояние дерева: существующие узлы + элементы пакета (новые — под временными ключами).
+    parents: dict[Any, int | None] = {
+        activity_id: parent_id for activity_id, (parent_id, _) in current.items() if activity_id not in deleted
+    }
+    keys: list[Any] = []
+    for index, item in enumerate(request.upsert):
+        key = item.id if item.id is not None else ("new", index)
+        parents[key] = item.parent_id
+        keys.append(key)
+
+    errors = []
+    for index, activity_id in enumerate(request.delete):
+        if any(parent_id == activity_id for parent_id in parents.values()):
+            errors.append(_error("delete", index, "Activity has children"))
+
+    depths: dict[Any, int] = {}
+
+    def resolve_depth(key: Any) -> int | None:
+        chain = []
+        node = key
+        while node is not None and node not in depths:
+            if node in chain or node not in parents:
+                return None
+            chain.append(node)
+            node = parents[node]
+        depth = depths[node] if node is not None else 0
+        for node in reversed(chain):
+            depth += 1
+            depths[node] = depth
+        return depths[key]
+
+    for index, key in enumerate(keys):
+        parent_id = parents[key]
+        if parent_id is not None and parent_id not in parents:
+            errors.append(_error("upsert", index, "Parent activity not found"))
+            continue
+        depth = resolve_depth(key)
+        if depth is None:
+            errors.append(_error("upsert", index, "Activity hierarchy contains a cycle"))
+        elif depth > MAX_ACTIVITY_DEPTH:
+            # То же ограничение, что и Activity._validate_parent.
+            errors.append(_error("upsert", index, "Activity nesting depth cannot exceed 3"))
+    # Перенос узла меняет глубину и его существующих потомков.
+    moved_descendants = []
+    for activity_id in parents:
+        if activity_id in keys or not isinstance(activity_id, int):
+            continue
+        depth = resolve_depth(activity_id)
+        if depth is not None and depth != current[activity_id][1]:
+            if depth > MAX_ACTIVITY_DEPTH:
+                errors.append({"loc": ["body", "upsert"], "msg": f"Activity {activity_id} would exceed depth 3"})
+            moved_descendants.append({"b_id": activity_id, "depth": depth})
+    if errors:
+        raise BulkValidationError(errors)
+
+    rows = [
+        {**item.model_dump(), "depth": depths[key]}
+        for item, key in sorted(zip(request.upsert, keys), key=lambda pair: depths[pair[1]])
+    ]
+    changes, created, updated = await _upsert_rows(db, Activity.__table__, rows)
+    if moved_descendants:
+        table = Activity.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(depth=bindparam("depth"), updated_at=func.now())
+        )
+        await db.execute(stmt, moved_descendants)
+        changes.extend(
+            RowChange(
+                table="activities",
+                id=row["b_id"],
+                op="update",
+                values={"id": row["b_id"], "name": names[row["b_id"]], "depth": row["depth"]},
+            )
+            for row in moved_descendants
+        )
+        updated.extend(row["b_id"] for row in moved_descendants)
+    tables = {"activities"}
+    if request.delete:
+        # Связи удаляем явно: ON DELETE CASCADE есть не во всех СУБД, а организации должны попасть в журнал.
+        changes.extend(await _unlink_organizations(db, organization_activity.c.activity_id.in_(request.delete)))
+        tables.update({"organizations", "organization_activity"})
+    changes.extend(await _delete_rows(db, Activity.__table__, request.delete))
+    await _record(db, tables, changes)
+    return _result(changes, "activities", created, updated)
+
+
+async def _sync_phones(db: AsyncSession, numbers_by_organization: dict[int, list[str]]) -> list[RowChange]:
+    # Сохраняем строки телефонов, номер которых не изменился: журнал изменений не засоряется пересозданием.
+    existing = await db.execute(
+        select(Phone.id, Phone.organization_id, Phone.number).where(
+            Phone.organization_id.in_(list(numbers_by_organization))
+        )
+    )
+    kept = {organization_id: Counter(numbers) for organization_id, numbers in numbers_by_organization.items()}
+    to_delete = []
+    for phone_id, organization_id, number in existing.all():
+        if kept[organization_id][number] > 0:
+            kept[organization_id][number] -= 1
+        else:
+            to_delete.append(phone_id)
+    to_insert = [
+        {"organization_id": organization_id, "number": number}
+        for organization_id, numbers in kept.items()
+        for number in numbers.elements()
+    ]
+    changes = await _delete_rows(db, Phone.__table__, to_delete)
+    if to_insert:
+        stmt = insert(Phone.__table__).returning(Phone.id, sort_by_parameter_order=True)
+        new_ids = (await db.execute(stmt, to_insert)).scalars().all()
+        changes.extend(
+            RowChange(table="phones", id=new_id, op="insert", values={**row, "id": new_id})
+            for new_id, row in zip(new_ids, to_insert)
+        )
+    return changes
+
+
+async def _sync_activity_links(db: AsyncSession, activities_by_organization: dict[int, set[int]]) -> bool:
+    existing = await db.execute(
+        select(organization_activity.c.organization_id, organization_activity.c.activity_id).where(
+            organization_activity.c.organization_id.in_(list(activities_by_organization))
+        )
+    )
+    current: dict[int, set[int]] = {organization_id: set() for organization_id in activities_by_organization}
+    for organization_id, activity_id in existing.all():
+        current[organization_id].add(activity_id)
+    to_insert = []
+    to_delete = []
+    for organization_id, activity_ids in activities_by_organization.items():
+        to_insert.extend(
+            {"organization_id": organization_id, "activity_id": activity_id}
+            for activity_id in activity_ids - current[organization_id]
+        )
+        to_delete.extend(
+            {"b_organization_id": organization_id, "b_activity_id": activity_id}
+            for activity_id in current[organization_id] - activity_ids
+        )
+    if to_delete:
+        await db.execute(
+            delete(organization_activity).where(
+                organization_activity.c.organization_id == bindparam("b_organization_id"),
+                organization_activity.c.activity_id == bindparam("b_activity_id"),
+            ),
+            to_delete,
+        )
+    if to_insert:
+        await db.execute(insert(organization_activity), to_insert)
+    return bool(to_insert or to_delete)
+
+
+async def bulk_organizations(db: AsyncSession, request: BulkRequest[OrganizationIn]) -> BulkResult:
+    await db.run_sync(lock_change_log)
+    building_ids = {item.building_id for item in request.upsert}
+    activity_ids = {activity_id for item in request.upsert for activity_id in item.activity_ids}
+    known_buildings = await _existing_ids(db, Building.__table__, list(building_ids))
+    known_activities = await _existing_ids(db, Activity.__table__, list(activity_ids))
+
+    errors = []
+    for index, item in enumerate(request.upsert):
+        if item.building_id not in known_buildings:
+            errors.append(_error("upsert", index, "Building not found"))
+        missing = sorted(set(item.activity_ids) - known_activities)
+        if missing:
+            errors.append(_error("upsert", index, f"Activities not found: {missing}"))
+    if errors:
+        raise BulkValidationError(errors)
+
+    rows = [item.model_dump(exclude={"phones", "activity_ids"}) for item in request.upsert]
+    changes, created, updated = await _upsert_rows(db, Organization.__table__, rows)
+    # Порядок changes совпадает с порядком строк: сначала с явным id, затем новые.
+    items_with_id = [item for item in request.upsert if item.id is not None]
+    items_without_id = [item for item in request.upsert if item.id is None]
+    organization_items = list(zip(changes, items_with_id + items_without_id))
+
+    tables = {"organizations"}
+    if organization_items:
+        changes.extend(
+            await _sync_phones(db, {change.id: list(item.phones) for change, item in organization_items})
+        )
+        tables.add("phones")
+        if await _sync_activity_links(db, {change.id: set(item.activity_ids) for change, item in organization_items}):
+            tables.add("organization_activity")
+
+    if request.delete:
+        phone_ids = (await db.execute(select(Phone.id).where(Phone.organization_id.in_(request.delete)))).scalars()
+        changes.extend(await _delete_rows(db, Phone.__table__, list(phone_ids)))
+        await db.execute(delete(organization_activity).where(organization_activity.c.organization_id.in_(request.delete)))
+        changes.extend(await _delete_rows(db, Organization.__table__, request.delete))
+        tables.update({"phones", "organization_activity"})
+
+    await _record(db, tables, changes)
+    return _result(changes, "organizations", created, updated)
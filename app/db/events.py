@@ -0,0 +1,139 @@
+import time
+from collections.abc import Iterable
+
+from sqlalchemy import event, func, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.core.data_version import DIRECTORY_TABLES, RowChange, RowOp, get_data_version
+from app.models.change_log import ChangeLog
+
+# Таблица-связка не является сущностью журнала: ее изменения записываются как изменение организации.
+JOURNALED_TABLES = DIRECTORY_TABLES - {"organization_activity"}
+
+_CHANGES_KEY = "directory_changes"
+_LOCKED_KEY = "change_log_locked"
+# Ключ pg_advisory_xact_lock, которым пишущие в справочник транзакции выстраиваются в очередь.
+CHANGE_LOG_LOCK_KEY = 0x636C6F67
+# Момент (time.monotonic), после которого запросы сессии не имеют смысла: его выставляет get_db.
+DEADLINE_KEY = "deadline"
+# Проверка, которую get_db выполняет при первом обращении сессии к БД, а не при ее создании.
+FIRST_USE_KEY = "on_first_use"
+
+
+def track_changes(session: Session, tables: Iterable[str], rows: Iterable[RowChange] = ()) -> None:
+    # Изменения копятся до коммита: версия поднимается один раз на транзакцию, а не на каждый flush.
+    tables_acc, rows_acc = session.info.setdefault(_CHANGES_KEY, (set(), []))
+    tables_acc.update(tables)
+    rows_acc.extend(rows)
+
+
+def lock_change_log(session: Session) -> None:
+    # Номер записи журнала выдается последовательностью при вставке, а виден читателям только после коммита.
+    # Транзакция с меньшим номером могла закоммититься позже транзакции с большим, и клиент, уже получивший
+    # токен больше ее номера, пропускал ее изменения. Блокировка до конца транзакции выстраивает пишущие
+    # транзакции по очереди, поэтому порядок номеров совпадает с порядком коммитов. Она берется до первой
+    # записи строк справочника: иначе транзакции могли бы ждать друг друга, держа блокировки строк.
+    if session.info.get(_LOCKED_KEY):
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SELECT pg_advisory_xact_lock({CHANGE_LOG_LOCK_KEY})")
+    session.info[_LOCKED_KEY] = True
+
+
+def write_change_log(session: Session, rows: Iterable[RowChange]) -> None:
+    entries = [
+        {"entity": row.table, "entity_id": row.id, "op": row.op}
+        for row in rows
+        if row.table in JOURNALED_TABLES
+    ]
+    if entries:
+        # Журнал пишется в той же транзакции, что и сами данные.
+        session.connection().execute(insert(ChangeLog), entries)
+
+
+def _secondary_changes(state) -> set[str]:
+    return {
+        relationship.secondary.name
+        for relationship in state.mapper.relationships
+        if relationship.secondary is not None and state.attrs[relationship.key].history.has_changes()
+    }
+
+
+def _row_change(obj, op: RowOp) -> RowChange:
+    state = inspect(obj)
+    # Берем значения из state.dict, чтобы не вызывать ленивую загрузку внутри flush.
+    values = {attr.key: state.dict.get(attr.key) for attr in state.mapper.column_attrs}
+    return RowChange(table=state.mapper.local_table.name, id=values.get("id"), op=op, values=values)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _check_first_use(session: Session, _transaction) -> None:
+    # Транзакция сессии создается до того, как берется соединение из пула: отказ здесь не ждет соединения.
+    check = session.info.pop(FIRST_USE_KEY, None)
+    if check is not None:
+        check()
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, _transaction, connection) -> None:
+    deadline = session.info.get(DEADLINE_KEY)
+    if deadline is None or connection.dialect.name != "postgresql":
+        return
+    remaining_ms = max(int((deadline - time.monotonic()) * 1000), 1)
+    # SET LOCAL действует до конца транзакции; следующая транзакция сессии получит остаток заново.
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+
+
+@event.listens_for(Session, "before_flush")
+def _lock_change_log_before_flush(session: Session, _flush_context, _instances) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if inspect(obj).mapper.local_table.name in DIRECTORY_TABLES:
+            lock_change_log(session)
+            return
+
+
+@event.listens_for(Session, "before_flush")
+def _touch_updated_at(session: Session, _flush_context, _instances) -> None:
+    # Изменение только связей многие-ко-многим не порождает UPDATE строки; обновляем updated_at явно.
+    for obj in session.dirty:
+        state = inspect(obj)
+        if state.mapper.local_table.name in DIRECTORY_TABLES and "updated_at" in state.mapper.column_attrs:
+            if _secondary_changes(state) and not session.is_modified(obj, include_collections=False):
+                obj.updated_at = func.now()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_directory_changes(session: Session, _flush_context) -> None:
+    tables: set[str] = set()
+    rows: list[RowChange] = []
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            state = inspect(obj)
+            table = state.mapper.local_table.name
+            if table not in DIRECTORY_TABLES:
+                continue
+            secondary_tables = _secondary_changes(state)
+            if op == "update" and not secondary_tables and not session.is_modified(obj, include_collections=False):
+                continue
+            tables.add(table)
+            tables.update(secondary_tables)
+            rows.append(_row_change(obj, op))
+    if tables:
+        write_change_log(session, rows)
+        track_changes(session, tables, rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_directory_changes(session: Session) -> None:
+    session.info.pop(_LOCKED_KEY, None)
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        tables, rows = changes
+        get_data_version().bump(tables, rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_directory_changes(session: Session) -> None:
+    session.info.pop(_LOCKED_KEY, None)
+    session.info.pop(_CHANGES_KEY, None)
@@ -0,0 +1,31 @@
+import json
+from typing import Any
+
+from sqlalchemy import Executable
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def is_postgresql(session: AsyncSession) -> bool:
+    return session.bind is not None and session.bind.dialect.name == "postgresql"
+
+
+async def explain_plan(
+    session: AsyncSession,
+    stmt: Executable,
+    *,
+    analyze: bool = False,
+    buffers: bool = False,
+) -> dict[str, Any]:
+    # EXPLAIN есть только в PostgreSQL; параметры подставляются литералами, т.к. EXPLAIN не принимает bind-параметры.
+    compiled = stmt.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+    options = ["FORMAT JSON"]
+    if analyze:
+        options.append("ANALYZE")
+    if buffers:
+        options.append("BUFFERS")
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN ({', '.join(options)}) {compiled}")
+    payload = result.scalar_one()
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return payload[0]
@@ -0,0 +1,132 @@
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import aliased, selectinload
+
+from app.core.geo import bbox_clause
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.models.phone import Phone
+
+# Построители запросов эндпоинтов чтения. Вынесены из роутеров, чтобы те же выражения можно было
+# разобрать через EXPLAIN (python -m app.index_advisor) и проверить планы на PostgreSQL.
+
+
+def with_details(stmt: Select[tuple[Organization]]) -> Select[tuple[Organization]]:
+    return stmt.options(
+        selectinload(Organization.building),
+        selectinload(Organization.phones),
+        selectinload(Organization.activities),
+    )
+
+
+def activity_subtree(activity_id: int) -> Select:
+    activity_cte = select(Activity.id).where(Activity.id == activity_id).cte(recursive=True)
+    activity_alias = aliased(Activity)
+    activity_cte = activity_cte.union_all(
+        select(activity_alias.id).where(activity_alias.parent_id == activity_cte.c.id)
+    )
+    return select(activity_cte.c.id)
+
+
+def organizations_by_building(building_id: int) -> Select[tuple[Organization]]:
+    return select(Organization).where(Organization.building_id == building_id)
+
+
+def organizations_by_activity(activity_id: int) -> Select[tuple[Organization]]:
+    return (
+        select(Organization)
+        .join(organization_activity)
+        .where(organization_activity.c.activity_id == activity_id)
+    )
+
+
+def organizations_by_activities(activity_ids: list[int]) -> Select[tuple[Organization]]:
+    return (
+        select(Organization)
+        .join(organization_activity)
+        .where(organization_activity.c.activity_id.in_(activity_ids))
+        .distinct()
+    )
+
+
+def organizations_by_name(name: str) -> Select[tuple[Organization]]:
+    return select(Organization).where(Organization.name.ilike(f"%{name}%"))
+
+
+def digit_prefix_bounds(prefix: str) -> tuple[str, str | None]:
+    # Строки из цифр с префиксом «792» лежат в [«792», «793»); у «799» верхняя граница «8», у «999» — нет.
+    stripped = prefix.rstrip("9")
+    if not stripped:
+        return prefix, None
+    return prefix, f"{stripped[:-1]}{int(stripped[-1]) + 1}"
+
+
+def organizations_by_phone(numbers: list[str], prefix: bool = False) -> Select[tuple[Organization]]:
+    # Сначала индекс по phones.number_digits, затем организации по первичному ключу.
+    if prefix:
+        lower, upper = digit_prefix_bounds(numbers[0])
+        condition = Phone.number_digits >= lower
+        if upper is not None:
+            condition = condition & (Phone.number_digits < upper)
+    else:
+        condition = Phone.number_digits.in_(numbers)
+    return select(Organization).where(Organization.id.in_(select(Phone.organization_id).where(condition)))
+
+
+def organizations_in_bbox(min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> Select[tuple[Organization]]:
+    return (
+        select(Organization)
+        .join(Building)
+        .where(bbox_clause(Building.latitude, Building.longitude, min_lat, max_lat, min_lon, max_lon))
+    )
+
+
+def organization_coordinates_in_bbox(min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> Select:
+    # Только id и координаты: точная геометрическая проверка идет в памяти, карточки грузятся для одной страницы.
+    return (
+        select(Organization.id, Building.latitude, Building.longitude)
+        .join(Building)
+        .where(bbox_clause(Building.latitude, Building.longitude, min_lat, max_lat, min_lon, max_lon))
+        .order_by(Organization.id)
+    )
+
+
+def organization_coordinates(activity_ids: list[int] | None = None) -> Select:
+    stmt = select(Organization.id, Building.latitude, Building.longitude).join(Building).order_by(Organization.id)
+    if activity_ids is not None:
+        # EXISTS вместо JOIN: организация с несколькими подходящими видами деятельности — одна строка.
+        stmt = stmt.where(
+            select(organization_activity.c.organization_id)
+            .where(
+                organization_activity.c.organization_id == Organization.id,
+                organization_activity.c.activity_id.in_(activity_ids),
+            )
+            .exists()
+        )
+    return stmt
+
+
+def buildings_with_organization_counts() -> Select:
+    # Один агрегирующий запрос вместо запроса /organizations/by-building на каждое здание.
+    organizations_count = func.count(Organization.id).label("organizations_count")
+    return (
+        select(Building, organizations_count)
+        .outerjoin(Organization, Organization.building_id == Building.id)
+        .group_by(Building.id)
+    )
+
+
+def building_activity_breakdown(building_ids: list[int]) -> Select:
+    return (
+        select(
+            Organization.building_id,
+            Activity.id,
+            Activity.name,
+            func.count(func.distinct(Organization.id)),
+        )
+        .join(organization_activity, organization_activity.c.organization_id == Organization.id)
+        .join(Activity, Activity.id == organization_activity.c.activity_id)
+        .where(Organization.building_id.in_(building_ids))
+        .group_by(Organization.building_id, Activity.id, Activity.name)
+        .order_by(Organization.building_id, Activity.name)
+    )
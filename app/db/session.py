@@ -1,9 +1,25 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import get_settings
+from app.db import events  # noqa: F401
+
+
+# Движок и фабрика сессий создаются при первом обращении, а не при импорте: импорт приложения не открывает
+# пул соединений и не требует настроек, а воркер после fork создает собственный пул.
+@lru_cache(maxsize=1)
+def get_engine() -> AsyncEngine:
+    return create_async_engine(get_settings().DATABASE_URL, echo=False)
+
 
-settings = get_settings()
+@lru_cache(maxsize=1)
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=get_engine(), autoflush=False, autocommit=False, expire_on_commit=False)
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
 
-SessionLocal = async_sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+async def dispose_engine() -> None:
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+    get_sessionmaker.cache_clear()
+    get_engine.cache_clear()
@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+from typing import Any
+
+from app.schemas.export import ExportEntity, ExportFormat
+
+CSV_COLUMNS: dict[ExportEntity, list[str]] = {
+    ExportEntity.organizations: [
+        "id", "name", "building_id", "address", "latitude", "longitude", "phones", "activities",
+    ],
+    ExportEntity.buildings: ["id", "address", "latitude", "longitude"],
+    ExportEntity.activities: ["id", "name", "parent_id", "depth"],
+}
+
+# Разделитель значений списков (телефоны, виды деятельности) в одной ячейке CSV.
+LIST_SEPARATOR = "; "
+
+
+def _flatten(entity: ExportEntity, record: dict[str, Any]) -> list[Any]:
+    if entity is ExportEntity.organizations:
+        building = record["building"]
+        return [
+            record["id"],
+            record["name"],
+            building["id"],
+            building["address"],
+            building["latitude"],
+            building["longitude"],
+            LIST_SEPARATOR.join(phone["number"] for phone in record["phones"]),
+            LIST_SEPARATOR.join(activity["name"] for activity in record["activities"]),
+        ]
+    return [record[column] for column in CSV_COLUMNS[entity]]
+
+
+def encode_chunk(
+    export_format: ExportFormat,
+    entity: ExportEntity,
+    records: list[dict[str, Any]],
+    *,
+    header: bool = False,
+) -> bytes:
+    if export_format is ExportFormat.ndjson:
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode()
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS[entity])
+    writer.writerows(_flatten(entity, record) for record in records)
+    return buffer.getvalue().encode()
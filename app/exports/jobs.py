@@ -0,0 +1,241 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.exceptions import TooManyExports
+from app.core.geo import bbox_clause
+from app.db.queries import activity_subtree, with_details
+from app.exports.formats import encode_chunk
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.schemas.activity import ActivityOut
+from app.schemas.building import BuildingOut
+from app.schemas.export import ExportCreate, ExportEntity, ExportJobOut, ExportStatus
+from app.schemas.organization import OrganizationOut
+
+logger = logging.getLogger("app.exports")
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+_OUTPUT_SCHEMAS: dict[ExportEntity, type[BaseModel]] = {
+    ExportEntity.organizations: OrganizationOut,
+    ExportEntity.buildings: BuildingOut,
+    ExportEntity.activities: ActivityOut,
+}
+
+
+def export_query(request: ExportCreate) -> Select:
+    if request.entity is ExportEntity.activities:
+        return select(Activity).order_by(Activity.id)
+    if request.entity is ExportEntity.buildings:
+        stmt = select(Building)
+        if request.region is not None:
+            stmt = stmt.where(bbox_clause(Building.latitude, Building.longitude, *request.region))
+        return stmt.order_by(Building.id)
+
+    stmt = with_details(select(Organization))
+    if request.region is not None:
+        stmt = stmt.join(Building).where(bbox_clause(Building.latitude, Building.longitude, *request.region))
+    if request.activity_id is not None:
+        stmt = stmt.where(
+            Organization.id.in_(
+                select(organization_activity.c.organization_id).where(
+                    organization_activity.c.activity_id.in_(activity_subtree(request.activity_id))
+                )
+            )
+        )
+    return stmt.order_by(Organization.id)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _pid_alive(pid: int | None) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ExportJobStore:
+    # Состояние задания хранится в JSON-файле рядом с результатом: опрос и скачивание обслуживает
+    # любой воркер, а не только тот, который выполняет выгрузку.
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+
+    def meta_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def data_path(self, job: ExportJobOut) -> Path:
+        return self.directory / f"{job.id}.{job.request.format.value}.gz"
+
+    def save(self, job: ExportJobOut) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        payload = job.model_dump(mode="json") | {"pid": os.getpid()}
+        path = self.meta_path(job.id)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> tuple[ExportJobOut, int | None] | None:
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            payload = json.loads(self.meta_path(job_id).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        return ExportJobOut.model_validate(payload), payload.get("pid")
+
+    def remove_expired(self, ttl_seconds: int) -> None:
+        deadline = time.time() - ttl_seconds
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime >= deadline:
+                    continue
+                loaded = self.load(path.stem)
+                if loaded is None or loaded[0].status not in (ExportStatus.completed, ExportStatus.failed):
+                    continue
+                self.data_path(loaded[0]).unlink(missing_ok=True)
+                path.unlink(missing_ok=True)
+            except (OSError, ValueError):
+                logger.warning("Cannot clean up export job file: %s", path)
+
+
+class ExportManager:
+    # Выгрузки выполняются фоновыми задачами воркера, принявшего запрос. Семафор ограничивает число
+    # одновременно работающих выгрузок (и занятых ими соединений пула), чтобы они не вытесняли
+    # интерактивные запросы; остальные задания ждут в очереди.
+    def __init__(
+        self,
+        directory: str | Path,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        *,
+        max_concurrency: int = 2,
+        max_pending: int = 10,
+        chunk_size: int = 1000,
+        ttl_seconds: int = 86_400,
+    ) -> None:
+        self.store = ExportJobStore(directory)
+        self._session_factory = session_factory
+        self._max_concurrency = max_concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+        self._max_pending = max_pending
+        self._chunk_size = chunk_size
+        self._ttl_seconds = ttl_seconds
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @property
+    def session_factory(self) -> Callable[[], AsyncSession]:
+        if self._session_factory is None:
+            from app.db.session import get_sessionmaker
+
+            self._session_factory = get_sessionmaker()
+        return self._session_factory
+
+    async def submit(self, request: ExportCreate) -> ExportJobOut:
+        if len(self._tasks) >= self._max_pending:
+            raise TooManyExports()
+        self.store.remove_expired(self._ttl_seconds)
+        job = ExportJobOut(id=uuid.uuid4().hex, status=ExportStatus.queued, request=request, created_at=_now())
+        self.store.save(job)
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return job
+
+    def get(self, job_id: str) -> ExportJobOut | None:
+        loaded = self.store.load(job_id)
+        if loaded is None:
+            return None
+        job, pid = loaded
+        if job.status in (ExportStatus.queued, ExportStatus.running) and job.id not in self._tasks:
+            # Задание принадлежит другому воркеру; если тот завершился, выгрузка уже не закончится.
+            if pid == os.getpid() or not _pid_alive(pid):
+                job.status = ExportStatus.failed
+                job.error = "Export worker exited"
+                job.finished_at = _now()
+                self.store.save(job)
+        return job
+
+    async def join(self) -> None:
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _run(self, job: ExportJobOut) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            job.status = ExportStatus.running
+            job.started_at = _now()
+            self.store.save(job)
+            part_path = self.store.data_path(job).with_suffix(".part")
+            try:
+                async with self.session_factory() as session:
+                    await self._export(session, job, part_path)
+                os.replace(part_path, self.store.data_path(job))
+            except Exception as exc:
+                logger.exception("Export job failed: id=%s", job.id)
+                part_path.unlink(missing_ok=True)
+                job.status = ExportStatus.failed
+                job.error = type(exc).__name__
+            else:
+                job.status = ExportStatus.completed
+                job.progress = 1.0
+                job.size_bytes = self.store.data_path(job).stat().st_size
+            job.finished_at = _now()
+            self.store.save(job)
+
+    async def _export(self, session: AsyncSession, job: ExportJobOut, part_path: Path) -> None:
+        request = job.request
+        stmt = export_query(request)
+        job.rows_total = await session.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+        self.store.save(job)
+
+        schema = _OUTPUT_SCHEMAS[request.entity]
+        # Строки читаются порциями (yield_per), каждая порция кодируется и сжимается в потоке,
+        # поэтому ни весь результат, ни весь файл в памяти не держатся, а цикл событий не блокируется.
+        result = await session.stream_scalars(stmt.execution_options(yield_per=self._chunk_size))
+        with gzip.open(part_path, "wb") as file:
+            header = True
+            async for partition in result.partitions():
+                records = [schema.model_validate(row).model_dump(mode="json") for row in partition]
+                chunk = encode_chunk(request.format, request.entity, records, header=header)
+                await asyncio.to_thread(file.write, chunk)
+                header = False
+                job.rows_written += len(records)
+                job.progress = round(job.rows_written / job.rows_total, 4) if job.rows_total else 0.0
+                self.store.save(job)
+            if header:
+                await asyncio.to_thread(file.write, encode_chunk(request.format, request.entity, [], header=True))
+
+
+@lru_cache(maxsize=1)
+def get_export_manager() -> ExportManager:
+    settings = get_settings()
+    return ExportManager(
+        settings.EXPORT_DIR,
+        max_concurrency=settings.EXPORT_MAX_CONCURRENCY,
+        max_pending=settings.EXPORT_MAX_PENDING,
+        chunk_size=settings.EXPORT_CHUNK_SIZE,
+        ttl_seconds=settings.EXPORT_TTL_SECONDS,
+    )
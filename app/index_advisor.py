@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import sys
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.geo import bbox_clause, bounding_box
+from app.db.explain import explain_plan, is_postgresql
+from app.db.queries import (
+    activity_subtree,
+    building_activity_breakdown,
+    buildings_with_organization_counts,
+    organization_coordinates,
+    organization_coordinates_in_bbox,
+    organizations_by_activities,
+    organizations_by_activity,
+    organizations_by_building,
+    organizations_by_name,
+    organizations_by_phone,
+    organizations_in_bbox,
+)
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.models.phone import Phone
+
+# Таблицы, последовательное чтение которых растет вместе со справочником.
+LARGE_TABLES = ("organizations", "organization_activity", "buildings", "phones")
+# Страница по умолчанию плюс строка-признак следующей страницы (см. app.routers.pagination.paginate).
+PAGE_LIMIT = 11
+SEQ_SCAN_NODES = ("Seq Scan", "Parallel Seq Scan")
+
+
+@dataclass(frozen=True)
+class SampleParams:
+    organization_id: int
+    building_id: int
+    activity_id: int
+    activity_ids: list[int]
+    name: str
+    center: tuple[float, float]
+    phone: str = "79000000000"
+
+
+@dataclass(frozen=True)
+class PlanFinding:
+    query: str
+    relation: str
+    node_type: str
+    plan_rows: int
+    table_rows: int
+    filter: str | None
+
+
+async def sample_params(session: AsyncSession) -> SampleParams:
+    # Параметры берутся из данных, чтобы планировщик оценивал реальные значения, а не отсутствующие id.
+    organization_id = await session.scalar(select(func.min(Organization.id))) or 1
+    building_id = await session.scalar(
+        select(Organization.building_id).group_by(Organization.building_id).order_by(func.count().desc()).limit(1)
+    ) or 1
+    activity_id = await session.scalar(
+        select(organization_activity.c.activity_id)
+        .group_by(organization_activity.c.activity_id)
+        .order_by(func.count().desc())
+        .limit(1)
+    ) or 1
+    root_id = await session.scalar(select(func.min(Activity.id)).where(Activity.parent_id.is_(None))) or activity_id
+    activity_ids = list((await session.scalars(activity_subtree(root_id))).all()) or [activity_id]
+    name = await session.scalar(select(Organization.name).order_by(Organization.id).limit(1)) or "a"
+    center = (await session.execute(select(Building.latitude, Building.longitude).where(Building.id == building_id))).first()
+    phone = await session.scalar(select(Phone.number_digits).order_by(Phone.id).limit(1)) or "79000000000"
+    return SampleParams(
+        organization_id=organization_id,
+        building_id=building_id,
+        activity_id=activity_id,
+        activity_ids=activity_ids,
+        name=name.split()[0][:4],
+        center=(center[0], center[1]) if center else (55.7558, 37.6173),
+        phone=phone,
+    )
+
+
+def router_queries(params: SampleParams) -> dict[str, Select]:
+    # Те же выражения, что выполняют эндпоинты, с пагинацией первой страницы.
+    near_box = bounding_box(*params.center, 2.0)
+    rect = bounding_box(*params.center, 5.0)
+    return {
+        "organizations.get": select(Organization).where(Organization.id == params.organization_id),
+        "organizations.by_building": organizations_by_building(params.building_id)
+        .order_by(Organization.id)
+        .limit(PAGE_LIMIT),
+        "organizations.by_activity": organizations_by_activity(params.activity_id)
+        .order_by(Organization.id)
+        .limit(PAGE_LIMIT),
+        "organizations.activity_subtree": activity_subtree(params.activity_ids[0]),
+        "organizations.by_activity_tree": organizations_by_activities(params.activity_ids)
+        .order_by(Organization.id)
+        .limit(PAGE_LIMIT),
+        "organizations.search": organizations_by_name(params.name).order_by(Organization.id).limit(PAGE_LIMIT),
+        "organizations.by_phone": organizations_by_phone([params.phone]).order_by(Organization.id).limit(PAGE_LIMIT),
+        "organizations.by_phone_prefix": organizations_by_phone([params.phone[:4]], prefix=True)
+        .order_by(Organization.id)
+        .limit(PAGE_LIMIT),
+        "organizations.near": organizations_in_bbox(*near_box).order_by(Organization.id),
+        "organizations.within_rect": organizations_in_bbox(*rect).order_by(Organization.id).limit(PAGE_LIMIT),
+        "organizations.within_polygon": organization_coordinates_in_bbox(*rect),
+        "organizations.nearest": organization_coordinates(params.activity_ids),
+        "buildings.list": select(Building).order_by(Building.id).limit(PAGE_LIMIT),
+        "buildings.stats": buildings_with_organization_counts().order_by(Building.id).limit(PAGE_LIMIT),
+        "buildings.near": buildings_with_organization_counts().where(
+            bbox_clause(Building.latitude, Building.longitude, *near_box)
+        ),
+        "buildings.activity_breakdown": building_activity_breakdown([params.building_id]),
+    }
+
+
+def walk_plan(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk_plan(child)
+
+
+def find_seq_scans(
+    query: str,
+    plan: dict[str, Any],
+    table_rows: dict[str, int],
+    min_rows: int,
+) -> list[PlanFinding]:
+    findings = []
+    for node in walk_plan(plan["Plan"]):
+        relation = node.get("Relation Name")
+        if node.get("Node Type") not in SEQ_SCAN_NODES or relation not in LARGE_TABLES:
+            continue
+        # На маленькой таблице последовательное чтение дешевле индекса — это не проблема.
+        if table_rows.get(relation, 0) < min_rows:
+            continue
+        findings.append(
+            PlanFinding(
+                query=query,
+                relation=relation,
+                node_type=node["Node Type"],
+                plan_rows=int(node.get("Plan Rows", 0)),
+                table_rows=table_rows[relation],
+                filter=node.get("Filter"),
+            )
+        )
+    return findings
+
+
+async def table_sizes(session: AsyncSession) -> dict[str, int]:
+    result = await session.execute(
+        text("SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r' AND relname = ANY(:names)"),
+        {"names": list(LARGE_TABLES)},
+    )
+    sizes = {relname: int(reltuples) for relname, reltuples in result.all()}
+    for table in LARGE_TABLES:
+        # reltuples = -1: таблица еще ни разу не анализировалась.
+        if sizes.get(table, -1) < 0:
+            sizes[table] = await session.scalar(text(f"SELECT count(*) FROM {table}")) or 0
+    return sizes
+
+
+async def advise(session: AsyncSession, *, min_rows: int, analyze: bool = False) -> list[PlanFinding]:
+    sizes = await table_sizes(session)
+    queries = router_queries(await sample_params(session))
+    findings: list[PlanFinding] = []
+    for name, stmt in queries.items():
+        plan = await explain_plan(session, stmt, analyze=analyze)
+        findings.extend(find_seq_scans(name, plan, sizes, min_rows))
+    return findings
+
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.index_advisor",
+        description="Report sequential scans on large tables in the plans of router queries.",
+    )
+    parser.add_argument("--min-rows", type=int, default=10_000, help="Ignore tables smaller than this")
+    parser.add_argument("--analyze", action="store_true", help="Use EXPLAIN ANALYZE (executes the queries)")
+    parser.add_argument("--json", action="store_true", help="Print findings as JSON")
+    args = parser.parse_args(argv)
+
+    from app.db.session import dispose_engine, get_sessionmaker
+
+    try:
+        async with get_sessionmaker()() as session:
+            if not is_postgresql(session):
+                print("Index advisor requires PostgreSQL", file=sys.stderr)
+                return 2
+            findings = await advise(session, min_rows=args.min_rows, analyze=args.analyze)
+    finally:
+        await dispose_engine()
+
+    if args.json:
+        print(json.dumps([asdict(finding) for finding in findings], ensure_ascii=False, indent=2))
+    elif not findings:
+        print("No sequential scans on large tables.")
+    else:
+        for finding in findings:
+            print(
+                f"{finding.query}: {finding.node_type} on {finding.relation} "
+                f"(~{finding.plan_rows} of {finding.table_rows} rows) filter={finding.filter or '-'}"
+            )
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,375 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Iterable
+from functools import lru_cache
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.data_version import DataChange, get_data_version
+from app.core.exceptions import ActivityNotFound, TooManySubscriptions
+from app.core.metrics import get_metrics
+from app.db.queries import with_details
+from app.live.index import BBox, Placement, Subscription, SubscriptionIndex
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.models.phone import Phone
+from app.schemas.organization import OrganizationOut
+
+logger = logging.getLogger("app.live")
+
+
+def format_event(kind: str, data: dict, event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {kind}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+async def load_placements(session: AsyncSession, organization_ids: Iterable[int] | None = None) -> dict[int, Placement]:
+    ids = None if organization_ids is None else sorted(set(organization_ids))
+    if ids == []:
+        return {}
+
+    def restrict(stmt, column):
+        return stmt if ids is None else stmt.where(column.in_(ids))
+
+    rows = (
+        await session.execute(
+            restrict(
+                select(
+                    Organization.id,
+                    Organization.building_id,
+                    Organization.updated_at,
+                    Building.latitude,
+                    Building.longitude,
+                    Building.updated_at,
+                ).join(Building),
+                Organization.id,
+            )
+        )
+    ).all()
+    activities: dict[int, set[int]] = defaultdict(set)
+    links = await session.execute(
+        restrict(
+            select(organization_activity.c.organization_id, organization_activity.c.activity_id),
+            organization_activity.c.organization_id,
+        )
+    )
+    for organization_id, activity_id in links:
+        activities[organization_id].add(activity_id)
+    # Телефоны меняются отдельной таблицей и не трогают updated_at организации: их отпечаток входит в подпись.
+    phones = {
+        organization_id: (count, updated_at)
+        for organization_id, count, updated_at in await session.execute(
+            restrict(
+                select(Phone.organization_id, func.count(), func.max(Phone.updated_at)).group_by(Phone.organization_id),
+                Phone.organization_id,
+            )
+        )
+    }
+    return {
+        organization_id: Placement(
+            building_id=building_id,
+            latitude=latitude,
+            longitude=longitude,
+            activity_ids=frozenset(activities.get(organization_id, ())),
+            signature=(updated_at, building_updated_at, phones.get(organization_id)),
+        )
+        for organization_id, building_id, updated_at, latitude, longitude, building_updated_at in rows
+    }
+
+
+class LiveHub:
+    # Рассылка изменений организаций подписчикам воркера. Хаб держит в памяти положение каждой организации
+    # (здание, координаты, виды деятельности); на изменение догружает только затронутые организации одним
+    # запросом и сопоставляет их с подписками через SubscriptionIndex — без запроса на каждого подписчика.
+    # Запись в этом воркере приходит событием с подробностями; запись в другом воркере видна по смене
+    # версии данных и обрабатывается полной перезагрузкой положений со сравнением.
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        poll_interval: float = 1.0,
+        queue_size: int = 1000,
+        max_subscriptions: int = 1000,
+    ) -> None:
+        self._session_factory = session_factory
+        self._poll_interval = poll_interval
+        self._queue_size = queue_size
+        self._max_subscriptions = max_subscriptions
+        self._index = SubscriptionIndex()
+        self._placements: dict[int, Placement] = {}
+        self._by_building: dict[int, set[int]] = defaultdict(set)
+        self._by_activity: dict[int, set[int]] = defaultdict(set)
+        self._children: dict[int | None, set[int]] = defaultdict(set)
+        self._activities: set[int] = set()
+        self._version: int | None = None
+        self._pending: list[DataChange] = []
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def session_factory(self) -> Callable[[], AsyncSession]:
+        if self._session_factory is None:
+            from app.db.session import get_sessionmaker
+
+            self._session_factory = get_sessionmaker()
+        return self._session_factory
+
+    @session_factory.setter
+    def session_factory(self, factory: Callable[[], AsyncSession]) -> None:
+        self._session_factory = factory
+
+    @property
+    def version(self) -> int | None:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    async def subscribe(self, bbox: BBox | None, activity_id: int | None, include_children: bool = True) -> Subscription:
+        if len(self._index) >= self._max_subscriptions:
+            raise TooManySubscriptions()
+        async with self._lock:
+            if self._version is None:
+                async with self.session_factory() as session:
+                    await self._reload(session, publish=False)
+            if activity_id is not None and activity_id not in self._activities:
+                raise ActivityNotFound()
+            subscription = Subscription(
+                bbox=bbox,
+                activity_id=activity_id,
+                include_children=include_children,
+                queue=asyncio.Queue(self._queue_size),
+            )
+            subscription.activity_ids = self._activity_scope(subscription)
+            self._index.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._index.remove(subscription)
+
+    def on_change(self, change: DataChange) -> None:
+        if not self._index:
+            return
+        self._pending.append(change)
+        self._wakeup.set()
+
+    async def stream(self, subscription: Subscription, heartbeat: float) -> AsyncIterator[str]:
+        try:
+            yield format_event("ready", {"version": self._version}, self._version)
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except TimeoutError:
+                    # Комментарий SSE не дает прокси закрыть простаивающее соединение.
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    async def sync(self) -> None:
+        async with self._lock:
+            changes, self._pending = self._pending, []
+            async with self.session_factory() as session:
+                for change in changes:
+                    if self._version is not None and change.version <= self._version:
+                        continue
+                    if change.previous_version != self._version or not await self._apply(session, change):
+                        break
+                if self._version != get_data_version().current():
+                    await self._reload(session, publish=self._version is not None)
+
+    async def _run(self) -> None:
+        while self._index:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Live update sync failed")
+        # Подписчиков не осталось: положения больше не обновляются, следующая подписка загрузит их заново.
+        self._version = None
+
+    async def _reload(self, session: AsyncSession, publish: bool) -> None:
+        version = get_data_version().current()
+        placements = await load_placements(session)
+        children = self._children
+        await self._load_activities(session)
+        changed = {
+            organization_id
+            for organization_id in self._placements.keys() | placements.keys()
+            if self._placements.get(organization_id) != placements.get(organization_id)
+        }
+        # Перестроенное дерево видов деятельности меняет состав подписок на поддеревья для любых организаций.
+        candidates = self._placements.keys() | placements.keys() if children != self._children else changed
+        before = self._memberships(candidates)
+        self._placements = placements
+        self._reindex_placements()
+        self._rescope_subscriptions()
+        if publish:
+            await self._publish(session, before, candidates, changed, version)
+        self._version = version
+
+    async def _apply(self, session: AsyncSession, change: DataChange) -> bool:
+        # Возвращает False, если по событию нельзя понять, какие организации затронуты.
+        if not change.rows:
+            return False
+        # touched — изменилась карточка организации; affected — еще и те, чье попадание в подписки могло измениться.
+        touched: set[int] = set()
+        changed_activities: set[int] = set()
+        for row in change.rows:
+            if row.table == "organizations":
+                touched.add(row.id)
+            elif row.table == "phones":
+                organization_id = row.values.get("organization_id")
+                if organization_id is None:
+                    return False
+                touched.add(organization_id)
+            elif row.table == "buildings":
+                touched.update(self._by_building.get(row.id, ()))
+            elif row.table == "activities":
+                changed_activities.add(row.id)
+        affected = set(touched)
+        if changed_activities:
+            # Перенос вида деятельности меняет состав поддеревьев: затронуты организации всего поддерева
+            # до и после изменения, а подписки на поддеревья пересчитываются.
+            for activity_id in changed_activities:
+                touched.update(self._by_activity.get(activity_id, ()))
+            scope = self._descendants(changed_activities)
+            await self._load_activities(session)
+            scope |= self._descendants(changed_activities)
+            for activity_id in scope:
+                affected.update(self._by_activity.get(activity_id, ()))
+            affected |= touched
+        before = self._memberships(affected)
+        if changed_activities:
+            self._rescope_subscriptions()
+        current = await load_placements(session, affected)
+        for organization_id in affected:
+            self._place(organization_id, current.get(organization_id))
+        await self._publish(session, before, affected, touched, change.version)
+        self._version = change.version
+        return True
+
+    def _memberships(self, organization_ids: Iterable[int]) -> dict[int, set[Subscription]]:
+        memberships = {}
+        for organization_id in organization_ids:
+            placement = self._placements.get(organization_id)
+            memberships[organization_id] = {
+                subscription for subscription in self._index.candidates(placement) if subscription.matches(placement)
+            }
+        return memberships
+
+    async def _publish(
+        self,
+        session: AsyncSession,
+        before: dict[int, set[Subscription]],
+        organization_ids: Iterable[int],
+        touched: set[int],
+        version: int,
+    ) -> None:
+        after = self._memberships(organization_ids)
+        events: list[tuple[Subscription, str, int]] = []
+        for organization_id in sorted(after):
+            was_in, is_in = before.get(organization_id, set()), after[organization_id]
+            events.extend((subscription, "added", organization_id) for subscription in is_in - was_in)
+            events.extend((subscription, "removed", organization_id) for subscription in was_in - is_in)
+            if organization_id in touched:
+                events.extend((subscription, "changed", organization_id) for subscription in is_in & was_in)
+        if not events:
+            return
+
+        # Карточка каждой организации загружается и сериализуется один раз для всех подписчиков.
+        needed = sorted({organization_id for _, kind, organization_id in events if kind != "removed"})
+        cards = {}
+        if needed:
+            stmt = with_details(select(Organization).where(Organization.id.in_(needed)))
+            for organization in (await session.scalars(stmt)).all():
+                cards[organization.id] = OrganizationOut.model_validate(organization).model_dump(mode="json")
+        for subscription, kind, organization_id in events:
+            if kind == "removed" or organization_id not in cards:
+                self._push(subscription, format_event("removed", {"id": organization_id}, version))
+            else:
+                self._push(subscription, format_event(kind, cards[organization_id], version))
+        get_metrics().inc("live.events", len(events))
+
+    def _push(self, subscription: Subscription, event: str) -> None:
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать: очередь сбрасывается, клиент перечитывает область целиком.
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(format_event("resync", {"version": self._version}))
+            get_metrics().inc("live.resyncs")
+
+    async def _load_activities(self, session: AsyncSession) -> None:
+        self._children = defaultdict(set)
+        self._activities = set()
+        for activity_id, parent_id in await session.execute(select(Activity.id, Activity.parent_id)):
+            self._children[parent_id].add(activity_id)
+            self._activities.add(activity_id)
+
+    def _descendants(self, activity_ids: Iterable[int]) -> set[int]:
+        found: set[int] = set()
+        stack = list(activity_ids)
+        while stack:
+            activity_id = stack.pop()
+            if activity_id in found:
+                continue
+            found.add(activity_id)
+            stack.extend(self._children.get(activity_id, ()))
+        return found
+
+    def _activity_scope(self, subscription: Subscription) -> frozenset[int]:
+        if subscription.activity_id is None:
+            return frozenset()
+        if not subscription.include_children:
+            return frozenset({subscription.activity_id})
+        return frozenset(self._descendants([subscription.activity_id]))
+
+    def _rescope_subscriptions(self) -> None:
+        for subscription in self._index:
+            if subscription.activity_id is not None:
+                self._index.reindex(subscription, self._activity_scope(subscription))
+
+    def _reindex_placements(self) -> None:
+        self._by_building = defaultdict(set)
+        self._by_activity = defaultdict(set)
+        for organization_id, placement in self._placements.items():
+            self._by_building[placement.building_id].add(organization_id)
+            for activity_id in placement.activity_ids:
+                self._by_activity[activity_id].add(organization_id)
+
+    def _place(self, organization_id: int, placement: Placement | None) -> None:
+        previous = self._placements.pop(organization_id, None)
+        if previous is not None:
+            self._by_building[previous.building_id].discard(organization_id)
+            for activity_id in previous.activity_ids:
+                self._by_activity[activity_id].discard(organization_id)
+        if placement is None:
+            return
+        self._placements[organization_id] = placement
+        self._by_building[placement.building_id].add(organization_id)
+        for activity_id in placement.activity_ids:
+            self._by_activity[activity_id].add(organization_id)
+
+
+@lru_cache(maxsize=1)
+def get_live_hub() -> LiveHub:
+    settings = get_settings()
+    hub = LiveHub(
+        poll_interval=settings.LIVE_POLL_INTERVAL,
+        queue_size=settings.LIVE_QUEUE_SIZE,
+        max_subscriptions=settings.LIVE_MAX_SUBSCRIPTIONS,
+    )
+    get_data_version().subscribe(hub.on_change)
+    return hub
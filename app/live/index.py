@@ -0,0 +1,118 @@
+import asyncio
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+
+# Размер ячейки сетки (в градусах), по которой раскладываются прямоугольники подписок.
+CELL_DEGREES = 0.25
+# Прямоугольник крупнее этого числа ячеек проверяется на каждом изменении, а не раскладывается по сетке.
+MAX_CELLS_PER_SUBSCRIPTION = 4096
+
+BBox = tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class Placement:
+    # То, от чего зависит попадание организации в подписку, и отпечаток карточки для поиска изменений.
+    building_id: int
+    latitude: float
+    longitude: float
+    activity_ids: frozenset[int]
+    signature: tuple = ()
+
+
+@dataclass(eq=False)
+class Subscription:
+    bbox: BBox | None
+    activity_id: int | None
+    include_children: bool
+    queue: asyncio.Queue
+    # Вид деятельности вместе с поддеревом; пересчитывается при изменении дерева.
+    activity_ids: frozenset[int] = frozenset()
+
+    def matches(self, placement: Placement | None) -> bool:
+        if placement is None:
+            return False
+        if self.bbox is not None:
+            min_lat, max_lat, min_lon, max_lon = self.bbox
+            if not (min_lat <= placement.latitude <= max_lat and min_lon <= placement.longitude <= max_lon):
+                return False
+        if self.activity_id is not None:
+            return not placement.activity_ids.isdisjoint(self.activity_ids)
+        return True
+
+
+def _cell(lat: float, lon: float) -> tuple[int, int]:
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+def _cells(bbox: BBox) -> list[tuple[int, int]] | None:
+    min_row, min_col = _cell(bbox[0], bbox[2])
+    max_row, max_col = _cell(bbox[1], bbox[3])
+    if (max_row - min_row + 1) * (max_col - min_col + 1) > MAX_CELLS_PER_SUBSCRIPTION:
+        return None
+    return [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
+
+
+class SubscriptionIndex:
+    # Обратный индекс подписок: по изменившейся организации находим только те подписки, которые могут
+    # ее касаться (ячейка сетки с ее зданием или ее вид деятельности), и не перебираем всех подписчиков.
+    def __init__(self) -> None:
+        self._subscriptions: set[Subscription] = set()
+        self._cells: dict[tuple[int, int], set[Subscription]] = defaultdict(set)
+        self._wide: set[Subscription] = set()
+        self._activities: dict[int, set[Subscription]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def __iter__(self):
+        return iter(list(self._subscriptions))
+
+    def add(self, subscription: Subscription) -> None:
+        self._subscriptions.add(subscription)
+        if subscription.bbox is None:
+            for activity_id in subscription.activity_ids:
+                self._activities[activity_id].add(subscription)
+            return
+        cells = _cells(subscription.bbox)
+        if cells is None:
+            self._wide.add(subscription)
+            return
+        for cell in cells:
+            self._cells[cell].add(subscription)
+
+    def remove(self, subscription: Subscription) -> None:
+        if subscription not in self._subscriptions:
+            return
+        self._subscriptions.discard(subscription)
+        self._wide.discard(subscription)
+        if subscription.bbox is not None:
+            for cell in _cells(subscription.bbox) or ():
+                self._discard(self._cells, cell, subscription)
+        for activity_id in subscription.activity_ids:
+            self._discard(self._activities, activity_id, subscription)
+
+    def reindex(self, subscription: Subscription, activity_ids: frozenset[int]) -> None:
+        # Подписка по прямоугольнику лежит в сетке, ее виды деятельности проверяются в matches().
+        self.remove(subscription)
+        subscription.activity_ids = activity_ids
+        self.add(subscription)
+
+    def candidates(self, placement: Placement | None) -> set[Subscription]:
+        if placement is None:
+            return set()
+        found = set(self._wide)
+        found.update(self._cells.get(_cell(placement.latitude, placement.longitude), ()))
+        for activity_id in placement.activity_ids:
+            found.update(self._activities.get(activity_id, ()))
+        return found
+
+    @staticmethod
+    def _discard(buckets: dict, key, subscription: Subscription) -> None:
+        bucket = buckets.get(key)
+        if bucket is None:
+            return
+        bucket.discard(subscription)
+        if not bucket:
+            del buckets[key]
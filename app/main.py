@@ -1,36 +1,148 @@
+import asyncio
 import logging
 import time
+from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 
 from app.core.config import get_settings
+from app.core.exceptions import DatabaseUnavailable, NotModified, QueryTimeout, RateLimitExceeded
 from app.core.logging import build_request_context, configure_logging, sanitize_value
-from app.routers.buildings import router as buildings_router
-from app.routers.deps import verify_api_key
-from app.routers.organizations import router as organizations_router
+from app.core.metrics import get_metrics
 
-configure_logging()
 logger = logging.getLogger("app")
 
-settings = get_settings()
-is_production = settings.ENVIRONMENT.lower() == "production"
 
-docs_url = None if is_production else f"/docs"
-redoc_url = None if is_production else f"/redoc"
-openapi_url = None if is_production else f"/openapi.json"
-app = FastAPI(title="Organizations Directory API",
-              debug=not is_production,
-              openapi_url=openapi_url,
-              docs_url=docs_url,
-              redoc_url=redoc_url,
-              )
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Application started in %.2f ms", (time.monotonic() - app.state.created_at) * 1000)
+    yield
+    from app.db.session import dispose_engine
 
-app.include_router(buildings_router)
-app.include_router(organizations_router)
+    await dispose_engine()
+
+
+def create_app() -> FastAPI:
+    # Импорт app.main дешев: настройки, логирование, роутеры (а с ними модели и движок БД) подключаются здесь.
+    # gunicorn: "app.main:create_app()", uvicorn: --factory app.main:create_app.
+    from sqlalchemy.exc import DBAPIError
+
+    from app.core.cancellation import CancelOnDisconnectMiddleware
+    from app.core.coalescing import SingleFlight, coalescing_key
+    from app.core.profiling import PROFILE_ID_HEADER, finish_profile, save_profile, should_profile, start_profile
+    from app.core.stale_cache import STALE_HEADER, get_stale_cache, stale_cache_key
+    from app.routers.activities import router as activities_router
+    from app.routers.autocomplete import router as autocomplete_router
+    from app.routers.batch import router as batch_router
+    from app.routers.buildings import router as buildings_router
+    from app.routers.deps import take_rate_limit_token
+    from app.routers.changes import router as changes_router
+    from app.routers.exports import router as exports_router
+    from app.routers.live import router as live_router
+    from app.routers.organizations import router as organizations_router
+    from app.routers.system import router as system_router
+
+    created_at = time.monotonic()
+    configure_logging()
+    settings = get_settings()
+    is_production = settings.ENVIRONMENT.lower() == "production"
+
+    app = FastAPI(
+        title="Organizations Directory API",
+        debug=not is_production,
+        openapi_url=None if is_production else "/openapi.json",
+        docs_url=None if is_production else "/docs",
+        redoc_url=None if is_production else "/redoc",
+        lifespan=lifespan,
+    )
+    # Настройки middleware берутся из app.state, чтобы тесты могли подменить их на экземпляре приложения.
+    app.state.settings = settings
+    app.state.created_at = created_at
+    app.state.single_flight = SingleFlight()
+
+    app.include_router(buildings_router)
+    app.include_router(organizations_router)
+    app.include_router(activities_router)
+    app.include_router(autocomplete_router)
+    app.include_router(changes_router)
+    app.include_router(exports_router)
+    app.include_router(batch_router)
+    app.include_router(live_router)
+    app.include_router(system_router)
+
+    @app.middleware("http")
+    async def stale_cache_middleware(request: Request, call_next):
+        # Внутри объединения запросов: ответ сохраняется один раз на выполненный, а не на каждый ожидавший запрос.
+        key = stale_cache_key(request)
+        if key is None:
+            return await call_next(request)
+        response = await call_next(request)
+        if response.status_code != 200 or STALE_HEADER in response.headers:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = dict(response.headers)
+        get_stale_cache().put(key, headers, body)
+        return Response(content=body, status_code=200, headers=headers)
+
+    @app.middleware("http")
+    async def request_coalescing_middleware(request: Request, call_next):
+        key = coalescing_key(request) if request.app.state.settings.COALESCE_REQUESTS else None
+        if key is None:
+            return await call_next(request)
+
+        async def execute():
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            return response.status_code, dict(response.headers), body
+
+        (status_code, headers, body), shared = await request.app.state.single_flight.do(key, execute)
+        if shared:
+            # Копия ответа не проходит зависимости маршрута, но списывает токен из лимита своего ключа.
+            try:
+                await take_rate_limit_token(request.app.state.settings, request.headers.get("X-API-Key"))
+            except RateLimitExceeded as exc:
+                return await http_exception_handler(request, exc)
+        get_metrics().inc("coalescing.shared" if shared else "coalescing.executed")
+        return Response(content=body, status_code=status_code, headers=headers)
+
+    @app.middleware("http")
+    async def request_profiling_middleware(request: Request, call_next):
+        settings = request.app.state.settings
+        if not should_profile(request, settings):
+            return await call_next(request)
+
+        start_time = time.monotonic()
+        profile, sampler, token = start_profile(settings)
+        try:
+            with sampler:
+                response = await call_next(request)
+        finally:
+            finish_profile(token)
+        request_info = {
+            "method": request.method,
+            "path": request.url.path,
+            "query": str(request.url.query),
+            "status": response.status_code,
+            "duration_ms": round((time.monotonic() - start_time) * 1000, 2),
+        }
+        path = await asyncio.to_thread(save_profile, settings.PROFILE_DIR, profile, request_info)
+        logger.info("Request profile saved: %s %s -> %s", request.method, request.url.path, path)
+        response.headers[PROFILE_ID_HEADER] = profile.id
+        return response
+
+    app.middleware("http")(request_logging_middleware)
+    # Снаружи всех middleware: разрыв соединения отменяет всю цепочку обработки запроса.
+    app.add_middleware(CancelOnDisconnectMiddleware)
+
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(NotModified, not_modified_handler)
+    app.add_exception_handler(DatabaseUnavailable, database_unavailable_handler)
+    app.add_exception_handler(DBAPIError, db_error_handler)
+    app.add_exception_handler(Exception, unhandled_exception_handler)
+    return app
 
 
-@app.middleware("http")
 async def request_logging_middleware(request: Request, call_next):
     start_time = time.monotonic()
     context = build_request_context(request)
@@ -61,7 +173,6 @@ async def request_logging_middleware(request: Request, call_next):
     return response
 
 
-@app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     context = build_request_context(request)
     detail = sanitize_value(exc.detail)
@@ -74,21 +185,37 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(status_code=exc.status_code, content={"detail": detail}, headers=exc.headers)
 
 
-@app.exception_handler(Exception)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers={"ETag": exc.etag})
+
+
+async def database_unavailable_handler(request: Request, exc: HTTPException):
+    from app.core.stale_cache import get_stale_cache
+
+    stale = get_stale_cache().serve(request)
+    if stale is not None:
+        return stale
+    return await http_exception_handler(request, exc)
+
+
+async def db_error_handler(request: Request, exc: Exception):
+    from app.core.circuit_breaker import is_query_timeout
+
+    if is_query_timeout(exc):
+        get_metrics().inc("db.queries_timed_out")
+        return await database_unavailable_handler(request, QueryTimeout())
+    return await unhandled_exception_handler(request, exc)
+
+
 async def unhandled_exception_handler(request: Request, exc: Exception):
     context = build_request_context(request)
     logger.exception("Unhandled exception: context=%s", context)
     return JSONResponse(status_code=500, content={"detail": "Internal server error"})
 
-@app.get("/", dependencies=[Depends(verify_api_key)])
-def root():
-    return {"message": "Organizations Directory API"}
-
-@app.get(
-    "/health",
-    dependencies=[Depends(verify_api_key)],
-    summary="Проверка доступности",
-    description="Возвращает статус сервиса при корректном API ключе.",
-)
-def health_check():
-    return {"status": "ok"}
+
+def __getattr__(name: str) -> FastAPI:
+    # Совместимость с "app.main:app": приложение создается при первом обращении к атрибуту, а не при импорте.
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
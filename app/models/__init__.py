@@ -1,6 +1,7 @@
 from app.models.activity import Activity
 from app.models.building import Building
+from app.models.change_log import ChangeLog
 from app.models.organization import Organization
 from app.models.phone import Phone
 
-__all__ = ["Activity", "Building", "Organization", "Phone"]
\ No newline at end of file
+__all__ = ["Activity", "Building", "ChangeLog", "Organization", "Phone"]
\ No newline at end of file
@@ -1,4 +1,6 @@
-from sqlalchemy import CheckConstraint, ForeignKey, Integer, String
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from app.db.base import Base
@@ -12,6 +14,9 @@ class Activity(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     parent_id: Mapped[int | None] = mapped_column(ForeignKey("activities.id"), nullable=True, index=True)
     depth: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     parent = relationship("Activity", remote_side=[id], back_populates="children")
     children = relationship("Activity", back_populates="parent", cascade="all, delete-orphan")
@@ -1,4 +1,6 @@
-from sqlalchemy import Float, Integer, String
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -6,10 +8,17 @@ from app.db.base import Base
 
 class Building(Base):
     __tablename__ = "buildings"
+    __table_args__ = (
+        # Поиск по прямоугольнику: диапазон по широте, долгота и id берутся из индекса (index-only scan).
+        Index("ix_buildings_latitude_longitude", "latitude", "longitude", postgresql_include=["id"]),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     address: Mapped[str] = mapped_column(String(255), nullable=False)
     latitude: Mapped[float] = mapped_column(Float, nullable=False)
     longitude: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     organizations = relationship("Organization", back_populates="building", cascade="all, delete-orphan")
\ No newline at end of file
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Table, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -8,6 +10,8 @@ organization_activity = Table(
     Base.metadata,
     Column("organization_id", ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True),
     Column("activity_id", ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True),
+    # Обратный порядок первичного ключа: выборка организаций по виду деятельности идет по индексу.
+    Index("ix_organization_activity_activity_id_organization_id", "activity_id", "organization_id"),
 )
 
 
@@ -17,6 +21,9 @@ class Organization(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     building_id: Mapped[int] = mapped_column(ForeignKey("buildings.id"), nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     building = relationship("Building", back_populates="organizations")
     phones = relationship("Phone", back_populates="organization", cascade="all, delete-orphan")
@@ -1,14 +1,37 @@
-from sqlalchemy import ForeignKey, Integer, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from app.db.base import Base
+from app.search.normalize import normalize_phone
+
+
+def _number_digits_default(context) -> str:
+    # Для вставок в обход ORM (Core insert): номер без цифровой формы не должен попасть в таблицу.
+    return normalize_phone(context.get_current_parameters()["number"])
 
 
 class Phone(Base):
     __tablename__ = "phones"
+    __table_args__ = (
+        # Поиск по префиксу идет диапазоном (>= префикс и < следующий префикс), а не LIKE: так индекс
+        # используется и в generic-плане подготовленного запроса, и при любой collation (в колонке только цифры).
+        Index("ix_phones_number_digits", "number_digits"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     number: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Только цифры номера: по ней ищется организация по телефону.
+    number_digits: Mapped[str] = mapped_column(String(32), nullable=False, default=_number_digits_default)
     organization_id: Mapped[int] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    organization = relationship("Organization", back_populates="phones")
 
-    organization = relationship("Organization", back_populates="phones")
\ No newline at end of file
+    @validates("number")
+    def _normalize_number(self, _key, number):
+        self.number_digits = normalize_phone(number)
+        return number
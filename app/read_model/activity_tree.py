@@ -0,0 +1,116 @@
+import asyncio
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.data_version import get_data_version
+from app.models.activity import Activity
+from app.models.organization import organization_activity
+
+# Дерево зависит только от видов деятельности и их связей с организациями (удаление организации удаляет и связи):
+# запись зданий или телефонов его не пересобирает и не меняет его ETag.
+ACTIVITY_TREE_TABLES = frozenset({"activities", "organization_activity", "organizations"})
+
+
+@dataclass(frozen=True)
+class ActivityTree:
+    version: int
+    # Узлы в форме ActivityTreeOut; дочерние узлы — те же словари, что и в nodes.
+    nodes: dict[int, dict]
+    roots: list[dict]
+    body: bytes
+
+    def path(self, activity_id: int) -> list[dict]:
+        # Предки от корня до непосредственного родителя, без собственных детей.
+        parents = []
+        parent_id = self.nodes[activity_id]["parent_id"]
+        while parent_id is not None and parent_id in self.nodes:
+            node = self.nodes[parent_id]
+            parents.append({key: node[key] for key in ("id", "name", "parent_id", "depth")})
+            parent_id = node["parent_id"]
+        return parents[::-1]
+
+
+def tree_version() -> int:
+    return get_data_version().table_version(*ACTIVITY_TREE_TABLES)
+
+
+async def build_activity_tree(session: AsyncSession, version: int) -> ActivityTree:
+    stmt = select(Activity.id, Activity.name, Activity.parent_id, Activity.depth).order_by(Activity.name, Activity.id)
+    activities = (await session.execute(stmt)).all()
+    nodes = {
+        activity_id: {
+            "id": activity_id,
+            "name": name,
+            "parent_id": parent_id,
+            "depth": depth,
+            "organizations_count": 0,
+            "total_organizations_count": 0,
+            "children": [],
+        }
+        for activity_id, name, parent_id, depth in activities
+    }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_id"])
+        (parent["children"] if parent is not None else roots).append(node)
+
+    direct = await session.execute(
+        select(organization_activity.c.activity_id, func.count()).group_by(organization_activity.c.activity_id)
+    )
+    for activity_id, count in direct:
+        if activity_id in nodes:
+            nodes[activity_id]["organizations_count"] = count
+
+    # Организация с несколькими видами деятельности одного поддерева считается в нем один раз: связи идут
+    # по порядку организаций, и для каждой предки ее видов деятельности объединяются в множество.
+    links = await session.execute(
+        select(organization_activity.c.organization_id, organization_activity.c.activity_id).order_by(
+            organization_activity.c.organization_id
+        )
+    )
+    totals: dict[int, int] = defaultdict(int)
+    current_organization, scope = None, set()
+    for organization_id, activity_id in links:
+        if organization_id != current_organization:
+            for ancestor_id in scope:
+                totals[ancestor_id] += 1
+            current_organization, scope = organization_id, set()
+        while activity_id is not None and activity_id in nodes and activity_id not in scope:
+            scope.add(activity_id)
+            activity_id = nodes[activity_id]["parent_id"]
+    for ancestor_id in scope:
+        totals[ancestor_id] += 1
+    for activity_id, total in totals.items():
+        nodes[activity_id]["total_organizations_count"] = total
+
+    body = json.dumps(roots, ensure_ascii=False, separators=(",", ":")).encode()
+    return ActivityTree(version=version, nodes=nodes, roots=roots, body=body)
+
+
+class ActivityTreeCache:
+    # Дерево собирается один раз и отдается готовыми байтами, пока версия его таблиц не изменится.
+    def __init__(self) -> None:
+        self._tree: ActivityTree | None = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, session: AsyncSession) -> ActivityTree:
+        version = tree_version()
+        if self._tree is None or self._tree.version != version:
+            async with self._lock:
+                # Пока ждали блокировку, дерево могли собрать по более новой версии: сверяемся с текущей.
+                version = tree_version()
+                if self._tree is None or self._tree.version != version:
+                    # Версия читается до выборки: запись во время сборки оставит дерево устаревшим,
+                    # и следующий запрос соберет его заново.
+                    self._tree = await build_activity_tree(session, version)
+        return self._tree
+
+
+@lru_cache(maxsize=1)
+def get_activity_tree_cache() -> ActivityTreeCache:
+    return ActivityTreeCache()
@@ -0,0 +1,264 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.geo import Ring, haversine_km, points_in_polygon, polygon_bounds
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.schemas.building import BuildingOut
+from app.schemas.organization import OrganizationOut
+
+MAGIC = b"ORGRM001"
+# Заголовок файла: MAGIC, длина JSON-оглавления (uint32), само оглавление; дальше секции.
+_HEADER = struct.Struct("<8sI")
+_ALIGN = 8
+
+
+@dataclass
+class SnapshotData:
+    version: int
+    building_ids: array = field(default_factory=lambda: array("q"))
+    building_lat: array = field(default_factory=lambda: array("d"))
+    building_lon: array = field(default_factory=lambda: array("d"))
+    building_records: list[bytes] = field(default_factory=list)
+    organization_ids: array = field(default_factory=lambda: array("q"))
+    organization_records: list[bytes] = field(default_factory=list)
+    # Смежность в формате CSR: для i-го элемента — срез [offsets[i], offsets[i + 1]) в массиве индексов.
+    building_org_offsets: array = field(default_factory=lambda: array("q", [0]))
+    building_org_index: array = field(default_factory=lambda: array("q"))
+    activity_ids: array = field(default_factory=lambda: array("q"))
+    activity_org_offsets: array = field(default_factory=lambda: array("q", [0]))
+    activity_org_index: array = field(default_factory=lambda: array("q"))
+    activity_descendant_offsets: array = field(default_factory=lambda: array("q", [0]))
+    activity_descendant_index: array = field(default_factory=lambda: array("q"))
+
+
+async def load_snapshot_data(session: AsyncSession, version: int) -> SnapshotData:
+    data = SnapshotData(version=version)
+
+    buildings = list((await session.scalars(select(Building).order_by(Building.id))).all())
+    building_position = {building.id: index for index, building in enumerate(buildings)}
+    for building in buildings:
+        data.building_ids.append(building.id)
+        data.building_lat.append(building.latitude)
+        data.building_lon.append(building.longitude)
+        data.building_records.append(BuildingOut.model_validate(building).model_dump_json().encode())
+
+    organizations = list(
+        (
+            await session.scalars(
+                select(Organization)
+                .options(
+                    selectinload(Organization.building),
+                    selectinload(Organization.phones),
+                    selectinload(Organization.activities),
+                )
+                .order_by(Organization.id)
+            )
+        ).all()
+    )
+    by_building: list[list[int]] = [[] for _ in buildings]
+    for index, organization in enumerate(organizations):
+        data.organization_ids.append(organization.id)
+        # Карточка сериализуется заранее тем же схемой, что и API, — ответ собирается из готовых байтов.
+        data.organization_records.append(OrganizationOut.model_validate(organization).model_dump_json().encode())
+        by_building[building_position[organization.building_id]].append(index)
+    _fill_csr(data.building_org_offsets, data.building_org_index, by_building)
+
+    activities = (await session.execute(select(Activity.id, Activity.parent_id).order_by(Activity.id))).all()
+    activity_position = {activity_id: index for index, (activity_id, _) in enumerate(activities)}
+    children: list[list[int]] = [[] for _ in activities]
+    for activity_id, parent_id in activities:
+        data.activity_ids.append(activity_id)
+        if parent_id in activity_position:
+            children[activity_position[parent_id]].append(activity_position[activity_id])
+
+    organization_position = {organization_id: index for index, organization_id in enumerate(data.organization_ids)}
+    by_activity: list[list[int]] = [[] for _ in activities]
+    links = await session.execute(
+        select(organization_activity.c.activity_id, organization_activity.c.organization_id)
+    )
+    for activity_id, organization_id in links.all():
+        if activity_id in activity_position and organization_id in organization_position:
+            by_activity[activity_position[activity_id]].append(organization_position[organization_id])
+    _fill_csr(data.activity_org_offsets, data.activity_org_index, [sorted(items) for items in by_activity])
+
+    descendants = []
+    for index in range(len(activities)):
+        # Дерево неглубокое (не более 3 уровней), обход в ширину дешевле рекурсивного CTE на каждый запрос.
+        found = [index]
+        position = 0
+        while position < len(found):
+            found.extend(children[found[position]])
+            position += 1
+        descendants.append(sorted(found))
+    _fill_csr(data.activity_descendant_offsets, data.activity_descendant_index, descendants)
+    return data
+
+
+def _fill_csr(offsets: array, values: array, groups: list[list[int]]) -> None:
+    for group in groups:
+        values.extend(group)
+        offsets.append(len(values))
+
+
+def write_snapshot(path: Path, data: SnapshotData) -> None:
+    sections: dict[str, bytes] = {
+        "building_ids": data.building_ids.tobytes(),
+        "building_lat": data.building_lat.tobytes(),
+        "building_lon": data.building_lon.tobytes(),
+        "organization_ids": data.organization_ids.tobytes(),
+        "building_org_offsets": data.building_org_offsets.tobytes(),
+        "building_org_index": data.building_org_index.tobytes(),
+        "activity_ids": data.activity_ids.tobytes(),
+        "activity_org_offsets": data.activity_org_offsets.tobytes(),
+        "activity_org_index": data.activity_org_index.tobytes(),
+        "activity_descendant_offsets": data.activity_descendant_offsets.tobytes(),
+        "activity_descendant_index": data.activity_descendant_index.tobytes(),
+    }
+    for name, records in (("building", data.building_records), ("organization", data.organization_records)):
+        offsets = array("q", [0])
+        for record in records:
+            offsets.append(offsets[-1] + len(record))
+        sections[f"{name}_record_offsets"] = offsets.tobytes()
+        sections[f"{name}_records"] = b"".join(records)
+
+    layout: dict[str, list[int]] = {}
+    position = 0
+    for name, payload in sections.items():
+        layout[name] = [position, len(payload)]
+        position += len(payload) + (-len(payload) % _ALIGN)
+    table = json.dumps({"version": data.version, "sections": layout}).encode()
+    table += b" " * (-(_HEADER.size + len(table)) % _ALIGN)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, len(table)))
+        file.write(table)
+        for payload in sections.values():
+            file.write(payload)
+            file.write(b"\0" * (-len(payload) % _ALIGN))
+    # Атомарная замена: воркеры, уже отобразившие старый файл, продолжают читать его до переключения.
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    # Снимок, отображенный в память (mmap): страницы файла общие для всех воркеров через page cache,
+    # массивы читаются через memoryview без копирования.
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            self.signature = (stat.st_ino, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, table_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a read model snapshot: {path}")
+        table = json.loads(self._mmap[_HEADER.size:_HEADER.size + table_size])
+        self.version: int = table["version"]
+        base = _HEADER.size + table_size
+        view = memoryview(self._mmap)
+        self._sections = {
+            name: view[base + offset:base + offset + length] for name, (offset, length) in table["sections"].items()
+        }
+
+        self.building_ids = self._sections["building_ids"].cast("q")
+        self.building_lat = self._sections["building_lat"].cast("d")
+        self.building_lon = self._sections["building_lon"].cast("d")
+        self.organization_ids = self._sections["organization_ids"].cast("q")
+        self.activity_ids = self._sections["activity_ids"].cast("q")
+        self._building_orgs = (
+            self._sections["building_org_offsets"].cast("q"),
+            self._sections["building_org_index"].cast("q"),
+        )
+        self._activity_orgs = (
+            self._sections["activity_org_offsets"].cast("q"),
+            self._sections["activity_org_index"].cast("q"),
+        )
+        self._activity_descendants = (
+            self._sections["activity_descendant_offsets"].cast("q"),
+            self._sections["activity_descendant_index"].cast("q"),
+        )
+        self._record_offsets = {
+            name: self._sections[f"{name}_record_offsets"].cast("q") for name in ("building", "organization")
+        }
+
+    def record(self, kind: str, index: int) -> bytes:
+        offsets = self._record_offsets[kind]
+        return self._sections[f"{kind}_records"][offsets[index]:offsets[index + 1]].tobytes()
+
+    def organization_index(self, organization_id: int) -> int | None:
+        return _find(self.organization_ids, organization_id)
+
+    def building_index(self, building_id: int) -> int | None:
+        return _find(self.building_ids, building_id)
+
+    def organizations_count(self, building_index: int) -> int:
+        offsets = self._building_orgs[0]
+        return offsets[building_index + 1] - offsets[building_index]
+
+    def organizations_in_building(self, building_id: int) -> list[int]:
+        index = self.building_index(building_id)
+        return [] if index is None else _csr_slice(self._building_orgs, index)
+
+    def organizations_by_activity(self, activity_id: int, include_descendants: bool) -> list[int]:
+        index = _find(self.activity_ids, activity_id)
+        if index is None:
+            return []
+        activity_indexes = _csr_slice(self._activity_descendants, index) if include_descendants else [index]
+        found: set[int] = set()
+        for activity_index in activity_indexes:
+            found.update(_csr_slice(self._activity_orgs, activity_index))
+        return sorted(found)
+
+    def buildings_within(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> list[int]:
+        return self._within(min_lat, max_lat, min_lon, max_lon).tolist()
+
+    def buildings_near(self, lat: float, lon: float, radius_km: float, candidates: list[int]) -> list[int]:
+        return [
+            index
+            for index in candidates
+            if haversine_km(lat, lon, self.building_lat[index], self.building_lon[index]) <= radius_km
+        ]
+
+    def buildings_in_polygon(self, rings: Sequence[Ring]) -> list[int]:
+        candidates = self._within(*polygon_bounds(rings))
+        lats = np.frombuffer(self.building_lat, dtype=np.float64)[candidates]
+        lons = np.frombuffer(self.building_lon, dtype=np.float64)[candidates]
+        return candidates[points_in_polygon(lats, lons, rings)].tolist()
+
+    def _within(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> np.ndarray:
+        # Маска по массивам координат прямо из mmap, без копирования и без цикла Python по всем зданиям.
+        lats = np.frombuffer(self.building_lat, dtype=np.float64)
+        lons = np.frombuffer(self.building_lon, dtype=np.float64)
+        return np.flatnonzero((lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon))
+
+    def organizations_in_buildings(self, building_indexes: list[int]) -> list[int]:
+        found: list[int] = []
+        for index in building_indexes:
+            found.extend(_csr_slice(self._building_orgs, index))
+        return sorted(found)
+
+
+def _find(ids: memoryview, value: int) -> int | None:
+    index = bisect_left(ids, value)
+    if index < len(ids) and ids[index] == value:
+        return index
+    return None
+
+
+def _csr_slice(csr: tuple[memoryview, memoryview], index: int) -> list[int]:
+    offsets, values = csr
+    return values[offsets[index]:offsets[index + 1]].tolist()
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.data_version import DataChange, get_data_version
+from app.read_model.snapshot import Snapshot, load_snapshot_data, write_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессная блокировка недоступна, снимок может собрать каждый воркер.
+    fcntl = None
+
+logger = logging.getLogger("app.read_model")
+
+
+class ReadModelStore:
+    # Снимок отдается только при точном совпадении его версии с текущей версией данных; иначе запрос
+    # идет в БД, а снимок пересобирается в фоне одним воркером (под файловой блокировкой) и
+    # подхватывается остальными по смене inode файла.
+    def __init__(self, path: str | Path, session_factory: Callable[[], AsyncSession] | None = None) -> None:
+        self._path = Path(path)
+        self._session_factory = session_factory
+        self._snapshot: Snapshot | None = None
+        self._rebuild_task: asyncio.Task | None = None
+
+    @property
+    def session_factory(self) -> Callable[[], AsyncSession]:
+        if self._session_factory is None:
+            from app.db.session import get_sessionmaker
+
+            self._session_factory = get_sessionmaker()
+        return self._session_factory
+
+    @session_factory.setter
+    def session_factory(self, factory: Callable[[], AsyncSession]) -> None:
+        self._session_factory = factory
+
+    def current(self) -> Snapshot | None:
+        version = get_data_version().current()
+        if self._snapshot is None or self._snapshot.version != version:
+            self._reload()
+        if self._snapshot is not None and self._snapshot.version == version:
+            return self._snapshot
+        self.schedule_rebuild()
+        return None
+
+    def schedule_rebuild(self) -> None:
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._rebuild_task = loop.create_task(self._rebuild_in_background())
+
+    def on_change(self, _change: DataChange) -> None:
+        # Запись в этом воркере: пересборку начинаем сразу, не дожидаясь первого чтения.
+        self.schedule_rebuild()
+
+    async def wait_rebuild(self) -> None:
+        if self._rebuild_task is not None:
+            await asyncio.shield(self._rebuild_task)
+
+    async def rebuild(self, session: AsyncSession) -> bool:
+        with self._build_lock() as acquired:
+            if not acquired:
+                return False
+            version = get_data_version().current()
+            self._reload()
+            if self._snapshot is not None and self._snapshot.version == version:
+                return True
+            # Версия читается до выборки: если запись пройдет во время сборки, снимок окажется старее
+            # текущей версии и просто не будет использован.
+            data = await load_snapshot_data(session, version)
+            await asyncio.to_thread(write_snapshot, self._path, data)
+        self._reload()
+        return True
+
+    async def _rebuild_in_background(self) -> None:
+        try:
+            async with self.session_factory() as session:
+                await self.rebuild(session)
+        except Exception:
+            logger.exception("Read model rebuild failed")
+
+    def _reload(self) -> None:
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return
+        if self._snapshot is not None and self._snapshot.signature == (stat.st_ino, stat.st_mtime_ns):
+            return
+        try:
+            # Старое отображение не закрываем явно: на него могут ссылаться выполняющиеся запросы.
+            self._snapshot = Snapshot(self._path)
+        except (OSError, ValueError):
+            logger.warning("Read model snapshot is unreadable: %s", self._path)
+
+    @contextmanager
+    def _build_lock(self) -> Iterator[bool]:
+        if fcntl is None:
+            yield True
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path.with_name(f"{self._path.name}.lock"), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Снимок уже собирает другой воркер.
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@lru_cache(maxsize=1)
+def get_read_model_store() -> ReadModelStore:
+    store = ReadModelStore(get_settings().READ_MODEL_PATH)
+    get_data_version().subscribe(store.on_change)
+    return store
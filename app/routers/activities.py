@@ -0,0 +1,98 @@
+import json
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import ActivityNotFound
+from app.db.bulk import bulk_activities
+from app.read_model.activity_tree import ACTIVITY_TREE_TABLES, ActivityTreeCache, get_activity_tree_cache
+from app.routers.deps import (
+    ETAG_TABLES,
+    admission_control,
+    check_not_modified,
+    db_dep,
+    enforce_rate_limit,
+    make_etag,
+    verify_api_key,
+    verify_write_api_key,
+)
+from app.schemas.activity import ActivityDetailOut, ActivityTreeOut
+from app.schemas.bulk import ActivityIn, BulkRequest, BulkResult
+
+router = APIRouter(
+    prefix="/activities",
+    tags=["activities"],
+    dependencies=[
+        Depends(verify_api_key),
+        Depends(enforce_rate_limit),
+        Depends(check_not_modified),
+        Depends(admission_control),
+    ],
+)
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkResult,
+    dependencies=[Depends(verify_write_api_key)],
+    summary="Пакетное изменение видов деятельности",
+    description=(
+        "Создает, обновляет (по `id`) и удаляет до 1000 видов деятельности за запрос. "
+        "Глубина вложенности пересчитывается и не может превышать 3 уровня. "
+        "Пакет выполняется в одной транзакции; при ошибке валидации не применяется ничего. "
+        "Нужен ключ из `WRITE_API_KEYS`, ключ только для чтения получает 403."
+    ),
+)
+async def bulk_upsert_activities(
+    payload: BulkRequest[ActivityIn],
+    db: AsyncSession = db_dep,
+):
+    result = await bulk_activities(db, payload)
+    await db.commit()
+    return result
+
+
+@router.get(
+    "/tree",
+    response_model=list[ActivityTreeOut],
+    summary="Дерево видов деятельности",
+    description=(
+        "Возвращает всю иерархию видов деятельности с глубиной, родителем и числом организаций: "
+        "`organizations_count` — привязанных непосредственно, `total_organizations_count` — во всем поддереве. "
+        "Дерево собирается один раз и пересобирается только после изменения видов деятельности или их связей "
+        "с организациями; ETag меняется только тогда же."
+    ),
+)
+async def activity_tree(
+    # До db_dep: на совпавший ETag ответ 304 без открытия сессии.
+    etag: str | None = Depends(check_not_modified),
+    db: AsyncSession = db_dep,
+    cache: ActivityTreeCache = Depends(get_activity_tree_cache),
+):
+    tree = await cache.get(db)
+    # Готовые байты: ответ не валидируется и не сериализуется заново на каждый запрос. ETag — версия самого
+    # дерева: запись между проверкой If-None-Match и чтением кеша не разведет тело и ETag.
+    return Response(content=tree.body, media_type="application/json", headers={"ETag": make_etag(tree.version)})
+
+
+@router.get(
+    "/{activity_id}",
+    response_model=ActivityDetailOut,
+    summary="Вид деятельности с поддеревом",
+    description="Возвращает вид деятельности, цепочку его родителей от корня и поддерево с числом организаций.",
+)
+async def get_activity(
+    activity_id: int,
+    etag: str | None = Depends(check_not_modified),
+    db: AsyncSession = db_dep,
+    cache: ActivityTreeCache = Depends(get_activity_tree_cache),
+):
+    tree = await cache.get(db)
+    node = tree.nodes.get(activity_id)
+    if node is None:
+        raise ActivityNotFound()
+    body = json.dumps({**node, "parents": tree.path(activity_id)}, ensure_ascii=False, separators=(",", ":"))
+    return Response(content=body, media_type="application/json", headers={"ETag": make_etag(tree.version)})
+
+
+ETAG_TABLES.update({"activity_tree": ACTIVITY_TREE_TABLES, "get_activity": ACTIVITY_TREE_TABLES})
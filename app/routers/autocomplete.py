@@ -0,0 +1,46 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.routers.deps import (
+    admission_control,
+    check_not_modified,
+    db_dep,
+    enforce_rate_limit,
+    verify_api_key,
+)
+from app.schemas.autocomplete import SuggestionOut
+from app.search.autocomplete import get_autocomplete_index
+
+router = APIRouter(
+    prefix="/autocomplete",
+    tags=["autocomplete"],
+    dependencies=[
+        Depends(verify_api_key),
+        Depends(enforce_rate_limit),
+        Depends(check_not_modified),
+        Depends(admission_control),
+    ],
+)
+
+
+@router.get(
+    "",
+    response_model=list[SuggestionOut],
+    summary="Подсказки по названию",
+    description=(
+        "Возвращает до `limit` организаций и видов деятельности, название которых (или одно из слов) "
+        "начинается с `q`. Регистр и различие ё/е не учитываются."
+    ),
+)
+async def autocomplete(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    kind: Literal["organization", "activity"] | None = Query(None),
+    db: AsyncSession = db_dep,
+):
+    index = get_autocomplete_index()
+    # Сессия используется только для (пере)построения индекса; при свежем индексе запрос к БД не идет.
+    await index.ensure_fresh(db)
+    return index.search(q, limit, kind)
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import Settings, settings_dep
+from app.core.exceptions import BatchTooLarge
+from app.core.metrics import get_metrics
+from app.routers.deps import batch_session, db_dep, verify_api_key
+from app.schemas.batch import BatchMode, BatchRequest, BatchResponse, SubRequest, SubResponse
+
+# Лимиты, admission и ETag применяются к каждому подзапросу отдельно: пакет проходит через те же зависимости,
+# что и обычные запросы. Поэтому сам /batch не занимает ни слот admission, ни слот лимита ключа.
+router = APIRouter(tags=["batch"], dependencies=[Depends(verify_api_key)])
+
+_FORWARDED_SCOPE_KEYS = ("type", "asgi", "http_version", "scheme", "server", "client", "root_path")
+_DROPPED_HEADERS = {b"content-length", b"content-type", b"if-none-match"}
+_RETURNED_HEADERS = ("etag", "retry-after")
+
+
+async def _dispatch(request: Request, sub_request: SubRequest) -> SubResponse:
+    # Подзапрос проходит через все приложение (middleware, зависимости, обработчики ошибок) без HTTP.
+    path, _, query = sub_request.path.partition("?")
+    headers = [(name, value) for name, value in request.scope["headers"] if name not in _DROPPED_HEADERS]
+    if sub_request.if_none_match:
+        headers.append((b"if-none-match", sub_request.if_none_match.encode()))
+    scope = {
+        **{key: request.scope[key] for key in _FORWARDED_SCOPE_KEYS if key in request.scope},
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "state": {},
+    }
+    body_delivered = False
+
+    async def receive():
+        nonlocal body_delivered
+        if not body_delivered:
+            body_delivered = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Подзапрос не может отключиться сам: его отменяет только отмена всего пакета.
+        await asyncio.Event().wait()
+
+    start: dict = {}
+    chunks: list[bytes] = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await request.app(scope, receive, send)
+
+    response_headers = {name.decode().lower(): value.decode() for name, value in start.get("headers", [])}
+    body = b"".join(chunks)
+    if not body:
+        content = None
+    elif response_headers.get("content-type", "").startswith("application/json"):
+        content = json.loads(body)
+    else:
+        content = body.decode(errors="replace")
+    return SubResponse(
+        id=sub_request.id,
+        status=start.get("status", 500),
+        headers={name: response_headers[name] for name in _RETURNED_HEADERS if name in response_headers},
+        body=content,
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=BatchResponse,
+    summary="Пакет запросов чтения",
+    description=(
+        "Выполняет несколько GET-запросов к маршрутам чтения за один HTTP-запрос и возвращает ответы в том же порядке, "
+        "со статусом каждого. `sequential` — подзапросы по очереди в одной сессии и транзакции БД (одно соединение "
+        "из пула, согласованный срез данных); `concurrent` — параллельно, каждый со своей сессией. "
+        "Лимиты ключа и admission применяются к каждому подзапросу."
+    ),
+)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    db: AsyncSession = db_dep,
+    settings: Settings = settings_dep,
+):
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise BatchTooLarge(settings.BATCH_MAX_REQUESTS)
+
+    if batch.mode is BatchMode.sequential:
+        responses = []
+        token = batch_session.set(db)
+        try:
+            for sub_request in batch.requests:
+                response = await _dispatch(request, sub_request)
+                if response.status >= 500 and db.in_transaction():
+                    # Ошибка БД оставляет транзакцию прерванной; следующим подзапросам нужна новая.
+                    await db.rollback()
+                responses.append(response)
+        finally:
+            batch_session.reset(token)
+    else:
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+        async def run(sub_request: SubRequest) -> SubResponse:
+            async with semaphore:
+                return await _dispatch(request, sub_request)
+
+        responses = list(await asyncio.gather(*(run(sub_request) for sub_request in batch.requests)))
+
+    get_metrics().inc("batch.subrequests", len(responses))
+    return BatchResponse(responses=responses)
@@ -1,15 +1,61 @@
-import math
+import json
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.geo import bbox_clause, bounding_box, haversine_km
+from app.db.queries import building_activity_breakdown, buildings_with_organization_counts, with_details
 from app.models.building import Building
-from app.routers.deps import db_dep, pagination_dep, verify_api_key
-from app.schemas.building import BuildingOut
+from app.models.organization import Organization
+from app.read_model.snapshot import Snapshot
+from app.routers.deps import (
+    admission_control,
+    check_not_modified,
+    db_dep,
+    enforce_rate_limit,
+    pagination_dep,
+    read_model_dep,
+    verify_api_key,
+    verify_write_api_key,
+)
+from app.routers.pagination import page_response, paginate, snapshot_page
+from app.db.bulk import bulk_buildings
+from app.schemas.building import ActivityCountOut, BuildingDistanceOut, BuildingOut, BuildingStatsOut
+from app.schemas.bulk import BuildingIn, BulkRequest, BulkResult
 from app.schemas.common import PageParams, PaginatedResponse
+from app.schemas.organization import BuildingMatchOut, OrganizationOut
+from app.search.address import get_address_index
+
+router = APIRouter(
+    prefix="/buildings",
+    tags=["buildings"],
+    dependencies=[
+        Depends(verify_api_key),
+        Depends(enforce_rate_limit),
+        Depends(check_not_modified),
+        Depends(admission_control),
+    ],
+)
+
+
+async def _activity_breakdown(db: AsyncSession, building_ids: list[int]) -> dict[int, list[ActivityCountOut]]:
+    if not building_ids:
+        return {}
+    stmt = building_activity_breakdown(building_ids)
+    breakdown: dict[int, list[ActivityCountOut]] = {}
+    for building_id, activity_id, name, organizations_count in (await db.execute(stmt)).all():
+        breakdown.setdefault(building_id, []).append(
+            ActivityCountOut(activity_id=activity_id, name=name, organizations_count=organizations_count)
+        )
+    return breakdown
 
-router = APIRouter(prefix="/buildings", tags=["buildings"], dependencies=[Depends(verify_api_key)])
+
+def _snapshot_stats(read_model: Snapshot, index: int) -> BuildingStatsOut:
+    return BuildingStatsOut(
+        **json.loads(read_model.record("building", index)),
+        organizations_count=read_model.organizations_count(index),
+    )
 
 
 @router.get(
@@ -21,19 +67,178 @@ router = APIRouter(prefix="/buildings", tags=["buildings"], dependencies=[Depend
 async def list_buildings(
     db: AsyncSession = db_dep,
     pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
+):
+    if read_model is not None:
+        return snapshot_page(read_model, "building", list(range(len(read_model.building_ids))), pagination)
+    base_stmt = select(Building)
+    stmt = base_stmt.order_by(Building.id)
+    return await paginate(db, base_stmt, stmt, pagination)
+
+
+@router.get(
+    "/search",
+    response_model=PaginatedResponse[BuildingMatchOut],
+    summary="Поиск зданий по адресу",
+    description=(
+        "Находит здания, в адресе которых есть все слова запроса. Регистр, знаки препинания и ё/е не учитываются; "
+        "сокращения «ул.», «пр.», «пл.» и названия городов («СПб», «Питер», «Мск») приводятся к полной форме, "
+        "пометки «г.» и «д.» пропускаются. `prefix=true` ищет последнее слово по началу "
+        "как есть, без раскрытия сокращений («Москва К» — «Кутузовский», а не «корпус»). "
+        "С `include_organizations=true` каждое здание возвращается вместе со своими организациями."
+    ),
+)
+async def search_buildings(
+    q: str = Query(..., min_length=1, max_length=256),
+    prefix: bool = Query(False),
+    include_organizations: bool = Query(False),
+    db: AsyncSession = db_dep,
+    pagination: PageParams = Depends(pagination_dep),
+):
+    index = get_address_index()
+    await index.ensure_fresh(db)
+    building_ids = index.search(q, prefix)
+
+    start = (pagination.page - 1) * pagination.size
+    page_ids = building_ids[start:start + pagination.size]
+    buildings = {
+        building.id: building
+        for building in (await db.scalars(select(Building).where(Building.id.in_(page_ids)))).all()
+    }
+    organizations: dict[int, list[OrganizationOut]] = {}
+    if include_organizations and buildings:
+        stmt = with_details(select(Organization).where(Organization.building_id.in_(list(buildings))))
+        for organization in (await db.scalars(stmt.order_by(Organization.id))).all():
+            organizations.setdefault(organization.building_id, []).append(
+                OrganizationOut.model_validate(organization)
+            )
+    items = [
+        BuildingMatchOut(
+            **BuildingOut.model_validate(buildings[building_id]).model_dump(),
+            organizations=organizations.get(building_id, []) if include_organizations else None,
+        )
+        for building_id in page_ids
+        if building_id in buildings
+    ]
+    return page_response(items, len(building_ids), pagination)
+
+
+@router.get(
+    "/stats",
+    response_model=PaginatedResponse[BuildingStatsOut],
+    summary="Здания с числом организаций",
+    description=(
+        "Возвращает здания с количеством организаций в каждом. "
+        "С `include_activities=true` добавляет разбивку по видам деятельности."
+    ),
+)
+async def list_buildings_stats(
+    include_activities: bool = Query(False),
+    db: AsyncSession = db_dep,
+    pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
 ):
-    count_stmt = select(func.count()).select_from(Building)
-    total = await db.scalar(count_stmt) or 0
-
-    stmt = select(Building).order_by(Building.id)
-    stmt = stmt.limit(pagination.size).offset((pagination.page - 1) * pagination.size)
-    result = await db.scalars(stmt)
-    items = list(result.all())
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
+    if read_model is not None and not include_activities:
+        start = (pagination.page - 1) * pagination.size
+        indexes = range(len(read_model.building_ids))
+        items = [_snapshot_stats(read_model, index) for index in indexes[start:start + pagination.size]]
+        return page_response(items, len(indexes), pagination)
+
+    stmt = buildings_with_organization_counts().order_by(Building.id)
+    page = await paginate(db, select(Building), stmt, pagination, scalars=False)
+
+    breakdown = {}
+    if include_activities:
+        breakdown = await _activity_breakdown(db, [building.id for building, _ in page.items])
+    page.items = [
+        BuildingStatsOut(
+            **BuildingOut.model_validate(building).model_dump(),
+            organizations_count=organizations_count,
+            activities=breakdown.get(building.id, []) if include_activities else None,
+        )
+        for building, organizations_count in page.items
+    ]
+    return page
+
+
+@router.get(
+    "/near",
+    response_model=PaginatedResponse[BuildingDistanceOut],
+    summary="Ближайшие здания",
+    description=(
+        "Возвращает здания в заданном радиусе от точки, отсортированные по расстоянию, "
+        "с количеством организаций в каждом."
+    ),
+)
+async def list_buildings_nearby(
+    lat: float = Query(...),
+    lon: float = Query(...),
+    radius_km: float = Query(..., gt=0),
+    include_activities: bool = Query(False),
+    db: AsyncSession = db_dep,
+    pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
+):
+    if read_model is not None and not include_activities:
+        candidates = read_model.buildings_within(*bounding_box(lat, lon, radius_km))
+        distances = [
+            (haversine_km(lat, lon, read_model.building_lat[index], read_model.building_lon[index]), index)
+            for index in read_model.buildings_near(lat, lon, radius_km, candidates)
+        ]
+        distances.sort(key=lambda candidate: (candidate[0], read_model.building_ids[candidate[1]]))
+        start = (pagination.page - 1) * pagination.size
+        items = [
+            BuildingDistanceOut(
+                **_snapshot_stats(read_model, index).model_dump(),
+                distance_km=round(distance_km, 3),
+            )
+            for distance_km, index in distances[start:start + pagination.size]
+        ]
+        return page_response(items, len(distances), pagination)
+
+    # Тот же первичный отбор по прямоугольнику, что и в /organizations/near, затем точное расстояние.
+    stmt = buildings_with_organization_counts().where(
+        bbox_clause(Building.latitude, Building.longitude, *bounding_box(lat, lon, radius_km))
     )
+    candidates = []
+    for building, organizations_count in (await db.execute(stmt)).all():
+        distance_km = haversine_km(lat, lon, building.latitude, building.longitude)
+        if distance_km <= radius_km:
+            candidates.append((distance_km, building, organizations_count))
+    candidates.sort(key=lambda candidate: (candidate[0], candidate[1].id))
+
+    start = (pagination.page - 1) * pagination.size
+    page_candidates = candidates[start:start + pagination.size]
+    breakdown = {}
+    if include_activities:
+        breakdown = await _activity_breakdown(db, [building.id for _, building, _ in page_candidates])
+    items = [
+        BuildingDistanceOut(
+            **BuildingOut.model_validate(building).model_dump(),
+            organizations_count=organizations_count,
+            activities=breakdown.get(building.id, []) if include_activities else None,
+            distance_km=round(distance_km, 3),
+        )
+        for distance_km, building, organizations_count in page_candidates
+    ]
+    return page_response(items, len(candidates), pagination)
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkResult,
+    dependencies=[Depends(verify_write_api_key)],
+    summary="Пакетное изменение зданий",
+    description=(
+        "Создает, обновляет (по `id`) и удаляет до 1000 зданий за запрос. Здание с организациями удалить нельзя. "
+        "Пакет выполняется в одной транзакции; при ошибке валидации не применяется ничего. "
+        "Нужен ключ из `WRITE_API_KEYS`, ключ только для чтения получает 403."
+    ),
+)
+async def bulk_upsert_buildings(
+    payload: BulkRequest[BuildingIn],
+    db: AsyncSession = db_dep,
+):
+    result = await bulk_buildings(db, payload)
+    await db.commit()
+    return result
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.change_log import ChangeLog
+from app.models.organization import Organization
+from app.models.phone import Phone
+from app.routers.deps import (
+    admission_control,
+    check_not_modified,
+    db_dep,
+    enforce_rate_limit,
+    verify_api_key,
+)
+from app.schemas.changes import (
+    ActivitySyncOut,
+    BuildingSyncOut,
+    ChangesOut,
+    EntityChanges,
+    OrganizationSyncOut,
+    PhoneSyncOut,
+)
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+    dependencies=[
+        Depends(verify_api_key),
+        Depends(enforce_rate_limit),
+        Depends(check_not_modified),
+        Depends(admission_control),
+    ],
+)
+
+_ENTITY_MODELS = {
+    "buildings": Building,
+    "activities": Activity,
+    "organizations": Organization,
+    "phones": Phone,
+}
+
+
+def _sync_out(entity: str, row):
+    if entity == "buildings":
+        return BuildingSyncOut.model_validate(row)
+    if entity == "activities":
+        return ActivitySyncOut.model_validate(row)
+    if entity == "phones":
+        return PhoneSyncOut.model_validate(row)
+    return OrganizationSyncOut(
+        id=row.id,
+        name=row.name,
+        building_id=row.building_id,
+        activity_ids=sorted(activity.id for activity in row.activities),
+        updated_at=row.updated_at,
+    )
+
+
+@router.get(
+    "",
+    response_model=ChangesOut,
+    summary="Журнал изменений для синхронизации",
+    description=(
+        "Возвращает сущности, добавленные или измененные после токена `since`, и идентификаторы удаленных. "
+        "Первый вызов делается с `since=0`, следующие — с `next_token` из предыдущего ответа, "
+        "пока `has_more` равно true."
+    ),
+)
+async def list_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10_000),
+    db: AsyncSession = db_dep,
+):
+    stmt = select(ChangeLog).where(ChangeLog.id > since).order_by(ChangeLog.id).limit(limit + 1)
+    entries = list((await db.scalars(stmt)).all())
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Несколько записей об одной сущности схлопываются: важна только последняя операция.
+    last_ops: dict[str, dict[int, str]] = {entity: {} for entity in _ENTITY_MODELS}
+    for entry in entries:
+        if entry.entity in last_ops:
+            last_ops[entry.entity][entry.entity_id] = entry.op
+
+    changes: dict[str, EntityChanges] = {}
+    for entity, model in _ENTITY_MODELS.items():
+        ops = last_ops[entity]
+        upsert_ids = [entity_id for entity_id, op in ops.items() if op != "delete"]
+        deleted = {entity_id for entity_id, op in ops.items() if op == "delete"}
+        upserted = []
+        if upsert_ids:
+            rows_stmt = select(model).where(model.id.in_(upsert_ids)).order_by(model.id)
+            if model is Organization:
+                rows_stmt = rows_stmt.options(selectinload(Organization.activities))
+            rows = list((await db.scalars(rows_stmt)).all())
+            upserted = [_sync_out(entity, row) for row in rows]
+            # Строка могла быть удалена транзакцией, чья запись в журнал еще за пределами страницы.
+            deleted.update(set(upsert_ids) - {row.id for row in rows})
+        changes[entity] = EntityChanges(upserted=upserted, deleted=sorted(deleted))
+
+    return ChangesOut(
+        since=since,
+        next_token=entries[-1].id if entries else since,
+        has_more=has_more,
+        **changes,
+    )
@@ -1,28 +1,227 @@
-from fastapi import Depends, Header, HTTPException, Query, status
+import asyncio
+import math
+import time
+from contextvars import ContextVar
 
+from fastapi import Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.admission import AdmissionController, Priority, get_admission_controller
+from app.core.circuit_breaker import CircuitBreaker, get_circuit_breaker, is_query_timeout, is_unavailable_error
 from app.core.config import Settings, settings_dep
-from app.db.session import SessionLocal
-from app.schemas.common import PageParams
+from app.core.data_version import get_data_version
+from app.core.exceptions import DatabaseUnavailable, NotModified, RateLimitExceeded
+from app.core.metrics import get_metrics
+from app.core.rate_limit import get_rate_limit_backend
+from app.core.stale_cache import get_stale_cache
+from app.db.events import DEADLINE_KEY, FIRST_USE_KEY
+from app.db.session import get_sessionmaker
+from app.read_model.snapshot import Snapshot
+from app.read_model.store import get_read_model_store
+from app.schemas.common import CountMode, PageParams
+
+# Сессия, общая для подзапросов последовательного /batch: подзапросы выполняются в контексте задачи пакета.
+batch_session: ContextVar[AsyncSession | None] = ContextVar("batch_session", default=None)
+# Отметка общей сессии пакета: подзапрос уже получил ошибку доступности БД.
+_SHARED_FAILED_KEY = "shared_session_failed"
+
+
+async def get_db(
+    request: Request,
+    settings: Settings = settings_dep,
+    breaker: CircuitBreaker = Depends(get_circuit_breaker),
+):
+    shared = batch_session.get()
+    if shared is not None:
+        # Сессией и ее дедлайном управляет пакет; подзапрос только пользуется ею. Сбои БД подзапросов
+        # учитываются автоматом здесь: пакет получает их уже как ответы 5xx.
+        if shared.info.get(_SHARED_FAILED_KEY):
+            # БД уже не ответила подзапросу этого пакета: остальные не ждут соединения.
+            raise DatabaseUnavailable(math.ceil(breaker.retry_after()) or 1)
+        try:
+            yield shared
+        except Exception as exc:
+            if is_unavailable_error(exc):
+                breaker.record_failure()
+                shared.info[_SHARED_FAILED_KEY] = True
+                raise DatabaseUnavailable(math.ceil(breaker.retry_after()) or 1) from exc
+            if is_query_timeout(exc):
+                breaker.record_failure()
+            raise
+        return
+    route_name = getattr(request.scope.get("route"), "name", "")
+    used = False
 
+    def check_breaker() -> None:
+        # Автомат проверяется при первом обращении к БД, а не при создании сессии: маршрут, ответивший
+        # из снимка read model, не получает 503 и не тратит пробный запрос разомкнутого автомата.
+        nonlocal used
+        if not breaker.allow_request():
+            # Не ждем соединения: обработчик отдаст последний успешный ответ, если он есть.
+            raise DatabaseUnavailable(math.ceil(breaker.retry_after()) or 1)
+        used = True
 
-async def get_db():
-    async with SessionLocal() as db:
-        yield db
+    async with get_sessionmaker()() as db:
+        # Дедлайн переводится в statement_timeout каждой транзакции сессии (см. app.db.events).
+        db.info[DEADLINE_KEY] = time.monotonic() + settings.statement_timeout_for(route_name) / 1000
+        db.info[FIRST_USE_KEY] = check_breaker
+        try:
+            yield db
+        except asyncio.CancelledError:
+            if db.in_transaction():
+                get_metrics().inc("db.queries_cancelled")
+            raise
+        except Exception as exc:
+            if not used:
+                # Сессия не обращалась к БД (или автомат был разомкнут): состояние автомата не меняется.
+                raise
+            if is_unavailable_error(exc):
+                breaker.record_failure()
+                raise DatabaseUnavailable(math.ceil(breaker.retry_after()) or 1) from exc
+            # Дедлайн, истекший у запросов подряд, — признак того, что БД не справляется.
+            if is_query_timeout(exc):
+                breaker.record_failure()
+            else:
+                _record_success(request, breaker)
+            raise
+        else:
+            # Пакет завершается успешно, даже если подзапросы получили ошибки БД: они уже учтены как сбои.
+            if used and not db.info.get(_SHARED_FAILED_KEY):
+                _record_success(request, breaker)
+
+
+def _record_success(request: Request, breaker: CircuitBreaker) -> None:
+    if breaker.record_success():
+        # Первый успешный запрос после сбоя: ответы, отданные устаревшими, перезапрашиваются в фоне.
+        get_stale_cache().refresh_in_background(request.app)
 
 
 db_dep = Depends(get_db)
 
 
+async def get_read_model(settings: Settings = settings_dep) -> Snapshot | None:
+    # None — читать из БД: режим выключен или снимок еще не догнал текущую версию данных.
+    if not settings.READ_MODEL_ENABLED:
+        return None
+    return get_read_model_store().current()
+
+
+read_model_dep = Depends(get_read_model)
+
+
 def pagination_dep(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
+    count: CountMode = Query(
+        CountMode.exact,
+        description="Total mode: exact count, estimated (capped count or planner estimate) or none",
+    ),
 ) -> PageParams:
-    return PageParams(page=page, size=size)
+    return PageParams(page=page, size=size, count=count)
 
 
 def verify_api_key(
     x_api_key: str | None = Header(None, alias="X-API-Key"),
     settings: Settings = settings_dep,
 ):
-    if not x_api_key or x_api_key not in settings.API_KEYS:
+    if not x_api_key or (x_api_key not in settings.API_KEYS and x_api_key not in settings.WRITE_API_KEYS):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+
+
+def verify_write_api_key(
+    x_api_key: str | None = Header(None, alias="X-API-Key"),
+    settings: Settings = settings_dep,
+):
+    # Подключается к маршрутам записи после verify_api_key: ключ только для чтения получает 403.
+    if x_api_key not in settings.WRITE_API_KEYS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="API key is not allowed to modify data")
+
+
+async def take_rate_limit_token(settings: Settings, api_key: str | None) -> None:
+    # Отдельно от enforce_rate_limit: токен списывают и запросы, получившие копию чужого ответа
+    # при объединении одинаковых запросов (они не проходят зависимости маршрута).
+    limits = settings.rate_limit_for(api_key)
+    if limits.per_second is None:
+        return
+    retry_after = await get_rate_limit_backend().take_token(api_key, limits.per_second, limits.burst)
+    if retry_after > 0:
+        get_metrics().inc("rate_limit.rejected")
+        raise RateLimitExceeded(math.ceil(retry_after))
+
+
+async def enforce_rate_limit(
+    x_api_key: str | None = Header(None, alias="X-API-Key"),
+    settings: Settings = settings_dep,
+):
+    # Подключается после verify_api_key и до db_dep: отклоненный запрос не занимает соединение из пула.
+    limits = settings.rate_limit_for(x_api_key)
+    backend = get_rate_limit_backend()
+    await take_rate_limit_token(settings, x_api_key)
+    if limits.concurrency is None:
+        yield
+        return
+    if not await backend.acquire_slot(x_api_key, limits.concurrency):
+        get_metrics().inc("rate_limit.rejected")
+        raise RateLimitExceeded(1, "Too many concurrent requests")
+    try:
+        yield
+    finally:
+        await backend.release_slot(x_api_key)
+
+
+async def enforce_request_rate(
+    x_api_key: str | None = Header(None, alias="X-API-Key"),
+    settings: Settings = settings_dep,
+):
+    # Только лимит частоты, без слота RATE_LIMIT_CONCURRENCY: для долгих ответов (поток событий, скачивание
+    # файла) слот держался бы всю передачу и закрывал ключу остальные маршруты.
+    await take_rate_limit_token(settings, x_api_key)
+
+
+async def admission_control(
+    request: Request,
+    settings: Settings = settings_dep,
+    controller: AdmissionController = Depends(get_admission_controller),
+):
+    # Подключается после check_not_modified: ответ 304 слот не занимает.
+    route_name = getattr(request.scope.get("route"), "name", "")
+    if route_name in settings.ADMISSION_HIGH_PRIORITY_ROUTES:
+        priority = Priority.high
+    elif route_name in settings.ADMISSION_LOW_PRIORITY_ROUTES:
+        priority = Priority.low
+    else:
+        priority = Priority.normal
+    async with controller.admit(route_name, priority):
+        yield
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Слабое сравнение (RFC 9110): префикс W/ не учитывается.
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+# Маршруты, ответ которых зависит только от части таблиц (ключ — имя маршрута): их ETag строится по версии
+# этих таблиц и не меняется от записи в остальные.
+ETAG_TABLES: dict[str, frozenset[str]] = {}
+
+
+def make_etag(version: int) -> str:
+    return f'W/"{version:x}"'
+
+
+def check_not_modified(request: Request, response: Response) -> str | None:
+    # Подключается до db_dep: на совпавший ETag отвечаем 304 без открытия сессии БД.
+    if request.method not in ("GET", "HEAD"):
+        return None
+    tables = ETAG_TABLES.get(getattr(request.scope.get("route"), "name", ""))
+    data_version = get_data_version()
+    version = data_version.table_version(*tables) if tables else data_version.current()
+    etag = make_etag(version)
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise NotModified(etag)
+    response.headers["ETag"] = etag
+    return etag
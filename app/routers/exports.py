@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import FileResponse
+
+from app.core.exceptions import ExportNotFound, ExportNotReady
+from app.exports.jobs import ExportManager, get_export_manager
+from app.routers.deps import enforce_rate_limit, enforce_request_rate, verify_api_key
+from app.schemas.export import ExportCreate, ExportJobOut, ExportStatus
+
+router = APIRouter(prefix="/exports", tags=["exports"], dependencies=[Depends(verify_api_key)])
+
+export_manager_dep = Depends(get_export_manager)
+
+
+@router.post(
+    "",
+    response_model=ExportJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Запуск выгрузки",
+    dependencies=[Depends(enforce_rate_limit)],
+    description=(
+        "Ставит в очередь фоновую выгрузку справочника (организации, здания или виды деятельности) "
+        "в CSV или NDJSON со сжатием gzip. Для организаций можно ограничить регион и вид деятельности "
+        "(вместе с вложенными). Возвращает задание; прогресс — `GET /exports/{id}`."
+    ),
+)
+async def create_export(payload: ExportCreate, manager: ExportManager = export_manager_dep):
+    return await manager.submit(payload)
+
+
+@router.get(
+    "/{job_id}",
+    response_model=ExportJobOut,
+    summary="Статус выгрузки",
+    dependencies=[Depends(enforce_rate_limit)],
+    description="Возвращает состояние задания: статус, число выгруженных строк и долю выполнения.",
+)
+async def get_export(job_id: str, manager: ExportManager = export_manager_dep):
+    job = manager.get(job_id)
+    if job is None:
+        raise ExportNotFound()
+    return job
+
+
+@router.get(
+    "/{job_id}/download",
+    summary="Скачивание выгрузки",
+    # Передача большого файла не держит слот RATE_LIMIT_CONCURRENCY ключа, списывается только токен частоты.
+    dependencies=[Depends(enforce_request_rate)],
+    description="Отдает готовый файл выгрузки (gzip). До завершения задания возвращает 409.",
+)
+async def download_export(job_id: str, manager: ExportManager = export_manager_dep):
+    job = manager.get(job_id)
+    if job is None:
+        raise ExportNotFound()
+    if job.status is not ExportStatus.completed:
+        raise ExportNotReady(job.status.value)
+    path = manager.store.data_path(job)
+    if not path.exists():
+        raise ExportNotFound()
+    return FileResponse(
+        path,
+        media_type="application/gzip",
+        filename=f"{job.request.entity.value}-{job.id}.{job.request.format.value}.gz",
+    )
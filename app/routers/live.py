@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.config import Settings, settings_dep
+from app.core.exceptions import InvalidSubscription
+from app.live.hub import LiveHub, get_live_hub
+from app.routers.deps import enforce_request_rate, verify_api_key
+
+# Поток не держит ни сессию БД, ни слот admission, ни слот RATE_LIMIT_CONCURRENCY ключа: изменения читает
+# один общий на воркер хаб, а с ключа при подключении списывается только токен частоты.
+router = APIRouter(
+    prefix="/live",
+    tags=["live"],
+    dependencies=[Depends(verify_api_key), Depends(enforce_request_rate)],
+)
+
+
+@router.get(
+    "/organizations",
+    response_class=StreamingResponse,
+    summary="Поток изменений организаций в области",
+    description=(
+        "Server-sent events: после события `ready` приходят `added`, `changed` (карточка организации) и `removed` "
+        "(`{\"id\": ...}`) для организаций, попавших в прямоугольник и/или поддерево вида деятельности или "
+        "покинувших их. `id` события — версия данных. Событие `resync` означает, что клиент не успевал читать "
+        "и область нужно перечитать целиком."
+    ),
+)
+async def stream_organizations(
+    min_lat: float | None = Query(None, ge=-90, le=90),
+    max_lat: float | None = Query(None, ge=-90, le=90),
+    min_lon: float | None = Query(None, ge=-180, le=180),
+    max_lon: float | None = Query(None, ge=-180, le=180),
+    activity_id: int | None = Query(None),
+    include_children: bool = Query(True),
+    settings: Settings = settings_dep,
+    hub: LiveHub = Depends(get_live_hub),
+):
+    corners = (min_lat, max_lat, min_lon, max_lon)
+    if all(value is None for value in corners):
+        bbox = None
+    elif any(value is None for value in corners):
+        raise InvalidSubscription("min_lat, max_lat, min_lon and max_lon must be given together")
+    elif min_lat > max_lat or min_lon > max_lon:
+        raise InvalidSubscription("min_lat/min_lon must not exceed max_lat/max_lon")
+    else:
+        bbox = corners
+    if bbox is None and activity_id is None:
+        raise InvalidSubscription("Either a rectangle or activity_id is required")
+
+    subscription = await hub.subscribe(bbox, activity_id, include_children)
+    return StreamingResponse(
+        hub.stream(subscription, settings.LIVE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        # Без буферизации в nginx события доходят до клиента сразу.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,56 +1,71 @@
-import math
-
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import Select, and_, func, select
+import numpy as np
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased, selectinload
 
 from app.core.exceptions import (
     ActivityNotFound,
     InvalidCoordinates,
+    InvalidPhoneNumber,
     OrganizationNotFound,
 )
+from app.core.geo import bounding_box, haversine_km, k_nearest, points_in_polygon
+from app.db.bulk import bulk_organizations
+from app.db.queries import (
+    activity_subtree,
+    organization_coordinates,
+    organization_coordinates_in_bbox,
+    organizations_by_activities,
+    organizations_by_activity,
+    organizations_by_building,
+    organizations_by_name,
+    organizations_by_phone,
+    organizations_in_bbox,
+    with_details,
+)
 from app.models.activity import Activity
-from app.models.building import Building
-from app.models.organization import Organization, organization_activity
-from app.routers.deps import db_dep, pagination_dep, verify_api_key
+from app.models.organization import Organization
+from app.read_model.snapshot import Snapshot
+from app.routers.deps import (
+    admission_control,
+    check_not_modified,
+    db_dep,
+    enforce_rate_limit,
+    pagination_dep,
+    read_model_dep,
+    verify_api_key,
+    verify_write_api_key,
+)
+from app.routers.pagination import page_response, paginate, snapshot_page
+from app.schemas.bulk import BulkRequest, BulkResult, OrganizationIn
 from app.schemas.common import PageParams, PaginatedResponse
-from app.schemas.organization import OrganizationOut
-
-router = APIRouter(prefix="/organizations", tags=["organizations"], dependencies=[Depends(verify_api_key)])
-
-
-def _with_details(stmt: Select[tuple[Organization]]):
-    return stmt.options(
-        selectinload(Organization.building),
-        selectinload(Organization.phones),
-        selectinload(Organization.activities),
-    )
-
-
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    # Формула гаверсинуса для расстояния по сфере в километрах.
-    radius_km = 6371.0
-    lat1_r = math.radians(lat1)
-    lon1_r = math.radians(lon1)
-    lat2_r = math.radians(lat2)
-    lon2_r = math.radians(lon2)
-    delta_lat = lat2_r - lat1_r
-    delta_lon = lon2_r - lon1_r
-    # Промежуточное значение для центрального угла между точками.
-    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_r) * math.cos(lat2_r) * math.sin(delta_lon / 2) ** 2
-    # Центральный угол по сфере.
-    c = 2 * math.asin(min(1.0, math.sqrt(a)))
-    return radius_km * c
+from app.schemas.geo import NearestQuery, PolygonGeometry
+from app.schemas.organization import (
+    NearestOrganizationsOut,
+    OrganizationDistanceOut,
+    OrganizationMatchOut,
+    OrganizationOut,
+)
+from app.search.fuzzy import get_fuzzy_index
+from app.search.normalize import normalize_phone, phone_variants
+
+# Более короткий префикс совпадает с заметной долей всех номеров и ничем не лучше полного списка.
+MIN_PHONE_PREFIX_DIGITS = 3
+
+router = APIRouter(
+    prefix="/organizations",
+    tags=["organizations"],
+    dependencies=[
+        Depends(verify_api_key),
+        Depends(enforce_rate_limit),
+        Depends(check_not_modified),
+        Depends(admission_control),
+    ],
+)
 
 
 async def _activity_descendants(session: AsyncSession, activity_id: int) -> list[int]:
-    activity_cte = select(Activity.id).where(Activity.id == activity_id).cte(recursive=True)
-    activity_alias = aliased(Activity)
-    activity_cte = activity_cte.union_all(
-        select(activity_alias.id).where(activity_alias.parent_id == activity_cte.c.id)
-    )
-    result = await session.execute(select(activity_cte.c.id))
+    result = await session.execute(activity_subtree(activity_id))
     return [row[0] for row in result.all()]
 
 
@@ -64,23 +79,39 @@ async def list_by_building(
     building_id: int,
     db: AsyncSession = db_dep,
     pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
 ):
-    base_stmt = select(Organization).where(Organization.building_id == building_id)
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
+    if read_model is not None:
+        return snapshot_page(read_model, "organization", read_model.organizations_in_building(building_id), pagination)
+    base_stmt = organizations_by_building(building_id)
+    stmt = with_details(base_stmt).order_by(Organization.id)
+    return await paginate(db, base_stmt, stmt, pagination)
 
-    stmt = _with_details(base_stmt).order_by(Organization.id)
-    stmt = stmt.limit(pagination.size).offset((pagination.page - 1) * pagination.size)
-    result = await db.scalars(stmt)
-    items = list(result.all())
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
-    )
+
+@router.get(
+    "/by-phone",
+    response_model=PaginatedResponse[OrganizationOut],
+    summary="Организации по номеру телефона",
+    description=(
+        "Ищет организации по номеру телефона в любом формате: сравниваются только цифры. "
+        "Точный поиск считает 8 и +7 в начале российского номера одинаковыми; "
+        f"`prefix=true` — по началу номера (не меньше {MIN_PHONE_PREFIX_DIGITS} цифр)."
+    ),
+)
+async def list_by_phone(
+    number: str = Query(..., min_length=1, max_length=64),
+    prefix: bool = Query(False),
+    db: AsyncSession = db_dep,
+    pagination: PageParams = Depends(pagination_dep),
+):
+    digits = normalize_phone(number)
+    if not digits:
+        raise InvalidPhoneNumber("Phone number must contain digits")
+    if prefix and len(digits) < MIN_PHONE_PREFIX_DIGITS:
+        raise InvalidPhoneNumber(f"Phone prefix must have at least {MIN_PHONE_PREFIX_DIGITS} digits")
+    base_stmt = organizations_by_phone([digits] if prefix else phone_variants(digits), prefix=prefix)
+    stmt = with_details(base_stmt).order_by(Organization.id)
+    return await paginate(db, base_stmt, stmt, pagination)
 
 
 @router.get(
@@ -93,27 +124,14 @@ async def list_by_activity(
     activity_id: int,
     db: AsyncSession = db_dep,
     pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
 ):
-    base_stmt = (
-        select(Organization)
-        .join(organization_activity)
-        .where(organization_activity.c.activity_id == activity_id)
-    )
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
-
-    stmt = _with_details(base_stmt).order_by(Organization.id)
-    stmt = stmt.limit(pagination.size).offset((pagination.page - 1) * pagination.size)
-    result = await db.scalars(stmt)
-    items = list(result.all())
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
-    )
+    if read_model is not None:
+        indexes = read_model.organizations_by_activity(activity_id, include_descendants=False)
+        return snapshot_page(read_model, "organization", indexes, pagination)
+    base_stmt = organizations_by_activity(activity_id)
+    stmt = with_details(base_stmt).order_by(Organization.id)
+    return await paginate(db, base_stmt, stmt, pagination)
 
 
 @router.get(
@@ -126,32 +144,18 @@ async def list_by_activity_tree(
     activity_id: int,
     db: AsyncSession = db_dep,
     pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
 ):
+    if read_model is not None:
+        indexes = read_model.organizations_by_activity(activity_id, include_descendants=True)
+        return snapshot_page(read_model, "organization", indexes, pagination)
     activity_ids = await _activity_descendants(db, activity_id)
     if not activity_ids:
-        return PaginatedResponse(items=[], total=0, page=pagination.page, size=pagination.size, pages=0)
-
-    base_stmt = (
-        select(Organization)
-        .join(organization_activity)
-        .where(organization_activity.c.activity_id.in_(activity_ids))
-        .distinct()
-    )
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
+        return page_response([], 0, pagination)
 
-    stmt = _with_details(base_stmt).order_by(Organization.id)
-    stmt = stmt.limit(pagination.size).offset((pagination.page - 1) * pagination.size)
-    result = await db.scalars(stmt)
-    items = list(result.all())
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
-    )
+    base_stmt = organizations_by_activities(activity_ids)
+    stmt = with_details(base_stmt).order_by(Organization.id)
+    return await paginate(db, base_stmt, stmt, pagination)
 
 
 @router.get(
@@ -175,27 +179,9 @@ async def list_by_activity_name(
     if include_children:
         activity_ids = await _activity_descendants(db, activity.id)
 
-    base_stmt = (
-        select(Organization)
-        .join(organization_activity)
-        .where(organization_activity.c.activity_id.in_(activity_ids))
-        .distinct()
-    )
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
-
-    stmt = _with_details(base_stmt).order_by(Organization.id)
-    stmt = stmt.limit(pagination.size).offset((pagination.page - 1) * pagination.size)
-    result = await db.scalars(stmt)
-    items = list(result.all())
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
-    )
+    base_stmt = organizations_by_activities(activity_ids)
+    stmt = with_details(base_stmt).order_by(Organization.id)
+    return await paginate(db, base_stmt, stmt, pagination)
 
 
 @router.get(
@@ -209,22 +195,46 @@ async def search_by_name(
     db: AsyncSession = db_dep,
     pagination: PageParams = Depends(pagination_dep),
 ):
-    base_stmt = select(Organization).where(Organization.name.ilike(f"%{name}%"))
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
+    base_stmt = organizations_by_name(name)
+    stmt = with_details(base_stmt).order_by(Organization.id)
+    return await paginate(db, base_stmt, stmt, pagination)
 
-    stmt = _with_details(base_stmt).order_by(Organization.id)
-    stmt = stmt.limit(pagination.size).offset((pagination.page - 1) * pagination.size)
-    result = await db.scalars(stmt)
-    items = list(result.all())
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
+
+@router.get(
+    "/search/fuzzy",
+    response_model=PaginatedResponse[OrganizationMatchOut],
+    summary="Нечеткий поиск организации по названию",
+    description=(
+        "Ранжирует организации по триграммному сходству названия с запросом. "
+        "Находит названия с опечатками; регистр, ё/е и й/и не учитываются. "
+        "Каждый элемент содержит оценку релевантности `score` от 0 до 1."
+    ),
+)
+async def fuzzy_search_by_name(
+    q: str = Query(..., min_length=1),
+    min_score: float = Query(0.3, ge=0, le=1),
+    db: AsyncSession = db_dep,
+    pagination: PageParams = Depends(pagination_dep),
+):
+    index = get_fuzzy_index()
+    await index.ensure_fresh(db)
+    matches = index.search(q, min_score)
+
+    start = (pagination.page - 1) * pagination.size
+    page_matches = matches[start:start + pagination.size]
+    result = await db.scalars(
+        with_details(select(Organization).where(Organization.id.in_([match.id for match in page_matches])))
     )
+    organizations = {organization.id: organization for organization in result.all()}
+    items = [
+        OrganizationMatchOut(
+            **OrganizationOut.model_validate(organizations[match.id]).model_dump(),
+            score=match.score,
+        )
+        for match in page_matches
+        if match.id in organizations
+    ]
+    return page_response(items, len(matches), pagination)
 
 
 @router.get(
@@ -239,42 +249,28 @@ async def list_nearby(
     radius_km: float = Query(..., gt=0),
     db: AsyncSession = db_dep,
     pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
 ):
-    # Приблизительный перевод радиуса в градусы широты/долготы для первичного отбора.
-    lat_delta = radius_km / 111
-    lon_delta = radius_km / (111 * max(math.cos(math.radians(lat)), 0.01))
-    base_stmt = (
-        select(Organization)
-        .join(Building)
-        .where(
-            and_(
-                (Building.latitude - lat).between(-lat_delta, lat_delta),
-                (Building.longitude - lon).between(-lon_delta, lon_delta),
-            )
-        )
-    )
-    stmt = _with_details(base_stmt).order_by(Organization.id)
+    if read_model is not None:
+        candidates = read_model.buildings_within(*bounding_box(lat, lon, radius_km))
+        buildings = read_model.buildings_near(lat, lon, radius_km, candidates)
+        return snapshot_page(read_model, "organization", read_model.organizations_in_buildings(buildings), pagination)
+
+    base_stmt = organizations_in_bbox(*bounding_box(lat, lon, radius_km))
+    stmt = with_details(base_stmt).order_by(Organization.id)
     # добавим пагинацию к результату.
     result = await db.scalars(stmt)
     candidates = result.all()
     filtered = [
         org
         for org in candidates
-        if _haversine_km(lat, lon, org.building.latitude, org.building.longitude) <= radius_km
+        if haversine_km(lat, lon, org.building.latitude, org.building.longitude) <= radius_km
     ]
     
-    total = len(filtered)
     start = (pagination.page - 1) * pagination.size
     end = start + pagination.size
-    items = filtered[start:end]
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
-    )
+    # Кандидаты уже отфильтрованы в памяти, поэтому total всегда точный и бесплатный.
+    return page_response(filtered[start:end], len(filtered), pagination)
 
 
 @router.get(
@@ -290,35 +286,125 @@ async def list_within_rect(
     max_lon: float = Query(...),
     db: AsyncSession = db_dep,
     pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
 ):
-    base_stmt = (
-        select(Organization)
-        .join(Building)
-        .where(
-            and_(
-                Building.latitude >= min_lat,
-                Building.longitude >= min_lon,
-                Building.latitude <= max_lat,
-                Building.longitude <= max_lon,
-            )
-        )
-    )
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
+    if read_model is not None:
+        buildings = read_model.buildings_within(min_lat, max_lat, min_lon, max_lon)
+        return snapshot_page(read_model, "organization", read_model.organizations_in_buildings(buildings), pagination)
 
-    stmt = _with_details(base_stmt).order_by(Organization.id)
-    stmt = stmt.limit(pagination.size).offset((pagination.page - 1) * pagination.size)
-    result = await db.scalars(stmt)
-    items = list(result.all())
-
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=pagination.page,
-        size=pagination.size,
-        pages=math.ceil(total / pagination.size) if total > 0 else 0,
+    base_stmt = organizations_in_bbox(min_lat, max_lat, min_lon, max_lon)
+    stmt = with_details(base_stmt).order_by(Organization.id)
+    return await paginate(db, base_stmt, stmt, pagination)
+
+
+@router.post(
+    "/within-polygon",
+    response_model=PaginatedResponse[OrganizationOut],
+    summary="Организации в полигоне",
+    description=(
+        "Принимает GeoJSON Polygon (координаты [долгота, широта], первое кольцо внешнее, остальные — дыры) "
+        "и возвращает организации, чьи здания попадают внутрь. Кандидаты отбираются в БД по рамке полигона, "
+        "затем точно проверяются на попадание."
+    ),
+)
+async def list_within_polygon(
+    polygon: PolygonGeometry,
+    db: AsyncSession = db_dep,
+    pagination: PageParams = Depends(pagination_dep),
+    read_model: Snapshot | None = read_model_dep,
+):
+    if read_model is not None:
+        buildings = read_model.buildings_in_polygon(polygon.coordinates)
+        return snapshot_page(read_model, "organization", read_model.organizations_in_buildings(buildings), pagination)
+
+    result = await db.execute(organization_coordinates_in_bbox(*polygon.bounds))
+    rows = result.all()
+    if not rows:
+        return page_response([], 0, pagination)
+    ids, lats, lons = (np.array(column) for column in zip(*rows))
+    matched = ids[points_in_polygon(lats, lons, polygon.coordinates)]
+
+    start = (pagination.page - 1) * pagination.size
+    page_ids = matched[start:start + pagination.size].tolist()
+    organizations = await db.scalars(
+        with_details(select(Organization).where(Organization.id.in_(page_ids))).order_by(Organization.id)
+    )
+    return page_response(list(organizations.all()), len(matched), pagination)
+
+
+@router.post(
+    "/nearest",
+    response_model=list[NearestOrganizationsOut],
+    summary="Ближайшие организации для набора точек",
+    description=(
+        "Для каждой точки из `points` (до 1000) возвращает `k` ближайших организаций, отсортированных по расстоянию. "
+        "Можно ограничить видом деятельности (`activity_id`, с вложенными уровнями при `include_children`) "
+        "и предельным расстоянием `max_distance_km`. Ответ — список в порядке точек запроса."
+    ),
+)
+async def nearest_organizations(
+    query: NearestQuery,
+    db: AsyncSession = db_dep,
+):
+    activity_ids = None
+    if query.activity_id is not None:
+        activity_ids = await _activity_descendants(db, query.activity_id)
+        if not activity_ids:
+            raise ActivityNotFound()
+        if not query.include_children:
+            activity_ids = [query.activity_id]
+
+    # Координаты кандидатов читаются один раз на весь пакет, расстояния считаются матрицей «точки x кандидаты».
+    rows = (await db.execute(organization_coordinates(activity_ids))).all()
+    ids, lats, lons = (np.array(column) for column in zip(*rows)) if rows else (np.empty(0),) * 3
+    nearest = k_nearest(
+        np.array([point.lat for point in query.points]),
+        np.array([point.lon for point in query.points]),
+        lats,
+        lons,
+        query.k,
+        query.max_distance_km,
     )
 
+    # Карточки — одним запросом для всех точек: соседние точки маршрута часто делят организации.
+    selected = {int(ids[index]) for indexes, _ in nearest for index in indexes}
+    organizations = {}
+    if selected:
+        result = await db.scalars(with_details(select(Organization).where(Organization.id.in_(selected))))
+        organizations = {
+            organization.id: OrganizationOut.model_validate(organization).model_dump() for organization in result.all()
+        }
+    return [
+        NearestOrganizationsOut(
+            point=point,
+            items=[
+                OrganizationDistanceOut(**organizations[int(ids[index])], distance_km=round(float(distance_km), 3))
+                for index, distance_km in zip(indexes, distances)
+            ],
+        )
+        for point, (indexes, distances) in zip(query.points, nearest)
+    ]
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkResult,
+    dependencies=[Depends(verify_write_api_key)],
+    summary="Пакетное изменение организаций",
+    description=(
+        "Создает, обновляет (по `id`) и удаляет до 1000 организаций за запрос вместе с телефонами и видами деятельности. "
+        "Пакет выполняется в одной транзакции; при ошибке валидации не применяется ничего. "
+        "Нужен ключ из `WRITE_API_KEYS`, ключ только для чтения получает 403."
+    ),
+)
+async def bulk_upsert_organizations(
+    payload: BulkRequest[OrganizationIn],
+    db: AsyncSession = db_dep,
+):
+    result = await bulk_organizations(db, payload)
+    await db.commit()
+    return result
+
 
 @router.get(
     "/{organization_id}",
@@ -326,8 +412,18 @@ async def list_within_rect(
     summary="Информация об организации",
     description="Возвращает карточку организации по идентификатору.",
 )
-async def get_organization(organization_id: int, db: AsyncSession = db_dep):
-    stmt = _with_details(select(Organization).where(Organization.id == organization_id))
+async def get_organization(
+    organization_id: int,
+    db: AsyncSession = db_dep,
+    read_model: Snapshot | None = read_model_dep,
+):
+    if read_model is not None:
+        index = read_model.organization_index(organization_id)
+        if index is None:
+            raise OrganizationNotFound()
+        return Response(content=read_model.record("organization", index), media_type="application/json")
+
+    stmt = with_details(select(Organization).where(Organization.id == organization_id))
     result = await db.scalars(stmt)
     organization = result.first()
     if not organization:
@@ -0,0 +1,86 @@
+import json
+import math
+from typing import Any
+
+from fastapi import Response
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.explain import explain_plan, is_postgresql
+from app.read_model.snapshot import Snapshot
+from app.schemas.common import CountMode, PageParams, PaginatedResponse
+
+
+def page_response(
+    items: list[Any],
+    total: int | None,
+    pagination: PageParams,
+    *,
+    total_is_estimate: bool = False,
+    has_next: bool | None = None,
+) -> PaginatedResponse:
+    if has_next is None and total is not None:
+        has_next = pagination.page * pagination.size < total
+    pages = None
+    if total is not None:
+        pages = math.ceil(total / pagination.size) if total > 0 else 0
+    return PaginatedResponse(
+        items=items,
+        total=total,
+        page=pagination.page,
+        size=pagination.size,
+        pages=pages,
+        total_is_estimate=total_is_estimate,
+        has_next=has_next,
+    )
+
+
+def snapshot_page(snapshot: Snapshot, kind: str, indexes: list[int], pagination: PageParams) -> Response:
+    # Элементы в снимке уже сериализованы: страница собирается из готовых байтов без повторной валидации.
+    start = (pagination.page - 1) * pagination.size
+    records = [snapshot.record(kind, index) for index in indexes[start:start + pagination.size]]
+    meta = page_response([], len(indexes), pagination).model_dump(mode="json", exclude={"items"})
+    body = b'{"items":[' + b",".join(records) + b"]," + json.dumps(meta, separators=(",", ":")).encode()[1:]
+    return Response(content=body, media_type="application/json")
+
+
+async def count_total(db: AsyncSession, base_stmt: Select, mode: CountMode) -> tuple[int | None, bool]:
+    if mode is CountMode.none:
+        return None, False
+    if mode is CountMode.exact:
+        return await db.scalar(select(func.count()).select_from(base_stmt.subquery())) or 0, False
+
+    # Считаем не дальше порога: при большем числе строк точный count стоит как полный проход.
+    cap = get_settings().COUNT_ESTIMATE_CAP
+    capped_stmt = select(func.count()).select_from(base_stmt.limit(cap + 1).subquery())
+    capped = await db.scalar(capped_stmt) or 0
+    if capped <= cap:
+        return capped, False
+    if is_postgresql(db):
+        plan = await explain_plan(db, base_stmt)
+        return max(int(plan["Plan"]["Plan Rows"]), capped), True
+    return capped, True
+
+
+async def paginate(
+    db: AsyncSession,
+    base_stmt: Select,
+    stmt: Select,
+    pagination: PageParams,
+    *,
+    scalars: bool = True,
+) -> PaginatedResponse:
+    offset = (pagination.page - 1) * pagination.size
+    # Лишняя строка показывает, есть ли следующая страница, без отдельного count.
+    page_stmt = stmt.limit(pagination.size + 1).offset(offset)
+    result = await (db.scalars(page_stmt) if scalars else db.execute(page_stmt))
+    items = list(result.all())
+    has_next = len(items) > pagination.size
+    items = items[: pagination.size]
+    if not has_next and (items or pagination.page == 1):
+        # Последняя страница: итог известен без count.
+        return page_response(items, offset + len(items), pagination, has_next=False)
+
+    total, total_is_estimate = await count_total(db, base_stmt, pagination.count)
+    return page_response(items, total, pagination, total_is_estimate=total_is_estimate, has_next=has_next)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+
+from app.core.metrics import get_metrics
+from app.routers.deps import verify_api_key
+
+router = APIRouter(dependencies=[Depends(verify_api_key)])
+
+
+@router.get("/")
+def root():
+    return {"message": "Organizations Directory API"}
+
+
+@router.get(
+    "/health",
+    summary="Проверка доступности",
+    description="Возвращает статус сервиса при корректном API ключе.",
+)
+def health_check():
+    return {"status": "ok"}
+
+
+@router.get(
+    "/metrics",
+    summary="Счетчики воркера",
+    description="Возвращает внутренние счетчики текущего процесса (например, число объединенных запросов).",
+)
+def metrics():
+    return get_metrics().snapshot()
@@ -7,4 +7,16 @@ class ActivityOut(BaseModel):
     id: int
     name: str
     parent_id: int | None
-    depth: int
\ No newline at end of file
+    depth: int
+
+
+class ActivityTreeOut(ActivityOut):
+    organizations_count: int
+    # Организации всего поддерева; организация с несколькими его видами деятельности учитывается один раз.
+    total_organizations_count: int
+    children: list["ActivityTreeOut"]
+
+
+class ActivityDetailOut(ActivityTreeOut):
+    # От корня до непосредственного родителя.
+    parents: list[ActivityOut]
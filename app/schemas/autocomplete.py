@@ -0,0 +1,11 @@
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SuggestionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    kind: Literal["organization", "activity"]
+    id: int
+    name: str
@@ -0,0 +1,42 @@
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel, Field, field_validator
+
+# Пакет принимает только маршруты чтения; сам /batch, выгрузки и запись сюда не входят.
+BATCH_PATH_PREFIXES = ("/organizations", "/buildings", "/activities", "/autocomplete", "/changes")
+
+
+class BatchMode(str, Enum):
+    sequential = "sequential"
+    concurrent = "concurrent"
+
+
+class SubRequest(BaseModel):
+    id: str | None = Field(None, description="Client label echoed in the response")
+    path: str = Field(..., description="Path with query string of a read route, e.g. /buildings?page=2")
+    if_none_match: str | None = Field(None, description="ETag for a conditional sub-request")
+
+    @field_validator("path")
+    @classmethod
+    def check_path(cls, path: str) -> str:
+        route = path.partition("?")[0]
+        if not any(route == prefix or route.startswith(f"{prefix}/") for prefix in BATCH_PATH_PREFIXES):
+            raise ValueError(f"Only read routes under {', '.join(BATCH_PATH_PREFIXES)} can be batched")
+        return path
+
+
+class BatchRequest(BaseModel):
+    mode: BatchMode = BatchMode.sequential
+    requests: list[SubRequest] = Field(..., min_length=1)
+
+
+class SubResponse(BaseModel):
+    id: str | None = None
+    status: int
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: list[SubResponse]
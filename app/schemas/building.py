@@ -7,4 +7,18 @@ class BuildingOut(BaseModel):
     id: int
     address: str
     latitude: float
-    longitude: float
\ No newline at end of file
+    longitude: float
+
+class ActivityCountOut(BaseModel):
+    activity_id: int
+    name: str
+    organizations_count: int
+
+
+class BuildingStatsOut(BuildingOut):
+    organizations_count: int
+    activities: list[ActivityCountOut] | None = None
+
+
+class BuildingDistanceOut(BuildingStatsOut):
+    distance_km: float
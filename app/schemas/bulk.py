@@ -0,0 +1,41 @@
+from typing import Annotated, Generic, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+BULK_MAX_ITEMS = 1000
+
+PhoneNumber = Annotated[str, Field(min_length=1, max_length=32)]
+
+
+class BuildingIn(BaseModel):
+    id: int | None = Field(None, ge=1)
+    address: str = Field(..., min_length=1, max_length=255)
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+class ActivityIn(BaseModel):
+    id: int | None = Field(None, ge=1)
+    name: str = Field(..., min_length=1, max_length=255)
+    parent_id: int | None = Field(None, ge=1)
+
+
+class OrganizationIn(BaseModel):
+    id: int | None = Field(None, ge=1)
+    name: str = Field(..., min_length=1, max_length=255)
+    building_id: int = Field(..., ge=1)
+    phones: list[PhoneNumber] = Field(default_factory=list, max_length=20)
+    activity_ids: list[int] = Field(default_factory=list)
+
+
+class BulkRequest(BaseModel, Generic[T]):
+    upsert: list[T] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    delete: list[int] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+
+
+class BulkResult(BaseModel):
+    created: list[int] = []
+    updated: list[int] = []
+    deleted: list[int] = []
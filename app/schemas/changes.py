@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict
+
+T = TypeVar("T")
+
+
+class BuildingSyncOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    address: str
+    latitude: float
+    longitude: float
+    updated_at: datetime
+
+
+class ActivitySyncOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    parent_id: int | None
+    depth: int
+    updated_at: datetime
+
+
+class OrganizationSyncOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    building_id: int
+    activity_ids: list[int]
+    updated_at: datetime
+
+
+class PhoneSyncOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    number: str
+    organization_id: int
+    updated_at: datetime
+
+
+class EntityChanges(BaseModel, Generic[T]):
+    upserted: list[T] = []
+    deleted: list[int] = []
+
+
+class ChangesOut(BaseModel):
+    since: int
+    next_token: int
+    has_more: bool
+    buildings: EntityChanges[BuildingSyncOut]
+    activities: EntityChanges[ActivitySyncOut]
+    organizations: EntityChanges[OrganizationSyncOut]
+    phones: EntityChanges[PhoneSyncOut]
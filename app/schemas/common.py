@@ -1,15 +1,24 @@
+from enum import Enum
 from typing import Generic, TypeVar
 from pydantic import BaseModel, Field
 
 T = TypeVar("T")
 
+class CountMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+    none = "none"
+
 class PageParams(BaseModel):
     page: int = Field(1, ge=1, description="Page number")
     size: int = Field(10, ge=1, le=100, description="Items per page")
+    count: CountMode = Field(CountMode.exact, description="How to compute total")
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: list[T]
-    total: int
+    total: int | None
     page: int
     size: int
-    pages: int
+    pages: int | None
+    total_is_estimate: bool = False
+    has_next: bool | None = None
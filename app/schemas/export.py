@@ -0,0 +1,63 @@
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ExportEntity(str, Enum):
+    organizations = "organizations"
+    buildings = "buildings"
+    activities = "activities"
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class ExportStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ExportCreate(BaseModel):
+    entity: ExportEntity = ExportEntity.organizations
+    format: ExportFormat = ExportFormat.ndjson
+    activity_id: int | None = Field(None, ge=1, description="Only organizations of this activity and its subtree")
+    min_lat: float | None = None
+    max_lat: float | None = None
+    min_lon: float | None = None
+    max_lon: float | None = None
+
+    @model_validator(mode="after")
+    def check_filters(self) -> "ExportCreate":
+        bounds = (self.min_lat, self.max_lat, self.min_lon, self.max_lon)
+        if any(value is not None for value in bounds) and any(value is None for value in bounds):
+            raise ValueError("Region requires min_lat, max_lat, min_lon and max_lon")
+        if self.activity_id is not None and self.entity is not ExportEntity.organizations:
+            raise ValueError("activity_id applies only to organizations")
+        if self.entity is ExportEntity.activities and bounds[0] is not None:
+            raise ValueError("Region does not apply to activities")
+        return self
+
+    @property
+    def region(self) -> tuple[float, float, float, float] | None:
+        if self.min_lat is None:
+            return None
+        return self.min_lat, self.max_lat, self.min_lon, self.max_lon
+
+
+class ExportJobOut(BaseModel):
+    id: str
+    status: ExportStatus
+    request: ExportCreate
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    rows_total: int | None = None
+    rows_written: int = 0
+    progress: float = 0.0
+    size_bytes: int | None = None
+    error: str | None = None
@@ -0,0 +1,52 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.geo import polygon_bounds
+
+# Ограничение на число вершин: проверка попадания линейна по ребрам для каждого кандидата.
+MAX_POLYGON_VERTICES = 10_000
+# Матрица расстояний растет как «точки x кандидаты».
+MAX_NEAREST_POINTS = 1_000
+MAX_NEAREST_K = 50
+
+
+class PolygonGeometry(BaseModel):
+    type: Literal["Polygon"]
+    coordinates: list[list[tuple[float, float]]] = Field(
+        ...,
+        min_length=1,
+        description="GeoJSON rings of [longitude, latitude]: the outer ring first, then holes",
+    )
+
+    @field_validator("coordinates")
+    @classmethod
+    def check_rings(cls, rings: list[list[tuple[float, float]]]) -> list[list[tuple[float, float]]]:
+        if sum(len(ring) for ring in rings) > MAX_POLYGON_VERTICES:
+            raise ValueError(f"Polygon must have at most {MAX_POLYGON_VERTICES} vertices")
+        for ring in rings:
+            if len(ring) < 4:
+                raise ValueError("Polygon ring must have at least 4 positions")
+            if ring[0] != ring[-1]:
+                raise ValueError("Polygon ring must be closed (first and last positions equal)")
+            for lon, lat in ring:
+                if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+                    raise ValueError("Polygon position is out of range")
+        return rings
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        return polygon_bounds(self.coordinates)
+
+
+class GeoPoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+
+class NearestQuery(BaseModel):
+    points: list[GeoPoint] = Field(..., min_length=1, max_length=MAX_NEAREST_POINTS)
+    k: int = Field(5, ge=1, le=MAX_NEAREST_K, description="Organizations per point")
+    activity_id: int | None = Field(None, ge=1, description="Only organizations of this activity")
+    include_children: bool = Field(True, description="Also match nested activities of activity_id")
+    max_distance_km: float | None = Field(None, gt=0, description="Skip organizations farther than this")
@@ -2,6 +2,7 @@ from pydantic import BaseModel, ConfigDict
 
 from app.schemas.activity import ActivityOut
 from app.schemas.building import BuildingOut
+from app.schemas.geo import GeoPoint
 from app.schemas.phone import PhoneOut
 
 
@@ -12,4 +13,20 @@ class OrganizationOut(BaseModel):
     name: str
     building: BuildingOut
     phones: list[PhoneOut]
-    activities: list[ActivityOut]
\ No newline at end of file
+    activities: list[ActivityOut]
+
+class OrganizationMatchOut(OrganizationOut):
+    score: float
+
+
+class OrganizationDistanceOut(OrganizationOut):
+    distance_km: float
+
+
+class NearestOrganizationsOut(BaseModel):
+    point: GeoPoint
+    items: list[OrganizationDistanceOut]
+
+
+class BuildingMatchOut(BuildingOut):
+    organizations: list[OrganizationOut] | None = None
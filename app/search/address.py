@@ -0,0 +1,114 @@
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.data_version import DataChange, get_data_version
+from app.models.building import Building
+from app.search.base import VersionedIndex
+from app.search.normalize import address_tokens, address_word_expansion
+
+
+class TokenIndex:
+    # Инвертированный индекс слов адреса: запрос пересекает списки зданий своих слов,
+    # начиная с самого короткого, и не просматривает весь справочник, как ILIKE '%...%'.
+    def __init__(self) -> None:
+        self._postings: dict[str, set[int]] = {}
+        self._entries: dict[int, frozenset[str]] = {}
+        # Отсортированный словарь для поиска последнего слова запроса по префиксу.
+        self._vocabulary: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entity_id: int, address: str) -> None:
+        self.remove(entity_id)
+        tokens = frozenset(address_tokens(address))
+        self._entries[entity_id] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                insort(self._vocabulary, token)
+            postings.add(entity_id)
+
+    def remove(self, entity_id: int) -> None:
+        tokens = self._entries.pop(entity_id, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(entity_id)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def search(self, query: str, prefix: bool = False) -> list[int]:
+        tokens = address_tokens(query, prefix)
+        if not tokens:
+            return []
+        exact = list(dict.fromkeys(tokens[:-1] if prefix else tokens))
+        candidates = [self._postings.get(token, set()) for token in exact]
+        if prefix:
+            partial = tokens[-1]
+            postings = self._prefix_postings(partial)
+            expansion = address_word_expansion(partial)
+            if expansion is not None:
+                postings |= self._postings.get(expansion, set())
+            candidates.append(postings)
+        candidates.sort(key=len)
+        found = set(candidates[0])
+        for postings in candidates[1:]:
+            if not found:
+                break
+            found &= postings
+        return sorted(found)
+
+    def _prefix_postings(self, prefix: str) -> set[int]:
+        result: set[int] = set()
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            result.update(self._postings[self._vocabulary[position]])
+            position += 1
+        return result
+
+
+class BuildingAddressIndex(VersionedIndex):
+    tables = frozenset({"buildings"})
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._index = TokenIndex()
+
+    def search(self, query: str, prefix: bool = False) -> list[int]:
+        return self._index.search(query, prefix)
+
+    async def _load(self, session: AsyncSession) -> None:
+        index = TokenIndex()
+        result = await session.execute(select(Building.id, Building.address))
+        for entity_id, address in result.all():
+            index.add(entity_id, address)
+        self._index = index
+
+    def _apply(self, change: DataChange) -> bool:
+        rows = [row for row in change.rows if row.table == "buildings"]
+        if not rows:
+            return False
+        for row in rows:
+            if row.op == "delete":
+                self._index.remove(row.id)
+            elif row.values.get("address") is not None:
+                self._index.add(row.id, row.values["address"])
+            else:
+                return False
+        return True
+
+
+@lru_cache(maxsize=1)
+def get_address_index() -> BuildingAddressIndex:
+    index = BuildingAddressIndex()
+    get_data_version().subscribe(index.apply_change)
+    return index
@@ -0,0 +1,135 @@
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Literal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.data_version import DataChange, get_data_version
+from app.models.activity import Activity
+from app.models.organization import Organization
+from app.search.base import VersionedIndex
+from app.search.normalize import normalize_text
+
+SuggestionKind = Literal["organization", "activity"]
+
+_TABLE_KINDS: dict[str, SuggestionKind] = {"organizations": "organization", "activities": "activity"}
+INDEXED_TABLES = frozenset(_TABLE_KINDS)
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    kind: SuggestionKind
+    id: int
+    name: str
+
+
+class PrefixIndex:
+    # Отсортированные ключи + bisect: поиск префикса O(log n + k) без обхода всех строк.
+    # В _names лежат полные названия, в _words — хвосты названий с начала каждого слова,
+    # чтобы «каф» находил и «Кафе у дома», и «Арбат Кафе».
+    def __init__(self) -> None:
+        self._names: list[tuple[str, str, int]] = []
+        self._words: list[tuple[str, str, int]] = []
+        self._entries: dict[tuple[str, int], Suggestion] = {}
+
+    @classmethod
+    def build(cls, entries: list[Suggestion]) -> "PrefixIndex":
+        # Полная сборка: одна сортировка вместо insort на каждую строку.
+        index = cls()
+        for entry in entries:
+            index._entries[(entry.kind, entry.id)] = entry
+            index._names.append((normalize_text(entry.name), entry.kind, entry.id))
+            index._words.extend((key, entry.kind, entry.id) for key in cls._word_keys(entry.name))
+        index._names.sort()
+        index._words.sort()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, kind: SuggestionKind, entity_id: int, name: str) -> None:
+        self.remove(kind, entity_id)
+        self._entries[(kind, entity_id)] = Suggestion(kind=kind, id=entity_id, name=name)
+        for key in self._word_keys(name):
+            insort(self._words, (key, kind, entity_id))
+        insort(self._names, (normalize_text(name), kind, entity_id))
+
+    def remove(self, kind: SuggestionKind, entity_id: int) -> None:
+        entry = self._entries.pop((kind, entity_id), None)
+        if entry is None:
+            return
+        self._discard(self._names, (normalize_text(entry.name), kind, entity_id))
+        for key in self._word_keys(entry.name):
+            self._discard(self._words, (key, kind, entity_id))
+
+    def search(self, query: str, limit: int, kind: SuggestionKind | None = None) -> list[Suggestion]:
+        prefix = normalize_text(query)
+        if not prefix:
+            return []
+        found: list[Suggestion] = []
+        seen: set[tuple[str, int]] = set()
+        # Сначала совпадения с начала названия, затем — с начала любого слова.
+        for keys in (self._names, self._words):
+            position = bisect_left(keys, (prefix,))
+            while position < len(keys) and len(found) < limit:
+                key, entry_kind, entity_id = keys[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if (kind is not None and entry_kind != kind) or (entry_kind, entity_id) in seen:
+                    continue
+                seen.add((entry_kind, entity_id))
+                found.append(self._entries[(entry_kind, entity_id)])
+        return found
+
+    @staticmethod
+    def _word_keys(name: str) -> list[str]:
+        words = normalize_text(name).split()
+        return [" ".join(words[index:]) for index in range(1, len(words))]
+
+    @staticmethod
+    def _discard(keys: list[tuple[str, str, int]], key: tuple[str, str, int]) -> None:
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+
+
+class AutocompleteIndex(VersionedIndex):
+    tables = INDEXED_TABLES
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._index = PrefixIndex()
+
+    def search(self, query: str, limit: int, kind: SuggestionKind | None = None) -> list[Suggestion]:
+        return self._index.search(query, limit, kind)
+
+    async def _load(self, session: AsyncSession) -> None:
+        entries: list[Suggestion] = []
+        for kind, model in (("organization", Organization), ("activity", Activity)):
+            result = await session.execute(select(model.id, model.name))
+            entries.extend(Suggestion(kind=kind, id=entity_id, name=name) for entity_id, name in result.all())
+        self._index = PrefixIndex.build(entries)
+
+    def _apply(self, change: DataChange) -> bool:
+        rows = [row for row in change.rows if row.table in _TABLE_KINDS]
+        if not rows:
+            return False
+        for row in rows:
+            kind = _TABLE_KINDS[row.table]
+            if row.op == "delete":
+                self._index.remove(kind, row.id)
+            elif row.values.get("name") is not None:
+                self._index.add(kind, row.id, row.values["name"])
+            else:
+                return False
+        return True
+
+
+@lru_cache(maxsize=1)
+def get_autocomplete_index() -> AutocompleteIndex:
+    index = AutocompleteIndex()
+    get_data_version().subscribe(index.apply_change)
+    return index
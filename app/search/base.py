@@ -0,0 +1,52 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.data_version import DataChange, get_data_version
+
+
+class VersionedIndex(ABC):
+    # Общий жизненный цикл in-memory индексов: сборка из БД при первом запросе, точечное обновление
+    # по событиям записи в этом процессе и полная перестройка, если версия данных ушла вперед без события
+    # (запись в другом воркере) или событие не содержит нужных подробностей.
+    tables: frozenset[str] = frozenset()
+
+    def __init__(self) -> None:
+        self._version: int | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int | None:
+        return self._version
+
+    def is_fresh(self) -> bool:
+        return self._version is not None and self._version == get_data_version().current()
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        if self.is_fresh():
+            return
+        async with self._lock:
+            if not self.is_fresh():
+                await self.rebuild(session)
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        version = get_data_version().current()
+        await self._load(session)
+        self._version = version
+
+    def apply_change(self, change: DataChange) -> None:
+        if self._version != change.previous_version:
+            self._version = None
+            return
+        if change.tables.intersection(self.tables) and not self._apply(change):
+            self._version = None
+            return
+        self._version = change.version
+
+    @abstractmethod
+    async def _load(self, session: AsyncSession) -> None: ...
+
+    def _apply(self, change: DataChange) -> bool:
+        # Возвращает False, если изменение нельзя применить точечно.
+        return False
@@ -0,0 +1,115 @@
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.data_version import DataChange, get_data_version
+from app.models.organization import Organization
+from app.search.base import VersionedIndex
+from app.search.normalize import fold_for_fuzzy
+
+
+def trigrams(value: str) -> set[str]:
+    # Как в pg_trgm: каждое слово дополняется двумя пробелами слева и одним справа.
+    result: set[str] = set()
+    for word in fold_for_fuzzy(value).split():
+        padded = f"  {word} "
+        result.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return result
+
+
+@dataclass(frozen=True)
+class FuzzyMatch:
+    id: int
+    name: str
+    score: float
+
+
+class TrigramIndex:
+    # Инвертированный индекс триграмм: кандидаты берутся только из списков триграмм запроса,
+    # поэтому стоимость поиска зависит от числа совпадений, а не от размера справочника.
+    def __init__(self) -> None:
+        self._postings: dict[str, set[int]] = {}
+        self._entries: dict[int, tuple[str, frozenset[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entity_id: int, name: str) -> None:
+        self.remove(entity_id)
+        grams = frozenset(trigrams(name))
+        self._entries[entity_id] = (name, grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(entity_id)
+
+    def remove(self, entity_id: int) -> None:
+        entry = self._entries.pop(entity_id, None)
+        if entry is None:
+            return
+        for gram in entry[1]:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(entity_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def search(self, query: str, min_score: float) -> list[FuzzyMatch]:
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        shared: Counter[int] = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+
+        matches = []
+        for entity_id, common in shared.items():
+            name, grams = self._entries[entity_id]
+            # Сходство всей строки (как similarity в pg_trgm) и доля триграмм запроса в названии:
+            # вторая часть не штрафует короткий запрос по длинному названию («кафе» в «Арбат Кафе»).
+            similarity = common / (len(query_grams) + len(grams) - common)
+            containment = common / len(query_grams)
+            score = round((similarity + containment) / 2, 4)
+            if score >= min_score:
+                matches.append(FuzzyMatch(id=entity_id, name=name, score=score))
+        matches.sort(key=lambda match: (-match.score, match.name, match.id))
+        return matches
+
+
+class FuzzyOrganizationIndex(VersionedIndex):
+    tables = frozenset({"organizations"})
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._index = TrigramIndex()
+
+    def search(self, query: str, min_score: float) -> list[FuzzyMatch]:
+        return self._index.search(query, min_score)
+
+    async def _load(self, session: AsyncSession) -> None:
+        index = TrigramIndex()
+        result = await session.execute(select(Organization.id, Organization.name))
+        for entity_id, name in result.all():
+            index.add(entity_id, name)
+        self._index = index
+
+    def _apply(self, change: DataChange) -> bool:
+        rows = [row for row in change.rows if row.table == "organizations"]
+        if not rows:
+            return False
+        for row in rows:
+            if row.op == "delete":
+                self._index.remove(row.id)
+            elif row.values.get("name") is not None:
+                self._index.add(row.id, row.values["name"])
+            else:
+                return False
+        return True
+
+
+@lru_cache(maxsize=1)
+def get_fuzzy_index() -> FuzzyOrganizationIndex:
+    index = FuzzyOrganizationIndex()
+    get_data_version().subscribe(index.apply_change)
+    return index
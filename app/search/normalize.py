@@ -0,0 +1,110 @@
+import re
+
+_NON_WORD_PATTERN = re.compile(r"[^\w]+")
+_NON_DIGIT_PATTERN = re.compile(r"\D+")
+
+
+def normalize_text(value: str) -> str:
+    # casefold + ё→е: «Ёлка», «ёлка» и «елка» считаются одной строкой.
+    value = value.casefold().replace("ё", "е")
+    return " ".join(_NON_WORD_PATTERN.sub(" ", value).split())
+
+
+def tokenize(value: str) -> list[str]:
+    return normalize_text(value).split()
+
+
+def normalize_phone(value: str) -> str:
+    # «8-923-666-13-13», «8 (923) 666 13 13» и «89236661313» хранятся и ищутся одинаково.
+    return _NON_DIGIT_PATTERN.sub("", value)
+
+
+def phone_variants(digits: str) -> list[str]:
+    # Российский номер записывают и через 8, и через +7: точный поиск проверяет обе формы.
+    if len(digits) == 11 and digits[0] in "78":
+        return sorted({f"7{digits[1:]}", f"8{digits[1:]}"})
+    return [digits]
+
+
+# Латинские буквы, которые выглядят как кириллические: «Kафе» с латинской K встречается в реальных данных.
+_LATIN_TO_CYRILLIC = str.maketrans("aceiopxyk", "асеіорхук")
+_CYRILLIC_FOLD = str.maketrans({"й": "и", "ъ": None, "ь": None, "і": "и"})
+_CYRILLIC_PATTERN = re.compile(r"[а-я]")
+
+
+def fold_for_fuzzy(value: str) -> str:
+    # Для нечеткого поиска дополнительно сглаживаем частые опечатки: й/и, твердый и мягкий знаки,
+    # латинские двойники в кириллических словах.
+    words = []
+    for word in normalize_text(value).split():
+        if _CYRILLIC_PATTERN.search(word):
+            word = word.translate(_LATIN_TO_CYRILLIC)
+        words.append(word.translate(_CYRILLIC_FOLD))
+    return " ".join(word for word in words if word)
+
+
+# Адреса пишут по-разному: «ул. Ленина» и «улица Ленина», «Невский пр.» и «Невский проспект», «СПб» и
+# «Санкт-Петербург». Ключи — последовательности слов после normalize_text («пр-т» превращается в «пр т»).
+_ADDRESS_PHRASES: dict[tuple[str, ...], str] = {
+    ("ул",): "улица",
+    ("пр",): "проспект",
+    ("пр", "т"): "проспект",
+    ("пр", "кт"): "проспект",
+    ("просп",): "проспект",
+    ("пл",): "площадь",
+    ("пер",): "переулок",
+    ("ш",): "шоссе",
+    ("наб",): "набережная",
+    ("б", "р"): "бульвар",
+    ("бул",): "бульвар",
+    ("корп",): "корпус",
+    ("к",): "корпус",
+    ("стр",): "строение",
+    ("sq",): "square",
+    ("st",): "street",
+    ("ave",): "avenue",
+    ("мск",): "москва",
+    ("msk",): "москва",
+    ("moscow",): "москва",
+    ("санкт", "петербург"): "санкт-петербург",
+    ("петербург",): "санкт-петербург",
+    ("спб",): "санкт-петербург",
+    ("питер",): "санкт-петербург",
+    ("spb",): "санкт-петербург",
+    ("saint", "petersburg"): "санкт-петербург",
+    ("st", "petersburg"): "санкт-петербург",
+}
+_ADDRESS_PHRASE_LENGTH = max(len(phrase) for phrase in _ADDRESS_PHRASES)
+# Пометки «г.» и «д.» стоят перед названием города и номером дома и ничего не различают:
+# «Тверская 7» должна находить «ул. Тверская, д. 7».
+_ADDRESS_MARKERS = frozenset({"г", "город", "д", "дом"})
+
+
+def address_tokens(value: str, prefix: bool = False) -> list[str]:
+    # prefix=True — последнее слово недописано: оно остается как есть, без раскрытия сокращений и без удаления
+    # пометок. Иначе «Москва Д» потеряла бы «Д», а «Москва К» превратилась бы в «корпус» вместо «Кутузовский».
+    words = normalize_text(value).split()
+    partial = words.pop() if prefix and words else None
+    tokens = []
+    position = 0
+    while position < len(words):
+        # Самая длинная фраза выигрывает: «st petersburg» — город, а не «street petersburg».
+        for length in range(min(_ADDRESS_PHRASE_LENGTH, len(words) - position), 0, -1):
+            phrase = tuple(words[position:position + length])
+            if phrase in _ADDRESS_PHRASES:
+                tokens.append(_ADDRESS_PHRASES[phrase])
+                position += length
+                break
+        else:
+            if words[position] not in _ADDRESS_MARKERS:
+                tokens.append(words[position])
+            position += 1
+    if partial is not None:
+        tokens.append(partial)
+    return tokens
+
+
+def address_word_expansion(word: str) -> str | None:
+    # Полное слово для дописанного сокращения («спб», «ул»): в режиме префикса последнее слово ищется
+    # и по префиксу, и по раскрытию, чтобы «Невский СПб» находил «Санкт-Петербург».
+    return _ADDRESS_PHRASES.get((word,))
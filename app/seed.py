@@ -3,7 +3,7 @@ import asyncio
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import SessionLocal
+from app.db.session import get_sessionmaker
 from app.models.activity import Activity
 from app.models.building import Building
 from app.models.organization import Organization
@@ -96,7 +96,7 @@ ORGANIZATION_DATA = {
 
 
 async def seed():
-    async with SessionLocal() as db:
+    async with get_sessionmaker()() as db:
         result = await db.scalars(select(Organization.id).limit(1))
         if result.first():
             return
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Замер выполняется в отдельном процессе: в текущем модули уже импортированы и время было бы нулевым.
+_PROBE = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from app.core.config import SettingsBuilder
+lazy = SettingsBuilder.build.cache_info().currsize == 0 and "app.routers.deps" not in sys.modules
+
+application = app.main.create_app()
+created = time.perf_counter()
+
+
+async def first_request():
+    from httpx import ASGITransport, AsyncClient
+
+    async with application.router.lifespan_context(application):
+        transport = ASGITransport(app=application)
+        async with AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            api_key = next(iter(application.state.settings.API_KEYS), "")
+            response = await client.get("/health", headers={"X-API-Key": api_key})
+            return response.status_code, time.perf_counter()
+
+
+status, responded = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": round((imported - started) * 1000, 2),
+    "create_app_ms": round((created - imported) * 1000, 2),
+    "first_request_ms": round((responded - started) * 1000, 2),
+    "first_request_status": status,
+    "lazy_import": lazy,
+}))
+"""
+
+
+def measure(env: dict[str, str] | None = None) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, **(env or {})},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.startup_benchmark",
+        description="Measure import time of app.main and time to the first /health response in a fresh process.",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Number of fresh processes; the median is reported")
+    parser.add_argument("--import-budget-ms", type=float, default=None, help="Fail if import time exceeds this")
+    parser.add_argument(
+        "--first-request-budget-ms", type=float, default=None, help="Fail if time to first response exceeds this"
+    )
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    report = {
+        key: sorted(run[key] for run in runs)[len(runs) // 2]
+        for key in ("import_ms", "create_app_ms", "first_request_ms")
+    }
+    report["first_request_status"] = runs[-1]["first_request_status"]
+    report["lazy_import"] = all(run["lazy_import"] for run in runs)
+    print(json.dumps(report, indent=2))
+
+    failed = not report["lazy_import"]
+    if args.import_budget_ms is not None and report["import_ms"] > args.import_budget_ms:
+        failed = True
+    if args.first_request_budget_ms is not None and report["first_request_ms"] > args.first_request_budget_ms:
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,6 +35,11 @@ if max_workers:
 workers = min(web_concurrency, 4)
 worker_class = "uvicorn.workers.UvicornWorker"
 
+# Версия данных (ETag, индексы, read model) должна быть общей для воркеров: DATA_VERSION_FILE= (пустое значение)
+# оставляет ее в памяти каждого процесса, и воркеры расходятся после первой записи.
+if workers > 1 and os.getenv("DATA_VERSION_FILE") == "":
+    raise RuntimeError("DATA_VERSION_FILE must not be empty when running more than one worker")
+
 # --- Timeouts ---
 timeout = _get_int_env("TIMEOUT", "120")
 keepalive = _get_int_env("KEEP_ALIVE", "10")
@@ -1,17 +1,36 @@
+import os
+
+# До импорта приложения: настройки читаются при его создании. Тесты идут в одном процессе, и каждый начинает
+# с новой версии данных, поэтому общий файл версии им не нужен.
+os.environ.setdefault("DATA_VERSION_FILE", "")
+
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
+from app.core.admission import get_admission_controller
+from app.core.circuit_breaker import get_circuit_breaker
 from app.core.config import get_settings
+from app.core.data_version import get_data_version
+from app.core.metrics import get_metrics
+from app.core.rate_limit import get_rate_limit_backend
+from app.core.stale_cache import get_stale_cache
 from app.db.base import Base
+from app.exports.jobs import get_export_manager
+from app.live.hub import get_live_hub
 from app.main import app
 from app.models.activity import Activity
 from app.models.building import Building
 from app.models.organization import Organization
 from app.models.phone import Phone
+from app.read_model.activity_tree import get_activity_tree_cache
+from app.read_model.store import get_read_model_store
 from app.routers.deps import get_db
+from app.search.address import get_address_index
+from app.search.autocomplete import get_autocomplete_index
+from app.search.fuzzy import get_fuzzy_index
 
 
 @pytest.fixture
@@ -19,6 +38,25 @@ def auth_headers():
     return {"X-API-Key": "test-key"}
 
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # Каждый тест работает с новой БД в памяти, поэтому версия данных и индексы не должны переживать тест.
+    get_data_version.cache_clear()
+    get_autocomplete_index.cache_clear()
+    get_fuzzy_index.cache_clear()
+    get_address_index.cache_clear()
+    get_metrics.cache_clear()
+    get_rate_limit_backend.cache_clear()
+    get_admission_controller.cache_clear()
+    get_read_model_store.cache_clear()
+    get_activity_tree_cache.cache_clear()
+    get_export_manager.cache_clear()
+    get_live_hub.cache_clear()
+    get_circuit_breaker.cache_clear()
+    get_stale_cache.cache_clear()
+    yield
+
+
 @pytest_asyncio.fixture
 async def session_maker():
     engine = create_async_engine(
@@ -50,7 +88,7 @@ async def client(session_maker, dependency_overrides):
 
     def override_get_settings():
         base_settings = get_settings()
-        return base_settings.model_copy(update={"API_KEYS": {"test-key"}})
+        return base_settings.model_copy(update={"API_KEYS": {"test-key"}, "WRITE_API_KEYS": {"test-key"}})
 
     dependency_overrides({get_db: override_get_db, get_settings: override_get_settings})
     transport = ASGITransport(app=app)
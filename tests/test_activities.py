@@ -0,0 +1,109 @@
+import pytest
+
+from app.core.data_version import get_data_version
+from app.models.activity import Activity
+from app.models.building import Building
+from app.read_model import activity_tree
+from app.routers.deps import make_etag
+
+
+def _by_name(nodes):
+    return {node["name"]: node for node in nodes}
+
+
+@pytest.mark.asyncio
+async def test_activity_tree_has_counts_and_depth(client, auth_headers, seed_data):
+    response = await client.get("/activities/tree", headers=auth_headers)
+    assert response.status_code == 200
+    roots = response.json()
+    assert [root["name"] for root in roots] == ["Auto", "Food"]
+
+    food = _by_name(roots)["Food"]
+    assert food["depth"] == 1
+    assert food["parent_id"] is None
+    assert food["organizations_count"] == 0
+    # Horns and Hooves относится и к Meat, и к Dairy, но в поддереве Food считается один раз.
+    assert food["total_organizations_count"] == 8
+
+    children = _by_name(food["children"])
+    assert list(children) == ["Dairy", "Meat"]
+    assert children["Meat"]["depth"] == 2
+    assert children["Meat"]["parent_id"] == food["id"]
+    assert children["Meat"]["organizations_count"] == 4
+    assert children["Dairy"]["total_organizations_count"] == 5
+
+    auto = _by_name(roots)["Auto"]
+    assert (auto["organizations_count"], auto["total_organizations_count"]) == (1, 2)
+    assert _by_name(auto["children"])["Trucks"]["children"] == []
+
+
+@pytest.mark.asyncio
+async def test_get_activity_returns_parents_and_subtree(client, auth_headers, seed_data):
+    activities = seed_data["activities"]
+    response = await client.get(f"/activities/{activities['meat']}", headers=auth_headers)
+    assert response.status_code == 200
+    meat = response.json()
+    assert meat["name"] == "Meat"
+    assert meat["parents"] == [{"id": activities["food"], "name": "Food", "parent_id": None, "depth": 1}]
+    assert meat["children"] == []
+
+    food = (await client.get(f"/activities/{activities['food']}", headers=auth_headers)).json()
+    assert food["parents"] == []
+    assert {child["name"] for child in food["children"]} == {"Meat", "Dairy"}
+
+    response = await client.get("/activities/999999", headers=auth_headers)
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Activity not found"}
+
+
+@pytest.mark.asyncio
+async def test_tree_is_rebuilt_only_when_activities_change(client, auth_headers, seed_data, session_maker, monkeypatch):
+    builds = []
+    build = activity_tree.build_activity_tree
+
+    async def counting_build(session, version):
+        builds.append(version)
+        return await build(session, version)
+
+    monkeypatch.setattr(activity_tree, "build_activity_tree", counting_build)
+
+    response = await client.get("/activities/tree", headers=auth_headers)
+    etag = response.headers["ETag"]
+    await client.get(f"/activities/{seed_data['activities']['meat']}", headers=auth_headers)
+    assert len(builds) == 1
+
+    # Запись здания не касается дерева: ETag прежний, ответ 304 без пересборки.
+    async with session_maker() as session:
+        session.add(Building(address="Moscow, Novaya 5", latitude=55.7, longitude=37.6))
+        await session.commit()
+    response = await client.get("/activities/tree", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert (await client.get("/buildings", headers={**auth_headers, "If-None-Match": etag})).status_code == 200
+
+    async with session_maker() as session:
+        session.add(Activity(name="Bakery", parent_id=seed_data["activities"]["food"], depth=2))
+        await session.commit()
+    response = await client.get("/activities/tree", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "Bakery" in _by_name(_by_name(response.json())["Food"]["children"])
+    assert len(builds) == 2
+
+
+@pytest.mark.asyncio
+async def test_etag_matches_served_tree(client, auth_headers, seed_data, monkeypatch):
+    build = activity_tree.build_activity_tree
+    # Запись видов деятельности между проверкой If-None-Match и чтением кеша.
+    written = []
+
+    async def build_after_write(session, version):
+        if not written:
+            written.append(get_data_version().bump({"activities"}))
+        return await build(session, activity_tree.tree_version())
+
+    monkeypatch.setattr(activity_tree, "build_activity_tree", build_after_write)
+    response = await client.get("/activities/tree", headers=auth_headers)
+    assert response.headers["ETag"] == make_etag(activity_tree.tree_version())
+
+    response = await client.get("/activities/tree", headers={**auth_headers, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
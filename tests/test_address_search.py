@@ -0,0 +1,102 @@
+import pytest
+
+from app.models.building import Building
+from app.search.address import TokenIndex, get_address_index
+from app.search.normalize import address_tokens
+
+
+def test_address_tokens_normalize_abbreviations_and_cities():
+    assert address_tokens("г. Москва, ул. Ленина 1, офис 3") == ["москва", "улица", "ленина", "1", "офис", "3"]
+    assert address_tokens("СПб, Невский пр-т, д. 10") == ["санкт-петербург", "невский", "проспект", "10"]
+    assert address_tokens("St Petersburg, Palace Sq 2") == ["санкт-петербург", "palace", "square", "2"]
+    assert address_tokens("Дворцовая пл., д. 2") == address_tokens("дворцовая площадь 2")
+
+
+def test_token_index_and_query():
+    index = TokenIndex()
+    index.add(1, "г. Москва, ул. Ленина 1, офис 3")
+    index.add(2, "г. Москва, ул. Тверская, д. 7")
+    index.add(3, "г. Санкт-Петербург, Невский пр. 10")
+
+    assert index.search("москва улица") == [1, 2]
+    assert index.search("Мск, Тверская 7") == [2]
+    assert index.search("Питер, Невский проспект") == [3]
+    assert index.search("Москва Невский") == []
+    assert index.search("г.") == []
+    assert index.search("москва твер") == []
+    assert index.search("москва твер", prefix=True) == [2]
+
+    index.remove(2)
+    assert index.search("москва", prefix=True) == [1]
+    assert index.search("тверская") == []
+    assert len(index) == 2
+
+
+def test_prefix_search_keeps_last_word_raw():
+    assert address_tokens("Москва Д", prefix=True) == ["москва", "д"]
+    assert address_tokens("ул. Плющиха, к", prefix=True) == ["улица", "плющиха", "к"]
+
+    index = TokenIndex()
+    index.add(1, "г. Москва, Кутузовский пр., д. 30")
+    index.add(2, "г. Москва, ул. Плющиха, д. 5")
+    index.add(3, "г. Москва, Дмитровское ш., д. 2")
+    index.add(4, "г. Москва, Ленинский пр., д. 1, корп. 2")
+    index.add(5, "г. Санкт-Петербург, Невский пр. 10")
+
+    # Однобуквенный префикс не раскрывается в «корпус» и не отбрасывается как пометка «д.».
+    assert index.search("Москва К", prefix=True) == [1, 4]
+    assert index.search("Москва Д", prefix=True) == [3]
+    assert index.search("Москва П", prefix=True) == [1, 2, 4]
+    # Двухбуквенный: «Пл» — начало «Плющиха», а не «площадь».
+    assert index.search("Москва Пл", prefix=True) == [2]
+    assert index.search("Москва Дм", prefix=True) == [3]
+    assert index.search("Москва Ку", prefix=True) == [1]
+    # Дописанное сокращение ищется и по раскрытию.
+    assert index.search("Невский СПб", prefix=True) == [5]
+    assert index.search("Плющиха ул", prefix=True) == [2]
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint(client, auth_headers, seed_data):
+    response = await client.get("/buildings/search", headers=auth_headers, params={"q": "Moscow Lenina"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["total"] == 1
+    assert payload["items"][0]["id"] == seed_data["buildings"]["b1"]
+    assert payload["items"][0]["organizations"] is None
+
+    response = await client.get(
+        "/buildings/search",
+        headers=auth_headers,
+        params={"q": "SPb square", "include_organizations": "true"},
+    )
+    assert [item["id"] for item in response.json()["items"]] == [seed_data["buildings"]["b8"]]
+    assert response.json()["items"][0]["organizations"] == []
+
+    response = await client.get(
+        "/buildings/search",
+        headers=auth_headers,
+        params={"q": "Питер Nev", "prefix": "true", "include_organizations": "true"},
+    )
+    (item,) = response.json()["items"]
+    assert item["id"] == seed_data["buildings"]["b3"]
+    assert [organization["name"] for organization in item["organizations"]] == ["AutoWorld"]
+
+
+@pytest.mark.asyncio
+async def test_search_follows_writes(client, auth_headers, seed_data, session_maker):
+    await client.get("/buildings/search", headers=auth_headers, params={"q": "moscow"})
+    index = get_address_index()
+    assert index.is_fresh()
+
+    async with session_maker() as session:
+        building = await session.get(Building, seed_data["buildings"]["b4"])
+        building.address = "г. Москва, ул. Тверская, д. 9"
+        await session.commit()
+
+    # Индекс обновлен событием записи без полной перестройки.
+    assert index.is_fresh()
+    response = await client.get("/buildings/search", headers=auth_headers, params={"q": "тверская 9"})
+    assert [item["id"] for item in response.json()["items"]] == [seed_data["buildings"]["b4"]]
+    response = await client.get("/buildings/search", headers=auth_headers, params={"q": "tverskaya 7"})
+    assert response.json()["total"] == 0
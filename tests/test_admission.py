@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, Priority, PriorityGate, get_admission_controller
+from app.routers.deps import get_db
+
+
+@pytest.mark.asyncio
+async def test_gate_prefers_higher_priority():
+    gate = PriorityGate(limit=1, max_queue=10)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + 1
+    assert await gate.acquire(Priority.normal, deadline)
+
+    order = []
+
+    async def waiter(name, priority):
+        assert await gate.acquire(priority, deadline)
+        order.append(name)
+        gate.release()
+
+    tasks = [
+        asyncio.create_task(waiter("low", Priority.low)),
+        asyncio.create_task(waiter("normal", Priority.normal)),
+        asyncio.create_task(waiter("high", Priority.high)),
+    ]
+    await asyncio.sleep(0)
+    assert gate.queued == 3
+    gate.release()
+    await asyncio.gather(*tasks)
+    assert order == ["high", "normal", "low"]
+    assert gate.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_gate_times_out_and_bounds_queue():
+    gate = PriorityGate(limit=1, max_queue=1)
+    loop = asyncio.get_running_loop()
+    assert await gate.acquire(Priority.normal, loop.time() + 1)
+
+    waiting = asyncio.create_task(gate.acquire(Priority.normal, loop.time() + 0.05))
+    await asyncio.sleep(0)
+    # Очередь заполнена: следующий запрос отклоняется сразу, не дожидаясь дедлайна.
+    assert not await gate.acquire(Priority.high, loop.time() + 1)
+    assert not await waiting
+    assert gate.queued == 0
+
+    gate.release()
+    assert gate.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_overloaded_route_returns_503(client, auth_headers, session_maker, dependency_overrides):
+    controller = AdmissionController(max_concurrency=1, max_queue=10, queue_timeout=0.02)
+    acquired = asyncio.Event()
+    release = asyncio.Event()
+
+    async def blocking_get_db():
+        # get_db выполняется после admission_control: к этому моменту единственный слот уже занят.
+        acquired.set()
+        async with session_maker() as session:
+            await release.wait()
+            yield session
+
+    dependency_overrides({get_admission_controller: lambda: controller, get_db: blocking_get_db})
+    slow = asyncio.create_task(client.get("/buildings", headers=auth_headers))
+    try:
+        await asyncio.wait_for(acquired.wait(), timeout=5)
+
+        rejected = await asyncio.wait_for(
+            client.get("/organizations/near?lat=55.75&lon=37.61&radius_km=1", headers=auth_headers),
+            timeout=5,
+        )
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+    assert (await asyncio.wait_for(slow, timeout=5)).status_code == 200
+    metrics = (await client.get("/metrics", headers=auth_headers)).json()
+    assert metrics["admission.rejected"] == 1
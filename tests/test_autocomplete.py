@@ -0,0 +1,52 @@
+import pytest
+
+from app.models.organization import Organization
+from app.search.autocomplete import PrefixIndex, get_autocomplete_index
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_word_prefix(client, auth_headers, seed_data):
+    response = await client.get("/autocomplete", headers=auth_headers, params={"q": "caf"})
+    assert response.status_code == 200
+    names = {item["name"] for item in response.json()}
+    assert names == {"Arbat Cafe", "Kremlin Cafe"}
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_kinds(client, auth_headers, seed_data):
+    response = await client.get("/autocomplete", headers=auth_headers, params={"q": "MEA"})
+    items = response.json()
+    assert {(item["kind"], item["name"]) for item in items} == {
+        ("organization", "Meat House"),
+        ("activity", "Meat"),
+    }
+
+    response = await client.get("/autocomplete", headers=auth_headers, params={"q": "mea", "kind": "activity"})
+    assert [item["id"] for item in response.json()] == [seed_data["activities"]["meat"]]
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_incremental_update(client, auth_headers, seed_data, session_maker):
+    await client.get("/autocomplete", headers=auth_headers, params={"q": "a"})
+    index = get_autocomplete_index()
+    assert index.is_fresh()
+
+    async with session_maker() as session:
+        session.add(Organization(name="Ёлочка", building_id=seed_data["buildings"]["b1"]))
+        await session.commit()
+
+    # Индекс обновлен событием записи без полной перестройки.
+    assert index.is_fresh()
+    response = await client.get("/autocomplete", headers=auth_headers, params={"q": "ел"})
+    assert [item["name"] for item in response.json()] == ["Ёлочка"]
+
+
+def test_prefix_index_remove():
+    index = PrefixIndex()
+    index.add("organization", 1, "Арбат Кафе")
+    index.add("organization", 2, "Кафе у дома")
+    assert [item.id for item in index.search("кафе", 10)] == [2, 1]
+
+    index.remove("organization", 2)
+    assert [item.id for item in index.search("кафе", 10)] == [1]
+    assert len(index) == 1
@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.core.metrics import get_metrics
+from app.main import app
+from app.routers import deps
+from app.routers.deps import get_db
+
+
+@pytest.fixture
+def opened_sessions(client, session_maker, monkeypatch):
+    # Подзапросы пакета должны пройти через настоящий get_db, а не через подмену из фикстуры client.
+    app.dependency_overrides.pop(get_db)
+    opened = []
+
+    def counting_sessionmaker():
+        def factory():
+            session = session_maker()
+            opened.append(session)
+            return session
+
+        return factory
+
+    monkeypatch.setattr(deps, "get_sessionmaker", counting_sessionmaker)
+    return opened
+
+
+@pytest.mark.asyncio
+async def test_sequential_batch_shares_one_session(client, auth_headers, seed_data, opened_sessions):
+    building_id = seed_data["buildings"]["b1"]
+    etag = (await client.get("/buildings", headers=auth_headers)).headers["ETag"]
+    opened_sessions.clear()
+
+    response = await client.post(
+        "/batch",
+        headers=auth_headers,
+        json={
+            "requests": [
+                {"id": "stats", "path": "/buildings/stats"},
+                {"id": "orgs", "path": f"/organizations/by-building/{building_id}?size=2"},
+                {"id": "missing", "path": "/organizations/999999"},
+                {"id": "cached", "path": "/buildings", "if_none_match": etag},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    responses = response.json()["responses"]
+    assert [item["id"] for item in responses] == ["stats", "orgs", "missing", "cached"]
+    assert [item["status"] for item in responses] == [200, 200, 404, 304]
+    assert responses[0]["body"]["total"] == 8
+    assert len(responses[1]["body"]["items"]) == 2
+    assert responses[1]["headers"]["etag"]
+    assert responses[2]["body"] == {"detail": "Organization not found"}
+    assert responses[3]["body"] is None
+    # Одна сессия на весь пакет: ее открывает сам /batch, подзапросы получают ее же.
+    assert len(opened_sessions) == 1
+    assert get_metrics().get("batch.subrequests") == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_batch_uses_session_per_subrequest(client, auth_headers, seed_data, opened_sessions):
+    response = await client.post(
+        "/batch",
+        headers=auth_headers,
+        json={"mode": "concurrent", "requests": [{"path": "/buildings"}, {"path": "/organizations/search?name=Cafe"}]},
+    )
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["responses"]] == [200, 200]
+    assert len(opened_sessions) == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_write_and_oversized_requests(client, auth_headers, dependency_overrides):
+    response = await client.post("/batch", headers=auth_headers, json={"requests": [{"path": "/exports"}]})
+    assert response.status_code == 422
+
+    response = await client.post(
+        "/batch", headers=auth_headers, json={"requests": [{"path": "/buildings"}] * 21}
+    )
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Batch must have at most 20 requests"}
+
+    response = await client.post("/batch", json={"requests": [{"path": "/buildings"}]})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_sequential_batch_records_database_failures(
+    client, auth_headers, dependency_overrides, monkeypatch, tmp_path
+):
+    app.dependency_overrides.pop(get_db)
+    broken_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/directory.db")
+    connects = []
+    event.listen(broken_engine.sync_engine, "do_connect", lambda *args: connects.append(args))
+    monkeypatch.setattr(deps, "get_sessionmaker", lambda: async_sessionmaker(broken_engine))
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    dependency_overrides({get_circuit_breaker: lambda: breaker})
+
+    paths = ["/buildings/stats", "/organizations/1", "/activities/tree"]
+    response = await client.post(
+        "/batch",
+        headers=auth_headers,
+        json={"requests": [{"id": str(index), "path": path} for index, path in enumerate(paths)]},
+    )
+    await broken_engine.dispose()
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["responses"]] == [503, 503, 503]
+    # Сбой первого подзапроса учтен автоматом, остальные подзапросы пакета не ходят в недоступную БД.
+    assert breaker._failures == 1
+    assert len(connects) == 1
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_buildings_stats(client, auth_headers, seed_data):
+    response = await client.get("/buildings/stats", headers=auth_headers, params={"include_activities": True})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 8
+    counts = {item["id"]: item["organizations_count"] for item in data["items"]}
+    assert counts[seed_data["buildings"]["b1"]] == 3
+    assert counts[seed_data["buildings"]["b8"]] == 0
+
+    b1 = next(item for item in data["items"] if item["id"] == seed_data["buildings"]["b1"])
+    breakdown = {activity["name"]: activity["organizations_count"] for activity in b1["activities"]}
+    assert breakdown == {"Dairy": 1, "Meat": 1, "Trucks": 1}
+
+
+@pytest.mark.asyncio
+async def test_buildings_stats_without_activities(client, auth_headers, seed_data):
+    response = await client.get("/buildings/stats", headers=auth_headers)
+    assert all(item["activities"] is None for item in response.json()["items"])
+
+
+@pytest.mark.asyncio
+async def test_buildings_nearby(client, auth_headers, seed_data):
+    response = await client.get(
+        "/buildings/near",
+        headers=auth_headers,
+        params={"lat": 55.7558, "lon": 37.6173, "radius_km": 2},
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items[0]["id"] == seed_data["buildings"]["b1"]
+    assert items[0]["distance_km"] == 0
+    assert items[0]["organizations_count"] == 3
+    distances = [item["distance_km"] for item in items]
+    assert distances == sorted(distances)
+    assert seed_data["buildings"]["b7"] not in {item["id"] for item in items}
@@ -0,0 +1,129 @@
+import pytest
+
+from app.core.config import get_settings
+from app.core.data_version import get_data_version
+
+
+@pytest.mark.asyncio
+async def test_bulk_organizations_upsert(client, auth_headers, seed_data):
+    org_id = seed_data["organizations"]["org2"]
+    payload = {
+        "upsert": [
+            {
+                "id": org_id,
+                "name": "Meat House Premium",
+                "building_id": seed_data["buildings"]["b1"],
+                "phones": ["8-800-100-00-01", "8-800-100-00-02"],
+                "activity_ids": [seed_data["activities"]["meat"], seed_data["activities"]["dairy"]],
+            },
+            {
+                "name": "New Bakery",
+                "building_id": seed_data["buildings"]["b8"],
+                "phones": ["8-812-000-00-00"],
+                "activity_ids": [seed_data["activities"]["food"]],
+            },
+        ]
+    }
+    version = get_data_version().current()
+    response = await client.post("/organizations/bulk", headers=auth_headers, json=payload)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["updated"] == [org_id]
+    assert len(result["created"]) == 1
+    assert get_data_version().current() > version
+
+    organization = (await client.get(f"/organizations/{org_id}", headers=auth_headers)).json()
+    assert organization["name"] == "Meat House Premium"
+    assert sorted(phone["number"] for phone in organization["phones"]) == ["8-800-100-00-01", "8-800-100-00-02"]
+    assert len(organization["activities"]) == 2
+
+    new_id = result["created"][0]
+    created = (await client.get(f"/organizations/{new_id}", headers=auth_headers)).json()
+    assert created["building"]["id"] == seed_data["buildings"]["b8"]
+
+    changes = (await client.get("/changes", headers=auth_headers)).json()
+    assert new_id in {org["id"] for org in changes["organizations"]["upserted"]}
+
+    suggestions = (await client.get("/autocomplete", headers=auth_headers, params={"q": "bakery"})).json()
+    assert [item["id"] for item in suggestions] == [new_id]
+
+
+@pytest.mark.asyncio
+async def test_bulk_organizations_delete(client, auth_headers, seed_data):
+    org_id = seed_data["organizations"]["org3"]
+    response = await client.post("/organizations/bulk", headers=auth_headers, json={"delete": [org_id]})
+    assert response.json()["deleted"] == [org_id]
+    assert (await client.get(f"/organizations/{org_id}", headers=auth_headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_organizations_validation(client, auth_headers, seed_data):
+    payload = {"upsert": [{"name": "Ghost", "building_id": 999, "activity_ids": [998]}]}
+    response = await client.post("/organizations/bulk", headers=auth_headers, json=payload)
+    assert response.status_code == 422
+    assert [error["msg"] for error in response.json()["detail"]] == [
+        "Building not found",
+        "Activities not found: [998]",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_activities_depth(client, auth_headers, seed_data):
+    payload = {
+        "upsert": [
+            {"id": 100, "name": "Sausages", "parent_id": seed_data["activities"]["meat"]},
+            {"name": "Smoked", "parent_id": 100},
+        ]
+    }
+    response = await client.post("/activities/bulk", headers=auth_headers, json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "upsert", 1]
+
+    payload["upsert"].pop()
+    response = await client.post("/activities/bulk", headers=auth_headers, json=payload)
+    assert response.status_code == 200
+    assert response.json()["created"] == [100]
+
+
+@pytest.mark.asyncio
+async def test_bulk_buildings_delete_occupied(client, auth_headers, seed_data):
+    payload = {"delete": [seed_data["buildings"]["b1"], seed_data["buildings"]["b8"]]}
+    response = await client.post("/buildings/bulk", headers=auth_headers, json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "delete", 0]
+
+    response = await client.post(
+        "/buildings/bulk",
+        headers=auth_headers,
+        json={
+            "delete": [seed_data["buildings"]["b8"]],
+            "upsert": [{"address": "Kazan, Baumana 1", "latitude": 55.79, "longitude": 49.12}],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["deleted"] == [seed_data["buildings"]["b8"]]
+    assert len(response.json()["created"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_requires_write_key(client, auth_headers, seed_data, dependency_overrides):
+    def override_get_settings():
+        return get_settings().model_copy(update={"API_KEYS": {"test-key"}, "WRITE_API_KEYS": {"writer-key"}})
+
+    dependency_overrides({get_settings: override_get_settings})
+    org_id = seed_data["organizations"]["org1"]
+    for path, payload in (
+        ("/organizations/bulk", {"delete": [org_id]}),
+        ("/buildings/bulk", {"delete": [seed_data["buildings"]["b8"]]}),
+        ("/activities/bulk", {"delete": [seed_data["activities"]["dairy"]]}),
+    ):
+        # Ключ для чтения не получает права записи.
+        response = await client.post(path, headers=auth_headers, json=payload)
+        assert response.status_code == 403
+    assert (await client.get(f"/organizations/{org_id}", headers=auth_headers)).status_code == 200
+
+    writer = {"X-API-Key": "writer-key"}
+    assert (await client.post("/organizations/bulk", headers=writer, json={"delete": [org_id]})).status_code == 200
+    # Ключ записи принимается и маршрутами чтения.
+    assert (await client.get(f"/organizations/{org_id}", headers=writer)).status_code == 404
+    assert (await client.post("/organizations/bulk", headers={"X-API-Key": "unknown"}, json={})).status_code == 401
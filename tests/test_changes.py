@@ -0,0 +1,116 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.db.base import Base
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization
+from app.models.phone import Phone
+from app.routers.changes import list_changes
+
+# Готовая пустая БД PostgreSQL для проверок, которые на SQLite не воспроизводятся (SQLite сам выполняет
+# пишущие транзакции по одной).
+POSTGRES_URL = os.environ.get("CHANGES_TESTS_DATABASE_URL")
+
+
+@pytest.mark.asyncio
+async def test_changes_initial_sync(client, auth_headers, seed_data):
+    response = await client.get("/changes", headers=auth_headers, params={"since": 0})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["has_more"] is False
+    assert len(data["buildings"]["upserted"]) == 8
+    assert len(data["organizations"]["upserted"]) == 10
+    assert len(data["activities"]["upserted"]) == 5
+    org1 = next(
+        org for org in data["organizations"]["upserted"] if org["id"] == seed_data["organizations"]["org1"]
+    )
+    assert org1["activity_ids"] == sorted([seed_data["activities"]["meat"], seed_data["activities"]["dairy"]])
+
+
+@pytest.mark.asyncio
+async def test_changes_incremental(client, auth_headers, seed_data, session_maker):
+    token = (await client.get("/changes", headers=auth_headers)).json()["next_token"]
+
+    org_id = seed_data["organizations"]["org2"]
+    async with session_maker() as session:
+        organization = await session.get(Organization, org_id)
+        organization.name = "Meat House 2"
+        phone = (await session.scalars(select(Phone).where(Phone.organization_id == org_id))).first()
+        await session.delete(phone)
+        await session.commit()
+
+    response = await client.get("/changes", headers=auth_headers, params={"since": token})
+    data = response.json()
+    assert [org["name"] for org in data["organizations"]["upserted"]] == ["Meat House 2"]
+    assert data["phones"]["deleted"] == [phone.id]
+    assert data["buildings"] == {"upserted": [], "deleted": []}
+    assert data["next_token"] > token
+
+    response = await client.get("/changes", headers=auth_headers, params={"since": data["next_token"]})
+    assert response.json()["organizations"]["upserted"] == []
+
+
+@pytest.mark.asyncio
+async def test_changes_activity_link(client, auth_headers, seed_data, session_maker):
+    token = (await client.get("/changes", headers=auth_headers)).json()["next_token"]
+
+    org_id = seed_data["organizations"]["org3"]
+    async with session_maker() as session:
+        organization = await session.get(Organization, org_id, options=[selectinload(Organization.activities)])
+        truck = await session.get(Activity, seed_data["activities"]["truck"])
+        organization.activities.append(truck)
+        await session.commit()
+
+    data = (await client.get("/changes", headers=auth_headers, params={"since": token})).json()
+    assert [org["id"] for org in data["organizations"]["upserted"]] == [org_id]
+    assert seed_data["activities"]["truck"] in data["organizations"]["upserted"][0]["activity_ids"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="Needs PostgreSQL: set CHANGES_TESTS_DATABASE_URL")
+async def test_changes_follow_commit_order_of_interleaved_writers():
+    engine = create_async_engine(POSTGRES_URL)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as reader:
+            token = (await list_changes(since=0, limit=1000, db=reader)).next_token
+
+        # Первый писатель получает номер журнала и не коммитит; второй начинает позже.
+        first = session_maker()
+        first_building = Building(address="First", latitude=55.7, longitude=37.6)
+        first.add(first_building)
+        await first.flush()
+
+        async def second_writer() -> int:
+            async with session_maker() as second:
+                building = Building(address="Second", latitude=55.7, longitude=37.6)
+                second.add(building)
+                await second.commit()
+                return building.id
+
+        second_task = asyncio.create_task(second_writer())
+        await asyncio.sleep(0.2)
+        # Пока первый не закоммитил, второй ждет очереди и не может закоммитить номер больше невидимого.
+        assert not second_task.done()
+        async with session_maker() as reader:
+            page = await list_changes(since=token, limit=1000, db=reader)
+        assert page.buildings.upserted == []
+        token = page.next_token
+
+        await first.commit()
+        await first.close()
+        second_id = await asyncio.wait_for(second_task, timeout=5)
+        async with session_maker() as reader:
+            page = await list_changes(since=token, limit=1000, db=reader)
+        assert [building.id for building in page.buildings.upserted] == sorted([first_building.id, second_id])
+    finally:
+        await engine.dispose()
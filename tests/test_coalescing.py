@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.core.coalescing import SingleFlight
+from app.core.config import get_settings
+from app.main import app
+from app.routers.deps import get_db
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_db_execution(
+    client, auth_headers, seed_data, session_maker, dependency_overrides
+):
+    sessions_opened = 0
+
+    async def slow_get_db():
+        nonlocal sessions_opened
+        sessions_opened += 1
+        async with session_maker() as session:
+            await asyncio.sleep(0.05)
+            yield session
+
+    dependency_overrides({get_db: slow_get_db})
+    activity_id = seed_data["activities"]["food"]
+    responses = await asyncio.gather(
+        *(
+            client.get(
+                f"/organizations/by-activity-tree/{activity_id}",
+                headers=auth_headers,
+                params={"size": 5, "page": 1} if index % 2 else {"page": 1, "size": 5},
+            )
+            for index in range(5)
+        )
+    )
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert sessions_opened == 1
+
+    metrics = (await client.get("/metrics", headers=auth_headers)).json()
+    assert metrics["coalescing.executed"] == 1
+    assert metrics["coalescing.shared"] == 4
+
+
+@pytest.mark.asyncio
+async def test_coalescing_respects_api_key(client, auth_headers, seed_data):
+    responses = await asyncio.gather(
+        client.get("/buildings", headers=auth_headers),
+        client.get("/buildings", headers={"X-API-Key": "wrong"}),
+    )
+    assert [response.status_code for response in responses] == [200, 401]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_retries_after_leader_cancel():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return calls
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    result, shared = await follower
+    assert (result, shared) == (2, False)
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_coalesced_copies_count_against_rate_limit(
+    client, auth_headers, seed_data, session_maker, dependency_overrides, monkeypatch
+):
+    async def slow_get_db():
+        async with session_maker() as session:
+            await asyncio.sleep(0.05)
+            yield session
+
+    dependency_overrides({get_db: slow_get_db})
+    settings = app.state.settings.model_copy(update={"RATE_LIMIT_PER_SECOND": 0.5, "RATE_LIMIT_BURST": 3})
+    monkeypatch.setattr(app.state, "settings", settings)
+    dependency_overrides({get_settings: lambda: settings.model_copy(update={"API_KEYS": {"test-key"}})})
+
+    responses = await asyncio.gather(*(client.get("/buildings", headers=auth_headers) for _ in range(5)))
+    # Один запрос выполнен, две копии уложились в запас токенов, остальные копии отклонены.
+    assert sorted(response.status_code for response in responses) == [200, 200, 200, 429, 429]
+    assert all("Retry-After" in response.headers for response in responses if response.status_code == 429)
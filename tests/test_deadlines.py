@@ -0,0 +1,105 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import get_settings
+from app.core.metrics import get_metrics
+from app.db.events import DEADLINE_KEY, _apply_statement_timeout
+from app.main import app
+from app.routers.deps import get_db
+
+
+class _QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test"), (b"x-api-key", b"test-key")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("test", 80),
+    }
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_request(session_maker, dependency_overrides):
+    cancelled = asyncio.Event()
+
+    async def slow_get_db():
+        async with session_maker() as session:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            yield session
+
+    dependency_overrides({
+        get_db: slow_get_db,
+        get_settings: lambda: get_settings().model_copy(update={"API_KEYS": {"test-key"}}),
+    })
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await asyncio.wait_for(app(_scope("/buildings"), receive, send), timeout=2)
+    assert cancelled.is_set()
+    assert sent == []
+    assert get_metrics().get("requests.cancelled_on_disconnect") == 1
+
+
+@pytest.mark.asyncio
+async def test_statement_timeout_maps_to_504(client, auth_headers, dependency_overrides):
+    async def timed_out(*_args, **_kwargs):
+        raise DBAPIError("SELECT 1", {}, _QueryCanceled("canceling statement due to statement timeout"))
+
+    async def failing_get_db():
+        yield SimpleNamespace(scalars=timed_out)
+
+    dependency_overrides({get_db: failing_get_db})
+    response = await client.get("/buildings", headers=auth_headers)
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Query timed out"}
+    assert get_metrics().get("db.queries_timed_out") == 1
+
+
+def test_statement_timeout_uses_remaining_deadline():
+    executed = []
+    connection = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), exec_driver_sql=executed.append)
+    session = SimpleNamespace(info={DEADLINE_KEY: time.monotonic() + 2})
+
+    _apply_statement_timeout(session, None, connection)
+    assert len(executed) == 1
+    timeout_ms = int(executed[0].rsplit(" ", 1)[1])
+    assert 1500 < timeout_ms <= 2000
+
+    sqlite = SimpleNamespace(dialect=SimpleNamespace(name="sqlite"), exec_driver_sql=executed.append)
+    _apply_statement_timeout(session, None, sqlite)
+    assert len(executed) == 1
+
+
+def test_route_timeouts_from_settings():
+    settings = get_settings().model_copy(update={"STATEMENT_TIMEOUT_MS": 1000, "STATEMENT_TIMEOUTS": {"list_nearby": 200}})
+    assert settings.statement_timeout_for("list_nearby") == 200
+    assert settings.statement_timeout_for("get_organization") == 1000
@@ -0,0 +1,69 @@
+import pytest
+
+from app.core.config import Settings
+from app.core.data_version import DataVersion
+from app.models.building import Building
+from app.routers.deps import get_db
+
+
+@pytest.mark.asyncio
+async def test_etag_not_modified(client, auth_headers, seed_data):
+    response = await client.get("/buildings", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = await client.get("/buildings", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_after_write(client, auth_headers, seed_data, session_maker):
+    building_id = seed_data["buildings"]["b1"]
+    response = await client.get(f"/organizations/by-building/{building_id}", headers=auth_headers)
+    etag = response.headers["ETag"]
+
+    async with session_maker() as session:
+        session.add(Building(address="Moscow, Novaya 5", latitude=55.7, longitude=37.6))
+        await session.commit()
+
+    response = await client.get(
+        f"/organizations/by-building/{building_id}",
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_not_modified_skips_db(client, auth_headers, seed_data, dependency_overrides):
+    etag = (await client.get("/buildings", headers=auth_headers)).headers["ETag"]
+
+    async def failing_get_db():
+        raise AssertionError("DB session must not be opened")
+        yield
+
+    dependency_overrides({get_db: failing_get_db})
+    response = await client.get("/buildings", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_data_version_shared_file(tmp_path):
+    path = tmp_path / "data_version.json"
+    writer = DataVersion(path)
+    reader = DataVersion(path)
+    assert reader.current() == writer.current()
+
+    version = writer.bump({"activities"})
+    assert reader.current() == version
+    assert reader.table_version("activities") == version
+    assert reader.table_version("buildings") < version
+
+
+def test_data_version_file_is_shared_by_default(monkeypatch):
+    monkeypatch.delenv("DATA_VERSION_FILE", raising=False)
+    assert Settings(_env_file=None, DATABASE_URL="postgresql://a:a@localhost/a").DATA_VERSION_FILE == "data/data_version.json"
+    # Пустое значение явно выбирает версию в памяти процесса.
+    monkeypatch.setenv("DATA_VERSION_FILE", "")
+    assert Settings(_env_file=None, DATABASE_URL="postgresql://a:a@localhost/a").DATA_VERSION_FILE is None
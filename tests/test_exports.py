@@ -0,0 +1,110 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+import pytest_asyncio
+
+from app.core.config import get_settings
+from app.core.rate_limit import InMemoryRateLimitBackend
+from app.exports.jobs import ExportManager, get_export_manager
+from app.routers import deps
+
+
+@pytest_asyncio.fixture
+async def export_manager(tmp_path, session_maker, dependency_overrides):
+    manager = ExportManager(tmp_path / "exports", session_maker, chunk_size=3, max_pending=2)
+    dependency_overrides({get_export_manager: lambda: manager})
+    yield manager
+    await manager.join()
+
+
+@pytest.mark.asyncio
+async def test_export_organizations_ndjson(client, auth_headers, seed_data, export_manager):
+    response = await client.post(
+        "/exports",
+        headers=auth_headers,
+        json={"entity": "organizations", "format": "ndjson", "activity_id": seed_data["activities"]["food"]},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    await export_manager.join()
+    job = (await client.get(f"/exports/{job_id}", headers=auth_headers)).json()
+    assert job["status"] == "completed"
+    assert job["rows_total"] == job["rows_written"] == 8
+    assert job["progress"] == 1.0
+
+    download = await client.get(f"/exports/{job_id}/download", headers=auth_headers)
+    assert download.status_code == 200
+    lines = gzip.decompress(download.content).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["id"] for record in records] == sorted(record["id"] for record in records)
+    assert "AutoWorld" not in {record["name"] for record in records}
+    assert records[0]["building"]["address"]
+
+
+@pytest.mark.asyncio
+async def test_export_buildings_csv_in_region(client, auth_headers, seed_data, export_manager):
+    response = await client.post(
+        "/exports",
+        headers=auth_headers,
+        json={
+            "entity": "buildings",
+            "format": "csv",
+            "min_lat": 59.9,
+            "max_lat": 60.0,
+            "min_lon": 30.0,
+            "max_lon": 30.5,
+        },
+    )
+    job_id = response.json()["id"]
+    await export_manager.join()
+
+    download = await client.get(f"/exports/{job_id}/download", headers=auth_headers)
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(download.content).decode())))
+    assert [row["address"] for row in rows] == ["Saint Petersburg, Nevsky 10", "Saint Petersburg, Palace Sq 2"]
+
+
+@pytest.mark.asyncio
+async def test_export_validation_and_missing_jobs(client, auth_headers, export_manager):
+    response = await client.post("/exports", headers=auth_headers, json={"entity": "buildings", "min_lat": 1})
+    assert response.status_code == 422
+
+    assert (await client.get("/exports/0123456789abcdef0123456789abcdef", headers=auth_headers)).status_code == 404
+    assert (await client.get("/exports/..%2Fsecret", headers=auth_headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_download_before_completion_conflicts(client, auth_headers, seed_data, export_manager):
+    job_id = (await client.post("/exports", headers=auth_headers, json={})).json()["id"]
+    response = await client.get(f"/exports/{job_id}/download", headers=auth_headers)
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_download_does_not_hold_concurrency_slot(
+    client, auth_headers, seed_data, export_manager, dependency_overrides, monkeypatch
+):
+    def override_get_settings():
+        return get_settings().model_copy(update={"API_KEYS": {"test-key"}, "RATE_LIMIT_CONCURRENCY": 1})
+
+    dependency_overrides({get_settings: override_get_settings})
+    backend = InMemoryRateLimitBackend()
+    acquired = []
+
+    async def acquire_slot(key, limit):
+        acquired.append(key)
+        return await InMemoryRateLimitBackend.acquire_slot(backend, key, limit)
+
+    backend.acquire_slot = acquire_slot
+    monkeypatch.setattr(deps, "get_rate_limit_backend", lambda: backend)
+
+    job_id = (await client.post("/exports", headers=auth_headers, json={"entity": "buildings"})).json()["id"]
+    await export_manager.join()
+    assert acquired == ["test-key"]
+
+    # Скачивание списывает только токен частоты: слот держался бы всю передачу файла.
+    assert (await client.get(f"/exports/{job_id}/download", headers=auth_headers)).status_code == 200
+    assert acquired == ["test-key"]
@@ -0,0 +1,35 @@
+import pytest
+
+from app.search.fuzzy import TrigramIndex
+from app.search.normalize import fold_for_fuzzy
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_typo(client, auth_headers, seed_data):
+    response = await client.get("/organizations/search/fuzzy", headers=auth_headers, params={"q": "Kremlni"})
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items[0]["id"] == seed_data["organizations"]["org8"]
+    assert 0 < items[0]["score"] <= 1
+    assert [item["score"] for item in items] == sorted((item["score"] for item in items), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_no_match(client, auth_headers, seed_data):
+    response = await client.get("/organizations/search/fuzzy", headers=auth_headers, params={"q": "zzzz"})
+    assert response.json()["total"] == 0
+
+
+def test_trigram_index_cyrillic_normalization():
+    index = TrigramIndex()
+    index.add(1, "Арбат Кафе")
+    index.add(2, "Ёлочка")
+    index.add(3, "Мясной Дом")
+
+    # Латинская «K», й/и и ё/е сглаживаются при нормализации, а «э» вместо «е» — нет: «Kафэ» находится
+    # только по похожести триграмм, с оценкой ниже, чем у точного слова.
+    assert fold_for_fuzzy("Kафэ Ёлочка Мясной") == "кафэ елочка мяснои"
+    assert index.search("Kафэ", 0.3)[0].id == 1
+    assert index.search("Kафэ", 0.3)[0].score < index.search("Kафе", 0.3)[0].score
+    assert index.search("елочка", 0.3)[0].id == 2
+    assert index.search("мясои", 0.3)[0].id == 3
@@ -0,0 +1,38 @@
+import pytest
+
+from app.index_advisor import find_seq_scans, router_queries, sample_params
+
+
+def test_find_seq_scans_reports_only_large_tables():
+    plan = {
+        "Plan": {
+            "Node Type": "Nested Loop",
+            "Plans": [
+                {
+                    "Node Type": "Seq Scan",
+                    "Relation Name": "organization_activity",
+                    "Plan Rows": 120,
+                    "Filter": "(activity_id = 2)",
+                },
+                {"Node Type": "Index Scan", "Relation Name": "organizations", "Plan Rows": 1},
+                {"Node Type": "Seq Scan", "Relation Name": "activities", "Plan Rows": 8},
+            ],
+        }
+    }
+    sizes = {"organization_activity": 50_000, "organizations": 20_000, "buildings": 100}
+
+    [finding] = find_seq_scans("organizations.by_activity", plan, sizes, min_rows=10_000)
+    assert finding.relation == "organization_activity"
+    assert finding.filter == "(activity_id = 2)"
+    assert find_seq_scans("organizations.by_activity", plan, sizes, min_rows=100_000) == []
+
+
+@pytest.mark.asyncio
+async def test_router_queries_execute(session_maker, seed_data):
+    async with session_maker() as session:
+        params = await sample_params(session)
+        assert params.building_id == seed_data["buildings"]["b1"]
+        queries = router_queries(params)
+        assert len(queries) == 16
+        for stmt in queries.values():
+            await session.execute(stmt)
@@ -0,0 +1,209 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.data_version import get_data_version
+from app.live.hub import LiveHub, get_live_hub
+from app.live.index import Placement, Subscription, SubscriptionIndex
+from app.main import app
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization
+
+CENTER = (55.75, 55.76, 37.61, 37.625)
+
+
+def _parse(event: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in event.strip().splitlines() if not line.startswith(":"))
+    return fields["event"], json.loads(fields["data"])
+
+
+async def _next(subscription: Subscription) -> tuple[str, dict]:
+    return _parse(await asyncio.wait_for(subscription.queue.get(), timeout=2))
+
+
+async def _drain(subscription: Subscription, count: int) -> list[tuple[str, int]]:
+    events = [await _next(subscription) for _ in range(count)]
+    return sorted((kind, data["id"]) for kind, data in events)
+
+
+@pytest_asyncio.fixture
+async def hub(session_maker):
+    hub = LiveHub(session_maker, poll_interval=0.05)
+    get_data_version().subscribe(hub.on_change)
+    yield hub
+    for subscription in list(hub._index):
+        hub.unsubscribe(subscription)
+    if hub._task is not None:
+        await asyncio.wait_for(hub._task, timeout=2)
+
+
+def test_index_returns_only_nearby_and_matching_activity_subscriptions():
+    index = SubscriptionIndex()
+    moscow = Subscription(bbox=CENTER, activity_id=None, include_children=True, queue=asyncio.Queue())
+    petersburg = Subscription(bbox=(59.9, 60.0, 30.2, 30.4), activity_id=None, include_children=True, queue=asyncio.Queue())
+    world = Subscription(bbox=(-90, 90, -180, 180), activity_id=None, include_children=True, queue=asyncio.Queue())
+    food = Subscription(bbox=None, activity_id=1, include_children=True, queue=asyncio.Queue(), activity_ids=frozenset({1, 2}))
+    for subscription in (moscow, petersburg, world, food):
+        index.add(subscription)
+
+    placement = Placement(building_id=1, latitude=55.7558, longitude=37.6173, activity_ids=frozenset({2}))
+    assert index.candidates(placement) == {moscow, world, food}
+
+    index.remove(food)
+    index.remove(world)
+    assert index.candidates(placement) == {moscow}
+    assert len(index) == 2
+
+
+@pytest.mark.asyncio
+async def test_rectangle_subscription_receives_added_changed_removed(hub, session_maker, seed_data):
+    subscription = await hub.subscribe(CENTER, None)
+    building_id = seed_data["buildings"]["b1"]
+
+    async with session_maker() as session:
+        session.add(Organization(name="New Bakery", building_id=building_id))
+        await session.commit()
+    kind, card = await _next(subscription)
+    assert kind == "added"
+    assert card["name"] == "New Bakery"
+    assert card["building"]["id"] == building_id
+    new_id = card["id"]
+
+    async with session_maker() as session:
+        organization = await session.get(Organization, new_id)
+        organization.name = "Old Bakery"
+        await session.commit()
+    kind, card = await _next(subscription)
+    assert (kind, card["name"]) == ("changed", "Old Bakery")
+
+    # Переезд здания за пределы области — удаление из нее всех его организаций.
+    async with session_maker() as session:
+        building = await session.get(Building, building_id)
+        building.latitude = 55.70
+        await session.commit()
+    org_ids = seed_data["organizations"]
+    assert await _drain(subscription, 4) == sorted(
+        ("removed", organization_id)
+        for organization_id in (org_ids["org2"], org_ids["org4"], org_ids["org7"], new_id)
+    )
+
+    # Изменение вне области подписчику не приходит.
+    async with session_maker() as session:
+        organization = await session.get(Organization, org_ids["org3"])
+        organization.name = "AutoWorld 2"
+        await session.commit()
+    await asyncio.sleep(0.1)
+    assert subscription.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_activity_subscription_follows_subtree(hub, session_maker, seed_data):
+    activities = seed_data["activities"]
+    org_ids = seed_data["organizations"]
+    subscription = await hub.subscribe(None, activities["food"])
+
+    # Dairy уходит из поддерева Food: остаются только организации, у которых есть и Meat.
+    async with session_maker() as session:
+        dairy = await session.get(Activity, activities["dairy"])
+        dairy.parent = await session.get(Activity, activities["auto"])
+        await session.commit()
+    events = await _drain(subscription, 5)
+    assert events == sorted(
+        [("changed", org_ids["org1"])]
+        + [("removed", org_ids[key]) for key in ("org6", "org7", "org8", "org10")]
+    )
+
+    async with session_maker() as session:
+        organization = await session.get(Organization, org_ids["org3"])
+        await session.refresh(organization, ["activities"])
+        organization.activities.append(await session.get(Activity, activities["meat"]))
+        await session.commit()
+    kind, card = await _next(subscription)
+    assert (kind, card["id"]) == ("added", org_ids["org3"])
+
+
+@pytest.mark.asyncio
+async def test_write_in_other_worker_is_found_by_version(hub, session_maker, seed_data):
+    subscription = await hub.subscribe(CENTER, None)
+    # Без события о записи хаб видит только смену версии и сравнивает положения целиком.
+    get_data_version().unsubscribe(hub.on_change)
+    async with session_maker() as session:
+        organization = (await session.scalars(select(Organization).where(Organization.name == "Arbat Cafe"))).one()
+        building = await session.get(Building, seed_data["buildings"]["b4"])
+        organization.building_id = building.id
+        await session.commit()
+
+    kind, card = await _next(subscription)
+    assert (kind, card["name"]) == ("added", "Arbat Cafe")
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint(client, auth_headers, session_maker, seed_data, dependency_overrides):
+    def override_get_settings():
+        return get_settings().model_copy(update={"API_KEYS": {"test-key"}, "RATE_LIMIT_CONCURRENCY": 1})
+
+    dependency_overrides({get_settings: override_get_settings})
+    response = await client.get("/live/organizations", headers=auth_headers)
+    assert response.status_code == 400
+    response = await client.get("/live/organizations?min_lat=55&max_lat=56", headers=auth_headers)
+    assert response.status_code == 400
+
+    hub = LiveHub(session_maker, poll_interval=0.05)
+    get_data_version().subscribe(hub.on_change)
+    dependency_overrides({get_live_hub: lambda: hub})
+    response = await client.get("/live/organizations?activity_id=999999", headers=auth_headers)
+    assert response.status_code == 404
+    assert len(hub) == 0
+
+    disconnected = asyncio.Event()
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        await chunks.put(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/live/organizations",
+        "raw_path": b"/live/organizations",
+        "query_string": f"activity_id={seed_data['activities']['auto']}".encode(),
+        "root_path": "",
+        "headers": [(b"host", b"test"), (b"x-api-key", b"test-key")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("test", 80),
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+
+    start = await asyncio.wait_for(chunks.get(), timeout=2)
+    assert start["status"] == 200
+    assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+    assert _parse((await asyncio.wait_for(chunks.get(), timeout=2))["body"].decode())[0] == "ready"
+    # Открытый поток не занимает единственный слот одновременных запросов ключа.
+    assert (await client.get("/buildings", headers=auth_headers)).status_code == 200
+
+    async with session_maker() as session:
+        organization = await session.get(Organization, seed_data["organizations"]["org4"])
+        organization.name = "TruckPro Plus"
+        await session.commit()
+    kind, card = _parse((await asyncio.wait_for(chunks.get(), timeout=2))["body"].decode())
+    assert (kind, card["name"]) == ("changed", "TruckPro Plus")
+
+    disconnected.set()
+    await asyncio.wait_for(task, timeout=2)
+    assert len(hub) == 0
+    await asyncio.wait_for(hub._task, timeout=2)
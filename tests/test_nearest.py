@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from app.core.geo import haversine_km, haversine_matrix_km, k_nearest
+
+RED_SQUARE = {"lat": 55.7539, "lon": 37.6208}
+NEVSKY = {"lat": 59.9343, "lon": 30.3351}
+
+
+def test_haversine_matrix_matches_scalar_formula():
+    lats, lons = np.array([55.7558, 59.9343]), np.array([37.6173, 30.3351])
+    other_lats, other_lons = np.array([55.7020, 55.7702, 59.9398]), np.array([37.5302, 37.6537, 30.3146])
+    matrix = haversine_matrix_km(lats, lons, other_lats, other_lons)
+    assert matrix.shape == (2, 3)
+    for row in range(2):
+        for column in range(3):
+            expected = haversine_km(lats[row], lons[row], other_lats[column], other_lons[column])
+            assert matrix[row, column] == pytest.approx(expected)
+
+
+def test_k_nearest_orders_by_distance_and_applies_limit():
+    candidates = np.array([0.0, 3.0, 1.0, 2.0])
+    [(indexes, distances)] = k_nearest(np.array([0.0]), np.array([0.0]), candidates, np.zeros(4), k=3)
+    assert indexes.tolist() == [0, 2, 3]
+    assert np.all(np.diff(distances) >= 0)
+
+    [(indexes, _)] = k_nearest(np.array([0.0]), np.array([0.0]), candidates, np.zeros(4), k=3, max_km=150)
+    assert indexes.tolist() == [0, 2]
+    assert k_nearest(np.array([0.0]), np.array([0.0]), np.empty(0), np.empty(0), k=3)[0][0].size == 0
+
+
+def test_k_nearest_breaks_ties_at_k_boundary_by_index():
+    candidates = np.ones(200)
+    candidates[157] = 0.5
+    points = np.array([0.0, 0.0])
+    for indexes, distances in k_nearest(points, np.zeros(2), candidates, np.zeros(200), k=5):
+        assert indexes.tolist() == [157, 0, 1, 2, 3]
+        assert np.all(np.diff(distances) >= 0)
+
+
+@pytest.mark.asyncio
+async def test_nearest_for_many_points(client, auth_headers, seed_data):
+    organizations = seed_data["organizations"]
+    response = await client.post(
+        "/organizations/nearest",
+        headers=auth_headers,
+        json={"points": [RED_SQUARE, NEVSKY], "k": 2, "activity_id": seed_data["activities"]["food"]},
+    )
+    assert response.status_code == 200
+    red_square, nevsky = response.json()
+    # В здании b6 на Красной площади — Red Square Food (мясо); Kremlin Cafe (молочное) тоже в дереве «Food».
+    assert {item["id"] for item in red_square["items"]} == {organizations["org8"], organizations["org9"]}
+    assert red_square["items"][0]["distance_km"] == 0
+    # В Петербурге организаций из дерева «Food» нет: ближайшие — в Москве.
+    assert [item["building"]["address"].split(",")[0] for item in nevsky["items"]] == ["Moscow", "Moscow"]
+    assert nevsky["point"] == NEVSKY
+
+
+@pytest.mark.asyncio
+async def test_nearest_respects_max_distance_and_exact_activity(client, auth_headers, seed_data):
+    response = await client.post(
+        "/organizations/nearest",
+        headers=auth_headers,
+        json={
+            "points": [NEVSKY],
+            "k": 5,
+            "activity_id": seed_data["activities"]["auto"],
+            "include_children": False,
+            "max_distance_km": 50,
+        },
+    )
+    [nevsky] = response.json()
+    assert [item["id"] for item in nevsky["items"]] == [seed_data["organizations"]["org3"]]
+
+    missing = await client.post(
+        "/organizations/nearest", headers=auth_headers, json={"points": [NEVSKY], "activity_id": 999}
+    )
+    assert missing.status_code == 404
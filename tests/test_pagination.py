@@ -0,0 +1,55 @@
+import pytest
+
+from app.core.config import get_settings
+
+
+@pytest.mark.asyncio
+async def test_count_exact(client, auth_headers, seed_data):
+    activity_id = seed_data["activities"]["food"]
+    response = await client.get(
+        f"/organizations/by-activity-tree/{activity_id}",
+        headers=auth_headers,
+        params={"size": 3, "page": 2},
+    )
+    data = response.json()
+    assert data["total"] == 8
+    assert data["pages"] == 3
+    assert data["has_next"] is True
+    assert data["total_is_estimate"] is False
+
+
+@pytest.mark.asyncio
+async def test_count_none(client, auth_headers, seed_data):
+    response = await client.get(
+        "/organizations/search",
+        headers=auth_headers,
+        params={"name": "a", "size": 2, "count": "none"},
+    )
+    data = response.json()
+    assert len(data["items"]) == 2
+    assert data["total"] is None
+    assert data["pages"] is None
+    assert data["has_next"] is True
+
+
+@pytest.mark.asyncio
+async def test_count_estimated_capped(client, auth_headers, seed_data, monkeypatch):
+    monkeypatch.setattr(get_settings(), "COUNT_ESTIMATE_CAP", 3)
+    activity_id = seed_data["activities"]["food"]
+    response = await client.get(
+        f"/organizations/by-activity-tree/{activity_id}",
+        headers=auth_headers,
+        params={"size": 2, "count": "estimated"},
+    )
+    data = response.json()
+    assert data["total"] == 4
+    assert data["total_is_estimate"] is True
+    assert data["has_next"] is True
+
+
+@pytest.mark.asyncio
+async def test_last_page_total_without_count(client, auth_headers, seed_data):
+    response = await client.get("/buildings", headers=auth_headers, params={"count": "none"})
+    data = response.json()
+    assert data["total"] == 8
+    assert data["has_next"] is False
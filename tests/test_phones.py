@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.queries import digit_prefix_bounds
+from app.models.phone import Phone
+from app.search.normalize import normalize_phone, phone_variants
+
+
+def test_phone_normalization():
+    assert normalize_phone("8-923-666-13-13") == "89236661313"
+    assert normalize_phone("+7 (923) 666 13 13") == "79236661313"
+    assert phone_variants("79236661313") == ["79236661313", "89236661313"]
+    assert phone_variants("2222222") == ["2222222"]
+    assert digit_prefix_bounds("792") == ("792", "793")
+    assert digit_prefix_bounds("7999") == ("7999", "8")
+    assert digit_prefix_bounds("999") == ("999", None)
+
+
+@pytest.mark.asyncio
+async def test_exact_phone_lookup_ignores_format(client, auth_headers, seed_data):
+    for number in ("8-800-100-00-01", "88001000001", "+7 (800) 100-00-01"):
+        response = await client.get("/organizations/by-phone", params={"number": number}, headers=auth_headers)
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()["items"]] == ["Meat House"]
+
+    response = await client.get("/organizations/by-phone", params={"number": "8-800-100-00-09"}, headers=auth_headers)
+    assert response.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_prefix_phone_lookup(client, auth_headers, seed_data):
+    response = await client.get(
+        "/organizations/by-phone", params={"number": "8 (495)", "prefix": "true", "size": 4}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 6
+    assert len(body["items"]) == 4
+
+    response = await client.get("/organizations/by-phone", params={"number": "2-22", "prefix": "true"}, headers=auth_headers)
+    assert [item["name"] for item in response.json()["items"]] == ["Horns and Hooves LLC"]
+
+    response = await client.get("/organizations/by-phone", params={"number": "8-4", "prefix": "true"}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Phone prefix must have at least 3 digits"}
+    response = await client.get("/organizations/by-phone", params={"number": "call me"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_digits_are_maintained_on_write(client, auth_headers, seed_data, session_maker):
+    async with session_maker() as session:
+        phone = (await session.scalars(select(Phone).where(Phone.number == "8-812-111-22-33"))).one()
+        assert phone.number_digits == "88121112233"
+        phone.number = "8 (812) 999-00-00"
+        await session.commit()
+    response = await client.get("/organizations/by-phone", params={"number": "88129990000"}, headers=auth_headers)
+    assert [item["name"] for item in response.json()["items"]] == ["AutoWorld"]
+
+    payload = {
+        "upsert": [
+            {
+                "id": seed_data["organizations"]["org4"],
+                "name": "TruckPro",
+                "building_id": seed_data["buildings"]["b1"],
+                "phones": ["+7 (999) 123-45-67"],
+                "activity_ids": [seed_data["activities"]["truck"]],
+            }
+        ]
+    }
+    assert (await client.post("/organizations/bulk", headers=auth_headers, json=payload)).status_code == 200
+    response = await client.get("/organizations/by-phone", params={"number": "8 999 123 45 67"}, headers=auth_headers)
+    assert [item["name"] for item in response.json()["items"]] == ["TruckPro"]
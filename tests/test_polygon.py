@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.core.geo import points_in_polygon
+
+# Прямоугольник вокруг центра Москвы с дырой вокруг Красной площади (b6).
+CENTER = [[37.60, 55.74], [37.66, 55.74], [37.66, 55.78], [37.60, 55.78], [37.60, 55.74]]
+RED_SQUARE_HOLE = [[37.618, 55.752], [37.624, 55.752], [37.624, 55.756], [37.618, 55.756], [37.618, 55.752]]
+
+
+def test_points_in_polygon_handles_holes_and_concave_rings():
+    # Буква «П»: точка в вырезе снизу снаружи, точки в «ножках» внутри.
+    arch = [[0, 0], [1, 0], [1, 2], [2, 2], [2, 0], [3, 0], [3, 3], [0, 3], [0, 0]]
+    lats = np.array([0.5, 0.5, 1.0, 2.5, 4.0])
+    lons = np.array([0.5, 2.5, 1.5, 1.5, 1.5])
+    assert points_in_polygon(lats, lons, [arch]).tolist() == [True, True, False, True, False]
+
+    hole = [[1, 2.2], [2, 2.2], [2, 2.8], [1, 2.8], [1, 2.2]]
+    assert points_in_polygon(lats, lons, [arch, hole]).tolist() == [True, True, False, False, False]
+
+
+@pytest.mark.asyncio
+async def test_within_polygon(client, auth_headers, seed_data):
+    organizations = seed_data["organizations"]
+    response = await client.post(
+        "/organizations/within-polygon",
+        headers=auth_headers,
+        json={"type": "Polygon", "coordinates": [CENTER, RED_SQUARE_HOLE]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    # b1 (org2, org4, org7), b2 (org1) и b4 (org5); b5 западнее, b6 в дыре, b7 южнее.
+    expected = sorted(organizations[key] for key in ("org1", "org2", "org4", "org5", "org7"))
+    assert [item["id"] for item in body["items"]] == expected
+    assert body["total"] == 5
+
+    inside = sorted(organizations[key] for key in ("org1", "org2", "org4", "org5", "org7", "org8", "org9"))
+    last_page = await client.post(
+        "/organizations/within-polygon",
+        headers=auth_headers,
+        params={"size": 2, "page": 4},
+        json={"type": "Polygon", "coordinates": [CENTER]},
+    )
+    assert last_page.json()["total"] == 7
+    assert [item["id"] for item in last_page.json()["items"]] == inside[6:]
+
+
+@pytest.mark.asyncio
+async def test_within_polygon_rejects_open_ring(client, auth_headers):
+    response = await client.post(
+        "/organizations/within-polygon",
+        headers=auth_headers,
+        json={"type": "Polygon", "coordinates": [CENTER[:-1]]},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from app.core.profiling import classify_stack
+from app.main import app
+
+
+@pytest.fixture
+def profiling_settings(tmp_path, monkeypatch):
+    settings = app.state.settings.model_copy(
+        update={"PROFILE_TOKEN": "secret", "PROFILE_DIR": str(tmp_path), "PROFILE_INTERVAL_MS": 0.5}
+    )
+    monkeypatch.setattr(app.state, "settings", settings)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_privileged_header_saves_profile(client, auth_headers, seed_data, profiling_settings):
+    response = await client.get(
+        "/organizations/near?lat=55.75&lon=37.61&radius_km=10",
+        headers={**auth_headers, "X-Profile-Token": "secret"},
+    )
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    [path] = profiling_settings.glob(f"*-{profile_id}.json")
+    profile = json.loads(path.read_text(encoding="utf-8"))
+    assert profile["path"] == "/organizations/near"
+    assert profile["status"] == 200
+    assert profile["db_statements"] >= 1
+    assert profile["phases_ms"]["db_wait"] > 0
+
+
+@pytest.mark.asyncio
+async def test_wrong_token_is_not_profiled(client, auth_headers, profiling_settings):
+    response = await client.get("/buildings", headers={**auth_headers, "X-Profile-Token": "guess"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert not list(profiling_settings.iterdir())
+
+
+def test_classify_stack_uses_innermost_known_frame():
+    stack = [
+        ("/usr/lib/python3.12/json/encoder.py", "iterencode"),
+        ("/site-packages/sqlalchemy/orm/loading.py", "instances"),
+        ("/app/routers/organizations.py", "list_nearby"),
+    ]
+    assert classify_stack(stack) == "json_encoding"
+    assert classify_stack(stack[1:]) == "orm_hydration"
+    assert classify_stack(stack[2:]) == "other"
@@ -0,0 +1,253 @@
+"""Регрессия планов запросов на PostgreSQL (по умолчанию пропускается).
+
+Запуск: PLAN_TESTS=1 pytest tests/test_query_plans.py — поднимает временный кластер (initdb/pg_ctl из PATH
+или PLAN_TESTS_PG_BIN), либо PLAN_TESTS_DATABASE_URL=postgresql+asyncpg://... для отдельной БД, имя которой
+начинается с plan_test: схема public в ней пересоздается, поэтому другие БД тест не трогает.
+Схема создается миграциями Alembic, как в рабочей БД. Эталон tests/plan_baseline.json записывается только
+с PLAN_TESTS_UPDATE=1; без него тест падает, а не принимает текущие планы за эталон.
+"""
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.explain import explain_plan
+from app.index_advisor import SampleParams, router_queries, sample_params
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.models.phone import Phone
+
+DATABASE_URL = os.environ.get("PLAN_TESTS_DATABASE_URL")
+SCALE = int(os.environ.get("PLAN_TESTS_SCALE", "20000"))
+# Допустимый рост числа прочитанных строк и буферов относительно эталона.
+THRESHOLD = float(os.environ.get("PLAN_TESTS_THRESHOLD", "0.25"))
+# Абсолютный запас, чтобы шум на маленьких числах не давал ложных падений.
+SLACK = 16
+BASELINE_PATH = Path(__file__).with_name("plan_baseline.json")
+ALEMBIC_DIR = Path(__file__).resolve().parents[1] / "alembic"
+UPDATE_BASELINE = os.environ.get("PLAN_TESTS_UPDATE") == "1"
+# Схема public пересоздается только в БД с таким префиксом имени: опечатка в URL не сотрет рабочую БД.
+DEDICATED_DB_PREFIX = "plan_test"
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("PLAN_TESTS") != "1" and not DATABASE_URL,
+    reason="Query plan tests are opt-in: set PLAN_TESTS=1 or PLAN_TESTS_DATABASE_URL",
+)
+
+
+def _pg_tool(name: str) -> str | None:
+    return shutil.which(name, path=os.environ.get("PLAN_TESTS_PG_BIN"))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _synthetic_rows(scale: int) -> dict[str, list[dict]]:
+    rng = random.Random(42)
+    buildings = [
+        {
+            "id": index,
+            "address": f"Moscow, Street {index % 900} {index}",
+            "latitude": round(rng.uniform(55.55, 55.95), 6),
+            "longitude": round(rng.uniform(37.30, 37.90), 6),
+        }
+        for index in range(1, max(scale // 5, 1) + 1)
+    ]
+
+    activities = []
+    for root in range(10):
+        root_id = len(activities) + 1
+        activities.append({"id": root_id, "name": f"Activity {root}", "parent_id": None, "depth": 1})
+        for child in range(5):
+            child_id = len(activities) + 1
+            activities.append({"id": child_id, "name": f"Activity {root}.{child}", "parent_id": root_id, "depth": 2})
+            for leaf in range(3):
+                leaf_id = len(activities) + 1
+                activities.append({"id": leaf_id, "name": f"Activity {root}.{child}.{leaf}", "parent_id": child_id, "depth": 3})
+
+    words = ["Cafe", "Market", "Auto", "Service", "Food", "Studio", "House", "Center", "Shop", "Lab"]
+    organizations, links, phones = [], [], []
+    for index in range(1, scale + 1):
+        organizations.append(
+            {
+                "id": index,
+                "name": f"{rng.choice(words)} {rng.choice(words)} {index}",
+                "building_id": rng.randint(1, len(buildings)),
+            }
+        )
+        for activity_id in rng.sample(range(1, len(activities) + 1), rng.randint(1, 3)):
+            links.append({"organization_id": index, "activity_id": activity_id})
+        for _ in range(rng.randint(1, 2)):
+            number = f"8-495-{rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}"
+            phones.append({"number": number, "organization_id": index})
+    return {"buildings": buildings, "activities": activities, "organizations": organizations, "links": links, "phones": phones}
+
+
+def _plan_summary(plan: dict) -> dict:
+    shape: list[str] = []
+    rows_scanned = 0
+
+    def visit(node: dict, depth: int) -> None:
+        nonlocal rows_scanned
+        label = node["Node Type"]
+        if "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+            # Прочитанные строки — это и возвращенные, и отброшенные фильтром: иначе seq scan, который оставляет
+            # одну строку из 100 тысяч, выглядел бы дешевым. Счетчики в EXPLAIN усреднены на один проход.
+            per_loop = (
+                node.get("Actual Rows", 0)
+                + node.get("Rows Removed by Filter", 0)
+                + node.get("Rows Removed by Index Recheck", 0)
+            )
+            rows_scanned += int(per_loop * node.get("Actual Loops", 1))
+        if "Index Name" in node:
+            label += f" using {node['Index Name']}"
+        shape.append("  " * depth + label)
+        for child in node.get("Plans", ()):
+            visit(child, depth + 1)
+
+    visit(plan["Plan"], 0)
+    top = plan["Plan"]
+    return {
+        "shape": shape,
+        "rows_scanned": rows_scanned,
+        "buffers": int(top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0)),
+    }
+
+
+async def _reset_schema(url: str) -> None:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            database = await conn.scalar(text("SELECT current_database()"))
+            if not database.startswith(DEDICATED_DB_PREFIX):
+                pytest.fail(
+                    f"Refusing to drop schema public in database {database!r}: "
+                    f"point PLAN_TESTS_DATABASE_URL at a dedicated database named {DEDICATED_DB_PREFIX}*"
+                )
+            await conn.execute(text("DROP SCHEMA public CASCADE"))
+            await conn.execute(text("CREATE SCHEMA public"))
+    finally:
+        await engine.dispose()
+
+
+def _migrate(url: str) -> None:
+    # Индексы и ограничения — те, что создают миграции, а не Base.metadata: расхождение модели и миграций
+    # иначе осталось бы незамеченным. Alembic импортируется здесь: без PLAN_TESTS модуль только собирается.
+    from alembic import command
+    from alembic.config import Config
+
+    asyncio.run(_reset_schema(url))
+    # Без alembic.ini: его секции логирования перенастроили бы логгеры остальных тестов.
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.attributes["database_url"] = url
+    command.upgrade(config, "head")
+
+
+async def _collect_plans(url: str) -> dict[str, dict]:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            data = _synthetic_rows(SCALE)
+            for table, rows in (
+                (Building.__table__, data["buildings"]),
+                (Activity.__table__, data["activities"]),
+                (Organization.__table__, data["organizations"]),
+                (organization_activity, data["links"]),
+                (Phone.__table__, data["phones"]),
+            ):
+                for start in range(0, len(rows), 5000):
+                    await conn.execute(insert(table), rows[start:start + 5000])
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("ANALYZE"))
+
+        plans = {}
+        async with async_sessionmaker(engine)() as session:
+            for name, stmt in router_queries(await sample_params(session)).items():
+                # Прогрев: буферы сравниваются в теплом кеше, иначе первый запуск считал бы чтения с диска.
+                await session.execute(stmt)
+                plans[name] = _plan_summary(await explain_plan(session, stmt, analyze=True, buffers=True))
+        return plans
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def postgres_url(tmp_path_factory):
+    if DATABASE_URL:
+        yield DATABASE_URL
+        return
+    initdb, pg_ctl = _pg_tool("initdb"), _pg_tool("pg_ctl")
+
+    createdb = _pg_tool("createdb")
+    if not initdb or not pg_ctl or not createdb:
+        pytest.skip("PostgreSQL binaries (initdb, pg_ctl, createdb) not found; set PLAN_TESTS_PG_BIN or PLAN_TESTS_DATABASE_URL")
+
+    base = tmp_path_factory.mktemp("postgres")
+    data_dir = base / "data"
+    port = _free_port()
+    subprocess.run([initdb, "-D", str(data_dir), "-U", "postgres", "-A", "trust", "--no-sync"], check=True, capture_output=True)
+    subprocess.run(
+        [
+            pg_ctl, "-D", str(data_dir), "-l", str(base / "postgres.log"), "-w",
+            "-o", f"-p {port} -k {base} -c listen_addresses=127.0.0.1 -c fsync=off", "start",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    try:
+        database = f"{DEDICATED_DB_PREFIX}s"
+        subprocess.run(
+            [createdb, "-h", "127.0.0.1", "-p", str(port), "-U", "postgres", database], check=True, capture_output=True
+        )
+        yield f"postgresql+asyncpg://postgres@127.0.0.1:{port}/{database}"
+    finally:
+        subprocess.run([pg_ctl, "-D", str(data_dir), "-m", "immediate", "stop"], capture_output=True)
+
+
+@pytest.fixture(scope="module")
+def plans(postgres_url):
+    _migrate(postgres_url)
+    return asyncio.run(_collect_plans(postgres_url))
+
+
+@pytest.fixture(scope="module")
+def baseline(plans):
+    if UPDATE_BASELINE:
+        BASELINE_PATH.write_text(json.dumps({"scale": SCALE, "queries": plans}, indent=2) + "\n", encoding="utf-8")
+    if not BASELINE_PATH.exists():
+        pytest.fail(f"{BASELINE_PATH.name} is missing; record it with PLAN_TESTS_UPDATE=1 and commit it")
+    stored = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    if stored["scale"] != SCALE:
+        pytest.skip(f"Baseline was recorded at scale {stored['scale']}; rerun with PLAN_TESTS_UPDATE=1")
+    return stored["queries"]
+
+
+# Имена запросов не зависят от данных, поэтому параметризуем по фиктивным параметрам.
+QUERY_NAMES = list(router_queries(SampleParams(1, 1, 1, [1], "a", (55.7558, 37.6173))))
+
+
+@pytest.mark.parametrize("query", QUERY_NAMES)
+def test_query_plan_has_not_regressed(query, plans, baseline):
+    if query not in baseline:
+        pytest.fail(f"No baseline for {query}; record it with PLAN_TESTS_UPDATE=1 and commit plan_baseline.json")
+    actual, expected = plans[query], baseline[query]
+
+    assert actual["shape"] == expected["shape"], "Plan shape changed:\n" + "\n".join(actual["shape"])
+    for metric in ("rows_scanned", "buffers"):
+        limit = expected[metric] * (1 + THRESHOLD) + SLACK
+        assert actual[metric] <= limit, f"{metric} regressed: {actual[metric]} > {limit:.0f} (baseline {expected[metric]})"
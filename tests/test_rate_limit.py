@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.core.config import RateLimitConfig, get_settings
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitBackend
+from app.routers.deps import get_db
+
+
+def _limit(dependency_overrides, **update):
+    def override_get_settings():
+        return get_settings().model_copy(update={"API_KEYS": {"test-key", "other-key"}, **update})
+
+    dependency_overrides({get_settings: override_get_settings})
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_rejects_with_retry_after(client, auth_headers, dependency_overrides):
+    _limit(dependency_overrides, RATE_LIMIT_PER_SECOND=0.5, RATE_LIMIT_BURST=2)
+
+    statuses = [(await client.get("/buildings", headers=auth_headers)).status_code for _ in range(2)]
+    assert statuses == [200, 200]
+    rejected = await client.get("/buildings", headers=auth_headers)
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "2"
+
+    # Лимит считается отдельно для каждого ключа.
+    assert (await client.get("/buildings", headers={"X-API-Key": "other-key"})).status_code == 200
+    metrics = (await client.get("/metrics", headers=auth_headers)).json()
+    assert metrics["rate_limit.rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_per_key_override(client, auth_headers, dependency_overrides):
+    _limit(
+        dependency_overrides,
+        RATE_LIMIT_PER_SECOND=100,
+        RATE_LIMIT_OVERRIDES={"other-key": RateLimitConfig(per_second=1, burst=1)},
+    )
+    other = {"X-API-Key": "other-key"}
+    assert (await client.get("/buildings", headers=other)).status_code == 200
+    assert (await client.get("/buildings", headers=other)).status_code == 429
+    assert (await client.get("/buildings", headers=auth_headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_rejects_before_db_session(
+    client, auth_headers, session_maker, dependency_overrides
+):
+    _limit(dependency_overrides, RATE_LIMIT_CONCURRENCY=1)
+    sessions_opened = 0
+
+    async def slow_get_db():
+        nonlocal sessions_opened
+        sessions_opened += 1
+        async with session_maker() as session:
+            await asyncio.sleep(0.05)
+            yield session
+
+    dependency_overrides({get_db: slow_get_db})
+    responses = await asyncio.gather(
+        client.get("/buildings", headers=auth_headers),
+        # Разные параметры: одинаковые запросы объединились бы в один.
+        client.get("/buildings?page=1", headers=auth_headers),
+    )
+    assert sorted(response.status_code for response in responses) == [200, 429]
+    assert sessions_opened == 1
+    assert (await client.get("/buildings", headers=auth_headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_in_memory_bucket_refills():
+    backend = InMemoryRateLimitBackend()
+    assert await backend.take_token("key", per_second=1000, burst=1) == 0
+    assert await backend.take_token("key", per_second=1000, burst=1) > 0
+    await asyncio.sleep(0.01)
+    assert await backend.take_token("key", per_second=1000, burst=1) == 0
+
+
+def test_backend_interface_is_abstract():
+    class Partial(RateLimitBackend):
+        async def take_token(self, key: str, per_second: float, burst: int) -> float:
+            return 0.0
+
+    with pytest.raises(TypeError):
+        Partial()
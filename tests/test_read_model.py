@@ -0,0 +1,131 @@
+import pytest
+import pytest_asyncio
+from pydantic import ValidationError
+
+from app.core.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.core.config import Settings, get_settings
+from app.main import app
+from app.read_model.store import ReadModelStore
+from app.routers import deps
+from app.routers.deps import get_db
+
+READ_PATHS = [
+    "/buildings",
+    "/buildings/stats",
+    "/buildings/near?lat=55.7558&lon=37.6173&radius_km=5",
+    "/organizations/near?lat=55.7558&lon=37.6173&radius_km=3",
+    "/organizations/within-rect?min_lat=55.70&max_lat=55.76&min_lon=37.5&max_lon=37.62&size=2&page=2",
+]
+
+
+@pytest_asyncio.fixture
+async def read_model(tmp_path, session_maker, monkeypatch):
+    store = ReadModelStore(tmp_path / "read_model.bin", session_maker)
+    monkeypatch.setattr(deps, "get_read_model_store", lambda: store)
+    return store
+
+
+def _enable_read_model(dependency_overrides, enabled: bool):
+    def override_get_settings():
+        return get_settings().model_copy(
+            update={"API_KEYS": {"test-key"}, "WRITE_API_KEYS": {"test-key"}, "READ_MODEL_ENABLED": enabled}
+        )
+
+    dependency_overrides({get_settings: override_get_settings})
+
+
+@pytest.mark.asyncio
+async def test_read_model_matches_database(client, auth_headers, seed_data, read_model, dependency_overrides):
+    org_id = seed_data["organizations"]["org1"]
+    paths = READ_PATHS + [
+        f"/organizations/{org_id}",
+        f"/organizations/by-building/{seed_data['buildings']['b1']}",
+        f"/organizations/by-activity/{seed_data['activities']['dairy']}",
+        f"/organizations/by-activity-tree/{seed_data['activities']['food']}?size=3",
+    ]
+    expected = [(await client.get(path, headers=auth_headers)).json() for path in paths]
+    polygon = {"type": "Polygon", "coordinates": [[[37.5, 55.7], [37.7, 55.7], [37.6, 55.8], [37.5, 55.7]]]}
+    expected_polygon = (await client.post("/organizations/within-polygon", headers=auth_headers, json=polygon)).json()
+
+    _enable_read_model(dependency_overrides, True)
+    async with read_model.session_factory() as session:
+        assert await read_model.rebuild(session)
+    snapshot = read_model.current()
+    assert snapshot is not None
+
+    actual = [(await client.get(path, headers=auth_headers)).json() for path in paths]
+    assert actual == expected
+    actual_polygon = await client.post("/organizations/within-polygon", headers=auth_headers, json=polygon)
+    assert actual_polygon.json() == expected_polygon
+    assert expected_polygon["total"] > 0
+    missing = await client.get("/organizations/999999", headers=auth_headers)
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_falls_back_to_database(client, auth_headers, seed_data, read_model, dependency_overrides):
+    _enable_read_model(dependency_overrides, True)
+    async with read_model.session_factory() as session:
+        await read_model.rebuild(session)
+
+    building_id = seed_data["buildings"]["b8"]
+    created = await client.post(
+        "/organizations/bulk",
+        headers=auth_headers,
+        json={"upsert": [{"name": "Neva Books", "building_id": building_id, "phones": [], "activity_ids": []}]},
+    )
+    assert created.status_code == 200
+    # Снимок отстал от версии данных: ответ идет из БД, а снимок пересобирается в фоне.
+    assert read_model.current() is None
+    response = await client.get(f"/organizations/by-building/{building_id}", headers=auth_headers)
+    assert [item["name"] for item in response.json()["items"]] == ["Neva Books"]
+
+    await read_model.wait_rebuild()
+    snapshot = read_model.current()
+    assert snapshot is not None
+    assert snapshot.organizations_in_building(building_id)
+
+
+@pytest.mark.asyncio
+async def test_other_worker_maps_existing_snapshot(tmp_path, session_maker, seed_data, read_model):
+    async with session_maker() as session:
+        await read_model.rebuild(session)
+
+    def no_session():
+        raise AssertionError("snapshot should be reused without a rebuild")
+
+    other = ReadModelStore(tmp_path / "read_model.bin", no_session)
+    snapshot = other.current()
+    assert snapshot is not None
+    assert list(snapshot.organization_ids) == sorted(seed_data["organizations"].values())
+
+
+def test_read_model_requires_shared_data_version(monkeypatch):
+    monkeypatch.setenv("READ_MODEL_ENABLED", "true")
+    monkeypatch.setenv("DATA_VERSION_FILE", "")
+    with pytest.raises(ValidationError, match="READ_MODEL_ENABLED requires DATA_VERSION_FILE"):
+        Settings(_env_file=None, DATABASE_URL="postgresql://a:a@localhost/a")
+    monkeypatch.setenv("DATA_VERSION_FILE", "data/data_version.json")
+    assert Settings(_env_file=None, DATABASE_URL="postgresql://a:a@localhost/a").READ_MODEL_ENABLED
+
+
+@pytest.mark.asyncio
+async def test_snapshot_answers_while_breaker_is_open(
+    client, auth_headers, seed_data, session_maker, read_model, dependency_overrides, monkeypatch
+):
+    _enable_read_model(dependency_overrides, True)
+    async with read_model.session_factory() as session:
+        assert await read_model.rebuild(session)
+    # Настоящий get_db с разомкнутым автоматом: 503 получают только маршруты, которым нужна БД.
+    app.dependency_overrides.pop(get_db)
+    monkeypatch.setattr(deps, "get_sessionmaker", lambda: session_maker)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    dependency_overrides({get_circuit_breaker: lambda: breaker})
+
+    for path in READ_PATHS:
+        response = await client.get(path, headers=auth_headers)
+        assert response.status_code == 200, path
+        assert "X-Stale" not in response.headers
+    assert (await client.get("/changes", headers=auth_headers)).status_code == 503
+    assert breaker.state == "open"
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.core.metrics import get_metrics
+from app.core.stale_cache import get_stale_cache
+from app.main import app
+from app.models.organization import Organization
+from app.routers import deps
+from app.routers.deps import get_db
+
+
+def test_breaker_opens_after_threshold_and_probes_after_timeout(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.circuit_breaker.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=5)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 5
+
+    now[0] += 5
+    assert breaker.state == "half_open"
+    # Пробный запрос один на окно: следующие ждут его результата.
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] += 5
+    assert breaker.allow_request()
+    assert breaker.record_success()
+    assert breaker.state == "closed"
+    assert not breaker.record_success()
+
+
+@pytest_asyncio.fixture
+async def database(client, session_maker, dependency_overrides, monkeypatch, tmp_path):
+    # Запросы идут через настоящий get_db; флаг down подменяет БД на недоступную.
+    app.dependency_overrides.pop(get_db)
+    broken_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/directory.db")
+    broken_maker = async_sessionmaker(broken_engine)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    dependency_overrides({get_circuit_breaker: lambda: breaker})
+    # connects — попытки соединиться с недоступной БД.
+    state = {"down": False, "connects": 0}
+
+    @event.listens_for(broken_engine.sync_engine, "do_connect")
+    def count_connect(*_args):
+        state["connects"] += 1
+
+    def sessionmaker():
+        def factory():
+            return (broken_maker if state["down"] else session_maker)()
+
+        return factory
+
+    monkeypatch.setattr(deps, "get_sessionmaker", sessionmaker)
+    yield state
+    await broken_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stale_response_while_database_is_down(client, auth_headers, seed_data, session_maker, database):
+    organization_id = seed_data["organizations"]["org2"]
+    path = f"/organizations/{organization_id}"
+    fresh = await client.get(path, headers=auth_headers)
+    assert fresh.status_code == 200
+    assert "X-Stale" not in fresh.headers
+
+    database["down"] = True
+    stale = await client.get(path, headers=auth_headers)
+    assert stale.status_code == 200
+    assert stale.headers["X-Stale"] == "1"
+    assert stale.headers["Age"] == "0"
+    assert stale.json() == fresh.json()
+
+    # Ответа, который еще ни разу не был успешным, нет: 503, а не 500.
+    missing = await client.get("/organizations/by-building/1", headers=auth_headers)
+    assert missing.status_code == 503
+    assert "Retry-After" in missing.headers
+
+    # После двух сбоев подряд автомат разомкнут: запрос не ждет соединения и сразу получает устаревший ответ.
+    assert get_metrics().get("db.breaker_opened") == 1
+    connects = database["connects"]
+    assert connects > 0
+    assert (await client.get(path, headers=auth_headers)).headers["X-Stale"] == "1"
+    assert database["connects"] == connects
+
+
+@pytest.mark.asyncio
+async def test_stale_responses_refresh_after_recovery(client, auth_headers, seed_data, session_maker, database):
+    organization_id = seed_data["organizations"]["org2"]
+    path = f"/organizations/{organization_id}"
+    await client.get(path, headers=auth_headers)
+
+    database["down"] = True
+    for _ in range(2):
+        assert (await client.get(path, headers=auth_headers)).headers["X-Stale"] == "1"
+    async with session_maker() as session:
+        organization = await session.get(Organization, organization_id)
+        organization.name = "Meat House 2"
+        await session.commit()
+    assert (await client.get(path, headers=auth_headers)).json()["name"] == "Meat House"
+
+    # Пробный запрос после паузы проходит и замыкает автомат; отданный устаревшим ответ обновляется в фоне.
+    database["down"] = False
+    await asyncio.sleep(0.06)
+    assert (await client.get("/organizations/by-building/1", headers=auth_headers)).status_code == 200
+    await asyncio.wait_for(get_stale_cache()._refresh_task, timeout=2)
+    assert get_metrics().get("stale_cache.refreshed") == 1
+
+    database["down"] = True
+    response = await client.get(path, headers=auth_headers)
+    assert response.headers["X-Stale"] == "1"
+    assert response.json()["name"] == "Meat House 2"
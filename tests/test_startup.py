@@ -0,0 +1,17 @@
+import os
+
+from app.startup_benchmark import measure
+
+# Щедрые бюджеты для CI: тест ловит регрессии порядка «импорт снова создает движок и все роутеры»,
+# а не колебания в десятки миллисекунд. Точные цифры — python -m app.startup_benchmark.
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "1500"))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get("STARTUP_FIRST_REQUEST_BUDGET_MS", "5000"))
+
+
+def test_startup_is_lazy_and_within_budget():
+    report = measure({"API_KEYS": '["bench-key"]'})
+    # Импорт app.main не читает настройки и не подключает роутеры (а с ними модели и движок БД).
+    assert report["lazy_import"]
+    assert report["first_request_status"] == 200
+    assert report["import_ms"] < IMPORT_BUDGET_MS
+    assert report["first_request_ms"] < FIRST_REQUEST_BUDGET_MS